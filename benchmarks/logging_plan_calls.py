@@ -0,0 +1,76 @@
+"""
+benchmarks/logging_plan_calls.py - COM calls per Start, legacy walk vs. compiled plan.
+
+Runs against services.fake_canoe, which counts every member access as one
+COM round trip, so it works without CANoe. --latency-ms adds a per-call
+delay to show what the calls cost in wall time:
+
+    python benchmarks/logging_plan_calls.py --blocks 4 --videos 6 --latency-ms 1
+"""
+
+from __future__ import annotations
+
+from pathlib import Path
+import argparse
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent / "src"))
+
+from services.fake_canoe import FakeCANoe  # noqa: E402
+from services.logging_plan import compile_logging_plan  # noqa: E402
+
+
+def _fake_canoe(blocks: int, videos: int, latency: float) -> FakeCANoe:
+    return FakeCANoe(
+        logging_extensions=("blf",) * blocks,
+        video_windows=tuple(f"Cam{i}" for i in range(videos)),
+        latency=latency,
+    )
+
+
+def _legacy_start(canoe, log_folder: Path, log_name: str) -> None:
+    # The per-Start walk MainWindow did before the logging plan existed.
+    logging_collection = canoe.Configuration.OnlineSetup.LoggingCollection
+    for i in range(logging_collection.Count):
+        log_block = logging_collection.Item(i + 1)
+        file_extension = log_block.FullName.split(".")[-1]
+        log_block.FullName = str((log_folder / f"{log_name}.{file_extension}").resolve())
+    video_config = canoe.Configuration.OnlineSetup.VideoWindows
+    for i in range(video_config.Count):
+        vw = video_config.Item(i + 1)
+        vw.RecordFile = str((log_folder / f"_{log_name}_{vw.Name}.avi").resolve())
+
+
+def main(argv: list[str] | None = None) -> int:
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--blocks", type=int, default=4)
+    parser.add_argument("--videos", type=int, default=6)
+    parser.add_argument("--latency-ms", type=float, default=0.0, help="simulated time per COM call")
+    args = parser.parse_args(argv)
+
+    log_folder = Path(tempfile.gettempdir())
+    log_name = "R320RC2_XC60_Veh6_TEST_{MeasurementStart}"
+    canoe = _fake_canoe(args.blocks, args.videos, args.latency_ms / 1000.0)
+
+    def measure(step):
+        canoe.reset_counts()
+        started = time.perf_counter()
+        result = step()
+        return result, canoe.total_calls, (time.perf_counter() - started) * 1000.0
+
+    _, legacy, legacy_ms = measure(lambda: _legacy_start(canoe, log_folder, log_name))
+    plan, compile_calls, compile_ms = measure(lambda: compile_logging_plan(canoe))
+    # Start checks the cached handles against the loaded cfg before applying.
+    _, planned, planned_ms = measure(lambda: plan.is_current(canoe) and plan.apply(log_folder, log_name))
+
+    print(f"blocks={args.blocks} videos={args.videos} latency={args.latency_ms:g} ms/call")
+    print(f"legacy walk per Start : {legacy} COM calls, {legacy_ms:.1f} ms")
+    print(f"plan compile (per cfg): {compile_calls} COM calls, {compile_ms:.1f} ms")
+    print(f"plan check+apply/Start: {planned} COM calls, {planned_ms:.1f} ms")
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
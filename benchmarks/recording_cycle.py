@@ -0,0 +1,315 @@
+"""
+benchmarks/recording_cycle.py - End-to-end recording cycle timings against the fake CANoe.
+
+Drives services.session.SessionController (the code behind the GUI buttons
+and campaign.py) through services.fake_canoe and measures:
+
+    connect_cold / connect_warm   attach + cfg load (first time / fingerprint unchanged)
+    connect_empty                 attach + cfg load into a CANoe with no cfg open
+    start                         SessionController.start()
+    start_to_resolved             Start until the comment file carries CANoe's suffix
+    poll_tick                     one UI poll: Running, clock sync, five status sysvars
+    comment_add / comment_durable add_comment() returning / written and flushed
+    discard_<n>                   stop + delete the run's files in a folder with n others
+
+    python benchmarks/recording_cycle.py                      # run, save, compare to baseline
+    python benchmarks/recording_cycle.py --update-baseline    # accept this run as the baseline
+    python benchmarks/recording_cycle.py --latency-ms 1 --sizes 10,1000 --repeat 3
+
+Results go to benchmarks/results/recording_cycle_<timestamp>.json. A metric
+regresses when its median exceeds the baseline median by more than the
+threshold (--threshold, or per metric in the baseline's "thresholds") plus
+--slack-ms; any regression makes the exit code 1. Baselines are machine
+specific: record one per bench machine with --update-baseline.
+"""
+
+from __future__ import annotations
+
+from datetime import datetime
+from pathlib import Path
+import argparse
+import json
+import platform
+import statistics
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent / "src"))
+
+from services.clock import MeasurementClock  # noqa: E402
+from services.comments import CommentJournal  # noqa: E402
+from services.fake_canoe import DEFAULT_SYSVARS, FakeCANoe  # noqa: E402
+from services.fingerprint import FingerprintStore  # noqa: E402
+from services.session import SessionController, SessionMetadata, session_naming  # noqa: E402
+
+HERE = Path(__file__).resolve().parent
+DEFAULT_BASELINE = HERE / "baselines" / "recording_cycle.json"
+RESULTS_DIR = HERE / "results"
+
+# A minimal cfg for the fingerprint/Open path; CANoe never parses it here.
+_CFG_TEXT = "Version 17.0.0\nConfigurationName benchmark\n"
+
+
+def _summary(samples: list[float]) -> dict:
+    ordered = sorted(samples)
+    p90 = ordered[max(0, int(round(0.9 * len(ordered))) - 1)]
+    return {
+        "n": len(ordered),
+        "median_ms": round(statistics.median(ordered), 3),
+        "p90_ms": round(p90, 3),
+        "min_ms": round(ordered[0], 3),
+        "max_ms": round(ordered[-1], 3),
+    }
+
+
+def _timed(fn) -> tuple[object, float]:
+    started = time.perf_counter()
+    result = fn()
+    return result, (time.perf_counter() - started) * 1000.0
+
+
+def _next_second() -> None:
+    # CANoe (and the fake) stamp {MeasurementStart} to the second; runs in
+    # the same second would share file names.
+    time.sleep(1.0 - (time.time() % 1.0) + 0.01)
+
+
+def _read_sysvar(canoe, name: str):
+    # Same namespace walk as MainWindow._read_sysvar_value.
+    *chain, var_name = [part for part in name.split("::") if part]
+    ns = canoe.System.Namespaces.Item(chain[0])
+    for child in chain[1:]:
+        ns = ns.Namespaces.Item(child)
+    return ns.Variables.Item(var_name).Value
+
+
+def _poll_tick(controller: SessionController) -> None:
+    controller.measurement_running()
+    controller.sync_clock()
+    for name in DEFAULT_SYSVARS:
+        _read_sysvar(controller.canoe, name)
+
+
+class _Bench:
+    def __init__(self, workdir: Path, args: argparse.Namespace) -> None:
+        self.workdir = workdir
+        self.args = args
+        self.log_root = workdir / "logs"
+        self.log_root.mkdir()
+        self.cfg = workdir / "benchmark.cfg"
+        self.cfg.write_text(_CFG_TEXT, encoding="utf-8")
+        self.metadata = SessionMetadata(
+            sw_rel="R000BENCH", me_version="0.0", tag="bench", vehicle_id="BENCH", vehicle_token="BENCH"
+        )
+        self.samples: dict[str, list[float]] = {}
+
+    def record(self, metric: str, ms: float) -> None:
+        self.samples.setdefault(metric, []).append(ms)
+
+    def fake(self, cfg_file: str = "Untitled.cfg") -> FakeCANoe:
+        return FakeCANoe(
+            logging_extensions=("blf", "asc"),
+            video_windows=("Front", "Rear"),
+            latency=self.args.latency_ms / 1000.0,
+            start_delay=self.args.start_delay,
+            cfg_file=cfg_file,
+        )
+
+    def controller(self, name: str) -> SessionController:
+        data = self.workdir / "data"
+        return SessionController(
+            CommentJournal(data / f"{name}_journal.jsonl"),
+            clock=MeasurementClock(),
+            fingerprints=FingerprintStore(data / f"{name}_fingerprints.json"),
+            cfg_cache_dir=data / "cfg_index",
+            settle=self.args.settle,
+        )
+
+    def connect(self) -> None:
+        for i in range(self.args.repeat):
+            controller = self.controller(f"connect{i}")
+            canoe = self.fake()
+            reopened, ms = _timed(lambda: controller.attach(canoe, str(self.cfg)))
+            if not reopened:
+                raise RuntimeError("cold connect did not open the cfg")
+            self.record("connect_cold", ms)
+            reopened, ms = _timed(lambda: controller.attach(canoe, str(self.cfg)))
+            if reopened:
+                raise RuntimeError("warm connect reopened an unchanged cfg")
+            self.record("connect_warm", ms)
+
+            # Same fingerprint store, but CANoe came up without a cfg: the
+            # recorded fingerprint must not make the hub skip the Open.
+            canoe = self.fake(cfg_file="")
+            reopened, ms = _timed(lambda: controller.attach(canoe, str(self.cfg)))
+            if not reopened or canoe.Configuration.FullName != str(self.cfg):
+                raise RuntimeError("connect to a CANoe without a cfg did not open the cfg")
+            self.record("connect_empty", ms)
+            controller.journal.shutdown()
+
+    def cycle(self, controller: SessionController) -> None:
+        """start, resolve, poll, comment, stop for one recording."""
+        started = time.perf_counter()
+        controller.start(self.log_root, self.metadata)
+        self.record("start", (time.perf_counter() - started) * 1000.0)
+        deadline = started + 10.0
+        while not controller.resolve_comment_file():
+            if time.perf_counter() > deadline:
+                raise RuntimeError("comment file never resolved")
+            time.sleep(0.002)
+        self.record("start_to_resolved", (time.perf_counter() - started) * 1000.0)
+
+        for _ in range(self.args.ticks):
+            self.record("poll_tick", _timed(lambda: _poll_tick(controller))[1])
+        for i in range(self.args.comments):
+            pressed = time.perf_counter()
+            controller.add_comment(f"benchmark comment {i}", pressed_at=pressed)
+            self.record("comment_add", (time.perf_counter() - pressed) * 1000.0)
+            controller.journal.sync()
+            self.record("comment_durable", (time.perf_counter() - pressed) * 1000.0)
+        controller.stop()
+        controller.clock.reset()
+        _next_second()
+
+    def cycles(self) -> None:
+        controller = self.controller("cycle")
+        controller.attach(self.fake(), str(self.cfg))
+        for _ in range(self.args.repeat):
+            self.cycle(controller)
+        controller.journal.shutdown()
+
+    def discard(self) -> None:
+        for size in self.args.sizes:
+            root = self.workdir / f"discard_{size}"
+            root.mkdir()
+            folder, _prefix, _name = session_naming(root, self.metadata)
+            folder.mkdir(parents=True)
+            for i in range(size):
+                (folder / f"other_run_{i:05d}.blf").touch()
+            controller = self.controller(f"discard{size}")
+            controller.attach(self.fake(), str(self.cfg))
+            for _ in range(self.args.repeat):
+                controller.start(root, self.metadata)
+                while not controller.resolve_comment_file():
+                    time.sleep(0.002)
+                (deleted, failed, _removed), ms = _timed(controller.discard)
+                if failed or not deleted:
+                    raise RuntimeError(f"discard in a {size}-file folder deleted {deleted}, failed {failed}")
+                self.record(f"discard_{size}", ms)
+                _next_second()
+            controller.journal.shutdown()
+
+
+def compare(results: dict, baseline: dict, *, threshold: float, slack_ms: float) -> list[str]:
+    """Lines for metrics slower than baseline median * (1 + threshold) + slack_ms."""
+    regressions = []
+    overrides = baseline.get("thresholds", {})
+    for metric, current in sorted(results["metrics"].items()):
+        base = baseline.get("metrics", {}).get(metric)
+        if base is None:
+            continue
+        limit = base["median_ms"] * (1.0 + float(overrides.get(metric, threshold))) + slack_ms
+        if current["median_ms"] > limit:
+            regressions.append(
+                f"{metric}: median {current['median_ms']:.2f} ms > limit {limit:.2f} ms "
+                f"(baseline {base['median_ms']:.2f} ms)"
+            )
+    return regressions
+
+
+def format_results(results: dict, baseline: dict | None) -> str:
+    header = f"{'metric':<20}{'n':>6}{'median':>10}{'p90':>10}{'max':>10}{'baseline':>10}{'delta':>9}"
+    lines = [header, "-" * len(header)]
+    for metric, m in results["metrics"].items():
+        base = (baseline or {}).get("metrics", {}).get(metric)
+        base_cell = f"{base['median_ms']:>10.2f}" if base else f"{'-':>10}"
+        delta = (
+            f"{(m['median_ms'] / base['median_ms'] - 1.0) * 100.0:>+8.0f}%"
+            if base and base["median_ms"] > 0
+            else f"{'-':>9}"
+        )
+        lines.append(
+            f"{metric:<20}{m['n']:>6}{m['median_ms']:>10.2f}{m['p90_ms']:>10.2f}{m['max_ms']:>10.2f}"
+            + base_cell
+            + delta
+        )
+    return "\n".join(lines)
+
+
+def main(argv: list[str] | None = None) -> int:
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--repeat", type=int, default=5, help="recordings per scenario")
+    parser.add_argument("--ticks", type=int, default=50, help="poll ticks timed per recording")
+    parser.add_argument("--comments", type=int, default=10, help="comments timed per recording")
+    parser.add_argument(
+        "--sizes",
+        type=lambda text: [int(part) for part in text.split(",") if part],
+        default=[10, 100, 1000, 10000],
+        help="existing files in the log folder for discard (comma separated)",
+    )
+    parser.add_argument("--latency-ms", type=float, default=0.2, help="simulated time per COM call")
+    parser.add_argument("--start-delay", type=float, default=0.0, help="seconds until the fake's log files appear")
+    parser.add_argument("--settle", type=float, default=0.0, help="SessionController settle delay (hub: 0.5)")
+    parser.add_argument("--baseline", type=Path, default=DEFAULT_BASELINE)
+    parser.add_argument("--update-baseline", action="store_true", help="store this run as the baseline")
+    parser.add_argument("--threshold", type=float, default=0.25, help="allowed relative slowdown of the median")
+    parser.add_argument("--slack-ms", type=float, default=0.5, help="absolute allowance on top of the threshold")
+    parser.add_argument("--output", type=Path, help="result file (default: benchmarks/results/...)")
+    args = parser.parse_args(argv)
+
+    with tempfile.TemporaryDirectory(prefix="hub_bench_") as tmp:
+        bench = _Bench(Path(tmp), args)
+        bench.connect()
+        bench.cycles()
+        bench.discard()
+
+    results = {
+        "benchmark": "recording_cycle",
+        "created": datetime.now().isoformat(timespec="seconds"),
+        "machine": {"platform": platform.platform(), "python": platform.python_version()},
+        "params": {
+            "repeat": args.repeat,
+            "ticks": args.ticks,
+            "comments": args.comments,
+            "sizes": args.sizes,
+            "latency_ms": args.latency_ms,
+            "start_delay": args.start_delay,
+            "settle": args.settle,
+        },
+        "metrics": {metric: _summary(samples) for metric, samples in bench.samples.items()},
+    }
+
+    output = args.output or RESULTS_DIR / f"recording_cycle_{datetime.now():%Y-%m-%d_%H-%M-%S}.json"
+    output.parent.mkdir(parents=True, exist_ok=True)
+    output.write_text(json.dumps(results, indent=2), encoding="utf-8")
+
+    baseline = None
+    if args.baseline.exists():
+        baseline = json.loads(args.baseline.read_text(encoding="utf-8"))
+        if baseline.get("params") != results["params"]:
+            print(f"Note: baseline was recorded with different parameters: {baseline.get('params')}")
+    print(format_results(results, baseline))
+    print(f"Results written to {output}")
+
+    if args.update_baseline:
+        if baseline is not None and "thresholds" in baseline:
+            results["thresholds"] = baseline["thresholds"]
+        args.baseline.parent.mkdir(parents=True, exist_ok=True)
+        args.baseline.write_text(json.dumps(results, indent=2), encoding="utf-8")
+        print(f"Baseline updated: {args.baseline}")
+        return 0
+    if baseline is None:
+        print(f"No baseline at {args.baseline}; run with --update-baseline to record one.")
+        return 0
+
+    regressions = compare(results, baseline, threshold=args.threshold, slack_ms=args.slack_ms)
+    for line in regressions:
+        print(f"REGRESSION {line}")
+    if not regressions:
+        print("No regressions against the baseline.")
+    return 1 if regressions else 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
@@ -4,8 +4,12 @@ ui/app.py - GUI bootstrap for the CANoe Logging Tool.
 
 from __future__ import annotations
 
+import multiprocessing
+import sys
+
 import styles
-from core.state import discover_paths, load_state
+from core.state import StateStore, discover_paths, load_state
+from services.events import configure_events, emit
 from ui.main_window import MainWindow
 
 
@@ -14,11 +18,24 @@ def run() -> int:
 
     paths = discover_paths()
     state = load_state(paths)
-
-    app = MainWindow(paths=paths, state=state)
-    app.mainloop()
+    state_store = StateStore(paths, state)
+    events = configure_events(paths.data_dir / "events" / "events.jsonl")
+    emit("hub_start", argv=sys.argv)
+
+    app = MainWindow(paths=paths, state=state, state_store=state_store)
+    if state.prewarm:
+        app.after(0, app.start_prewarm)
+    try:
+        app.mainloop()
+    finally:
+        state_store.close()
+        emit("hub_exit")
+        events.close()
     return 0
 
 
 if __name__ == "__main__":
+    # The post-stop integrity check runs in worker processes; a frozen
+    # build has to dispatch them here.
+    multiprocessing.freeze_support()
     raise SystemExit(run())
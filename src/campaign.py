@@ -0,0 +1,266 @@
+"""
+campaign.py - Headless recording campaigns (no GUI).
+
+Runs repeated start/stop cycles from a JSON campaign file through the same
+session controller the GUI uses:
+
+    python campaign.py campaign.json
+    python campaign.py campaign.json --fake        # against services.fake_canoe
+    python campaign.py campaign.json --fake --fake-latency-ms 2 --fake-start-delay 0.8
+
+Campaign file (every key optional except "cycles"):
+
+    {
+      "canoe_exec": "C:/Program Files/Vector CANoe 17/Exec64/CANoe64.exe",
+      "cfg_file": "C:/Configs/anSWer.cfg",
+      "log_dir": "D:/Logs",
+      "sw_rel": "R300RC1", "me_version": "2.0", "vehicle_id": "ABC123",
+      "cycles": 20,
+      "record_seconds": 600,
+      "pause_seconds": 10,
+      "tags": ["highway", "city"],
+      "comments": [{"at": 5, "text": "cycle {cycle} started"}],
+      "discard": false
+    }
+
+Missing keys fall back to the hub's saved state. Tags rotate per cycle;
+comment texts may use {cycle} and {tag}. Per-cycle latencies are printed and
+appended as JSON lines to data_dir/campaign_<timestamp>.jsonl.
+"""
+
+from __future__ import annotations
+
+from dataclasses import asdict, dataclass, field
+from datetime import datetime
+from pathlib import Path
+import argparse
+import json
+import time
+
+from core.state import VEHICLE_NUMBERS, discover_paths, load_state, load_vehicle_catalog
+from services.canoe import (
+    discover_canoe_installations,
+    open_canoe_installation,
+    wait_for_process,
+    _attach_running_canoe,
+    _major_from_hint,
+    _matches_major,
+)
+from services.clock import MeasurementClock
+from services.comments import CommentJournal
+from services.events import configure_events
+from services.fingerprint import FingerprintStore
+from services.registry import normalize_path_key
+from services.session import (
+    SessionController,
+    SessionError,
+    SessionMetadata,
+    vehicle_descriptor,
+    vehicle_token,
+)
+
+
+@dataclass
+class CampaignComment:
+    at: float   # seconds after Start
+    text: str
+
+
+@dataclass
+class Campaign:
+    cycles: int
+    canoe_exec: str = ""
+    cfg_file: str = ""
+    log_dir: str = ""
+    sw_rel: str = ""
+    me_version: str = ""
+    vehicle_id: str = ""
+    record_seconds: float = 60.0
+    pause_seconds: float = 5.0
+    tags: list[str] = field(default_factory=list)
+    comments: list[CampaignComment] = field(default_factory=list)
+    discard: bool = False
+
+    @staticmethod
+    def load(path: Path) -> "Campaign":
+        raw = json.loads(Path(path).read_text(encoding="utf-8"))
+        known = {k: v for k, v in raw.items() if k in Campaign.__dataclass_fields__}
+        known["comments"] = [CampaignComment(float(c["at"]), str(c["text"])) for c in raw.get("comments", [])]
+        return Campaign(**known)
+
+    def tag_for(self, cycle: int) -> str:
+        return self.tags[(cycle - 1) % len(self.tags)] if self.tags else ""
+
+
+@dataclass
+class CycleResult:
+    cycle: int
+    tag: str
+    start_ms: float = 0.0
+    resolve_ms: float | None = None  # Start pressed -> comment file named after CANoe's log
+    comment_ms: list[float] = field(default_factory=list)
+    stop_ms: float = 0.0
+    discarded: int | None = None
+    error: str = ""
+
+
+def _connect_real(canoe_exec: str, timeout: float = 30.0):
+    wanted = normalize_path_key(canoe_exec) if canoe_exec else None
+    installations = discover_canoe_installations()
+    installation = next(
+        (i for i in installations if wanted is None or normalize_path_key(i.exec_path) == wanted), None
+    )
+    if installation is None:
+        raise SessionError(f"CANoe installation not found: {canoe_exec or '(none configured)'}")
+    if not open_canoe_installation(installation.exec_path):
+        raise SessionError(f"Cannot start {installation.exec_path}")
+    wait_for_process(installation.exec_path)
+    expected_major = _major_from_hint(installation.version_hint)
+    prog_ids = [p for p in (installation.prog_id, "CANoe.Application") if p]
+    canoe = _attach_running_canoe(prog_ids, lambda obj: _matches_major(obj, expected_major), timeout=timeout)
+    if canoe is None:
+        raise SessionError(f"Cannot attach to {installation.label} over COM")
+    return canoe
+
+
+def _run_cycle(
+    controller: SessionController,
+    campaign: Campaign,
+    cycle: int,
+    log_root: Path,
+    metadata: SessionMetadata,
+) -> CycleResult:
+    tag = campaign.tag_for(cycle)
+    result = CycleResult(cycle=cycle, tag=tag)
+    metadata.tag = tag
+
+    started = time.perf_counter()
+    controller.start(log_root, metadata)
+    result.start_ms = (time.perf_counter() - started) * 1000.0
+
+    pending = sorted(campaign.comments, key=lambda c: c.at)
+    deadline = started + campaign.record_seconds
+    while True:
+        now = time.perf_counter()
+        if result.resolve_ms is None and controller.resolve_comment_file():
+            result.resolve_ms = (now - started) * 1000.0
+        while pending and now - started >= pending[0].at:
+            comment = pending.pop(0)
+            written = time.perf_counter()
+            controller.add_comment(comment.text.format(cycle=cycle, tag=tag), pressed_at=written)
+            controller.journal.sync()
+            result.comment_ms.append((time.perf_counter() - written) * 1000.0)
+        if now >= deadline:
+            break
+        controller.sync_clock()
+        time.sleep(min(0.1, max(0.0, deadline - now)))
+
+    if result.resolve_ms is None:
+        controller.use_fallback_comment_file()
+
+    stopped = time.perf_counter()
+    if campaign.discard:
+        deleted, _failed, _removed = controller.discard()
+        result.discarded = deleted
+    else:
+        controller.stop()
+    result.stop_ms = (time.perf_counter() - stopped) * 1000.0
+    controller.clock.reset()
+    return result
+
+
+def _abort_cycle(controller: SessionController) -> None:
+    """After a failed cycle: stop a measurement it left running, so the next Start is possible."""
+    try:
+        if controller.measurement_running():
+            controller.stop()
+            controller.clock.reset()
+            return
+    except SessionError as e:
+        print(f"[DEBUG] Could not stop the measurement after a failed cycle: {e}")
+    controller.reset_session()
+
+
+def run(argv: list[str] | None = None) -> int:
+    parser = argparse.ArgumentParser(description="Run a headless recording campaign.")
+    parser.add_argument("campaign", type=Path, help="campaign JSON file")
+    parser.add_argument("--fake", action="store_true", help="drive services.fake_canoe instead of CANoe")
+    parser.add_argument("--fake-latency-ms", type=float, default=0.0, help="per-call latency of the fake")
+    parser.add_argument("--fake-start-delay", type=float, default=0.0, help="seconds until the fake's log files appear")
+    parser.add_argument("--log-dir", type=Path, help="override the campaign/state log directory")
+    args = parser.parse_args(argv)
+
+    paths = discover_paths()
+    state = load_state(paths)
+    campaign = Campaign.load(args.campaign)
+
+    log_root = args.log_dir or Path(campaign.log_dir or state.log_dir or paths.log_dir)
+    cfg_file = campaign.cfg_file or state.cfg_file
+    vehicle_id = campaign.vehicle_id or state.vehicle_id
+    catalog = load_vehicle_catalog(paths.root)
+    metadata = SessionMetadata(
+        sw_rel=campaign.sw_rel or state.sw_rel,
+        me_version=campaign.me_version or state.me_version,
+        vehicle_id=vehicle_id,
+        vehicle_token=vehicle_token(vehicle_id, catalog),
+        vehicle_model=vehicle_descriptor(vehicle_id, catalog),
+        vehicle_number=VEHICLE_NUMBERS.get(vehicle_id.upper()) if vehicle_id else None,
+        title=f"anSWer Logging Hub campaign {args.campaign.stem}",
+    )
+
+    controller = SessionController(
+        CommentJournal(paths.data_dir / "campaign_comment_journal.jsonl"),
+        clock=MeasurementClock(),
+        fingerprints=FingerprintStore(paths.data_dir / "fingerprints.json"),
+        cfg_cache_dir=paths.data_dir / "cfg_index",
+        log=lambda message: print(f"[DEBUG] {message}"),
+    )
+    recovered = controller.journal.recover()
+    if recovered is not None:
+        print(f"Recovered comments from an interrupted campaign into {recovered}")
+    events = configure_events(paths.data_dir / "events" / "events.jsonl")
+    results_file = paths.data_dir / f"campaign_{datetime.now().strftime('%Y-%m-%d_%H-%M-%S')}.jsonl"
+
+    failures = 0
+    try:
+        connected = time.perf_counter()
+        if args.fake:
+            from services.fake_canoe import FakeCANoe
+
+            canoe = FakeCANoe(latency=args.fake_latency_ms / 1000.0, start_delay=args.fake_start_delay)
+        else:
+            canoe = _connect_real(campaign.canoe_exec or state.canoe_exec)
+        controller.attach(canoe, cfg_file)
+        print(f"Connected to CANoe {canoe.Version} in {(time.perf_counter() - connected) * 1000.0:.0f} ms")
+
+        for cycle in range(1, campaign.cycles + 1):
+            try:
+                result = _run_cycle(controller, campaign, cycle, log_root, metadata)
+            except SessionError as e:
+                failures += 1
+                result = CycleResult(cycle=cycle, tag=campaign.tag_for(cycle), error=str(e))
+                _abort_cycle(controller)
+            resolve = f"{result.resolve_ms:.0f} ms" if result.resolve_ms is not None else "fallback"
+            comments = ", ".join(f"{ms:.1f}" for ms in result.comment_ms) or "-"
+            print(
+                f"cycle {cycle}/{campaign.cycles} tag={result.tag or '-'}: start {result.start_ms:.0f} ms, "
+                f"resolve {resolve}, comments [{comments}] ms, stop {result.stop_ms:.0f} ms"
+                + (f", ERROR {result.error}" if result.error else "")
+            )
+            with open(results_file, "a", encoding="utf-8") as f:
+                f.write(json.dumps(asdict(result)) + "\n")
+            if cycle < campaign.cycles:
+                time.sleep(campaign.pause_seconds)
+    except SessionError as e:
+        print(f"Campaign aborted: {e}")
+        return 2
+    finally:
+        controller.journal.shutdown()
+        events.close()
+
+    print(f"Results written to {results_file}")
+    return 1 if failures else 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(run())
@@ -1,27 +1,37 @@
+from .fileio import atomic_write_json
 from .state import (
     AppPaths,
     AppState,
+    ConnectionProfile,
+    StateStore,
     SW_MAJOR_RELEASES,
     SW_RELEASE_TYPES,
     SW_RELEASE_MINORS,
     ME_VERSIONS,
     VEHICLE_NUMBERS,
     discover_paths,
+    load_connection_profiles,
     load_state,
     load_vehicle_catalog,
+    save_connection_profiles,
     save_state,
 )
 
 __all__ = [
     "AppPaths",
     "AppState",
+    "ConnectionProfile",
+    "StateStore",
     "SW_MAJOR_RELEASES",
     "SW_RELEASE_TYPES",
     "SW_RELEASE_MINORS",
     "ME_VERSIONS",
     "VEHICLE_NUMBERS",
+    "atomic_write_json",
     "discover_paths",
+    "load_connection_profiles",
     "load_state",
     "load_vehicle_catalog",
+    "save_connection_profiles",
     "save_state",
 ]
@@ -0,0 +1,27 @@
+from __future__ import annotations
+
+from pathlib import Path
+import json
+import os
+import tempfile
+
+
+def atomic_write_json(p: Path, data) -> None:
+    """
+    Write JSON next to the target and swap it in with os.replace(), so a crash
+    mid-write leaves either the old or the new file, never a truncated one.
+    """
+    p.parent.mkdir(parents=True, exist_ok=True)
+    fd, tmp_name = tempfile.mkstemp(prefix=f".{p.name}.", suffix=".tmp", dir=str(p.parent))
+    try:
+        with os.fdopen(fd, "w", encoding="utf-8") as f:
+            json.dump(data, f, indent=2, ensure_ascii=False)
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(tmp_name, p)
+    except BaseException:
+        try:
+            os.unlink(tmp_name)
+        except OSError:
+            pass
+        raise
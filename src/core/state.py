@@ -6,6 +6,9 @@ from typing import NamedTuple
 import json
 import os
 import sys
+import threading
+
+from core.fileio import atomic_write_json
 
 SW_MAJOR_RELEASES = [
     "R120",
@@ -66,6 +69,18 @@ class AppState:
     vehicle_id: str = "" # e.g. VIN or fleet code
     canoe_exec: str = "" # path to preferred CANoe executable
     log_dir: str = ""    # base directory for log output
+    prewarm: bool = False  # launch/attach/load CANoe in the background at start
+    control_port: int = 0  # localhost control API port (0 = disabled)
+    com_stats: bool = False  # time every CANoe COM call (services.com_stats)
+    min_record_minutes: float = 0.0   # refuse Start when the disk holds less (0 = no check)
+    disk_warn_minutes: float = 15.0   # warn while recording when the disk fills sooner
+    expected_write_mb_s: float = 5.0  # write rate assumed before the first recording
+    staging_dir: str = ""             # record to this local folder, then move to log_dir ("" = off)
+    mover_limit_mb_s: float = 0.0     # bandwidth cap of the staging mover (0 = unlimited)
+    archive_dir: str = ""             # compress finished sessions of log_dir into this folder ("" = off)
+    archive_workers: int = 2          # compression threads of the archive pipeline
+    archive_codecs: str = ""          # per-suffix codecs, e.g. ".blf=zlib:1,.txt=lzma:9" ("" = defaults)
+    archive_delete_source: bool = False  # remove a session from log_dir once it is archived
 
     @staticmethod
     def load(paths: "AppPaths") -> "AppState":
@@ -73,13 +88,10 @@ class AppState:
         Load state from disk. Returns default state if the file does not exist
         or cannot be parsed.
         """
-        p = paths.state_file
-        if not p.exists():
+        raw = _read_state_file(paths.state_file)
+        if raw is None:
             return AppState()
         try:
-            raw = json.loads(p.read_text(encoding="utf-8"))
-            if not isinstance(raw, dict):
-                return AppState()
             known = {k: v for k, v in raw.items() if k in AppState().__dict__.keys()}
             return AppState(**known)
         except Exception:
@@ -87,13 +99,156 @@ class AppState:
 
     def save(self, state: "AppState", paths: "AppPaths") -> None:
         """
-        Persist current state to disk as JSON.
+        Persist current state to disk as JSON (atomically, see atomic_write_json).
         """
-        p = paths.state_file
         data = asdict(state) if is_dataclass(state) else state.__dict__
-        p.parent.mkdir(parents=True, exist_ok=True)
-        with open(p, "w", encoding="utf-8") as f:
-            json.dump(data, f, indent=2, ensure_ascii=False)
+        atomic_write_json(paths.state_file, data)
+        _remember_state_file(paths.state_file, data)
+
+
+# Parsed state.json keyed by path; discover_paths() and AppState.load() both
+# need it at startup, so the file is read and decoded only once.
+_STATE_FILE_CACHE: dict[str, tuple[tuple[int, int], dict]] = {}
+
+
+def _state_file_signature(p: Path) -> tuple[int, int] | None:
+    try:
+        st = p.stat()
+    except OSError:
+        return None
+    return (st.st_mtime_ns, st.st_size)
+
+
+def _read_state_file(p: Path) -> dict | None:
+    """
+    Return the decoded state.json as a dict, or None if missing/invalid.
+    The result is reused while the file's mtime/size are unchanged.
+    """
+    signature = _state_file_signature(p)
+    if signature is None:
+        return None
+    cached = _STATE_FILE_CACHE.get(str(p))
+    if cached is not None and cached[0] == signature:
+        return dict(cached[1])
+    try:
+        raw = json.loads(p.read_text(encoding="utf-8"))
+    except Exception:
+        return None
+    if not isinstance(raw, dict):
+        return None
+    _STATE_FILE_CACHE[str(p)] = (signature, raw)
+    return dict(raw)
+
+
+def _remember_state_file(p: Path, data: dict) -> None:
+    signature = _state_file_signature(p)
+    if signature is not None:
+        _STATE_FILE_CACHE[str(p)] = (signature, dict(data))
+
+
+class StateStore:
+    """
+    Write-behind persistence for AppState.
+
+    update() only records the latest snapshot and (re)arms a short timer;
+    once edits stop for `delay` seconds the snapshot is written once.
+    flush() writes any pending snapshot synchronously (Start, exit).
+    """
+
+    def __init__(self, paths: "AppPaths", state: AppState | None = None, *, delay: float = 0.75) -> None:
+        self.paths = paths
+        self.delay = delay
+        self.state = state if state is not None else AppState.load(paths)
+        self.write_count = 0
+        self._lock = threading.Lock()
+        self._pending: AppState | None = None
+        self._timer: threading.Timer | None = None
+        self._last_written: dict | None = asdict(self.state)
+
+    def update(self, state: AppState) -> None:
+        with self._lock:
+            self.state = state
+            self._pending = state
+            if self._timer is not None:
+                self._timer.cancel()
+            self._timer = threading.Timer(self.delay, self.flush)
+            self._timer.daemon = True
+            self._timer.start()
+
+    def flush(self) -> bool:
+        """Write the pending snapshot now. Returns True if the file was written."""
+        with self._lock:
+            if self._timer is not None:
+                self._timer.cancel()
+                self._timer = None
+            state, self._pending = self._pending, None
+            if state is None:
+                return False
+            data = asdict(state)
+            if data == self._last_written and self.paths.state_file.exists():
+                return False
+            try:
+                atomic_write_json(self.paths.state_file, data)
+            except Exception:
+                # Keep the snapshot so the next flush (e.g. on exit) retries it.
+                self._pending = state
+                return False
+            _remember_state_file(self.paths.state_file, data)
+            self._last_written = data
+            self.write_count += 1
+            return True
+
+    def close(self) -> None:
+        self.flush()
+
+
+@dataclass
+class ConnectionProfile:
+    """
+    What last worked when connecting to one CANoe installation, so the next
+    connect can try it directly before probing every ProgID.
+    """
+    prog_id: str = ""
+    version: str = ""
+    connect_ms: float = 0.0   # time-to-connected of the last successful connect
+    fast_path: bool = False   # True if that connect used this profile
+    connected_at: str = ""    # ISO timestamp of the last successful connect
+
+
+def connection_profiles_file(paths: "AppPaths") -> Path:
+    return paths.data_dir / "connections.json"
+
+
+def load_connection_profiles(paths: "AppPaths") -> dict[str, ConnectionProfile]:
+    """
+    Load per-installation connection profiles keyed by normalized exec path.
+    Returns an empty mapping if the file is missing or invalid.
+    """
+    p = connection_profiles_file(paths)
+    if not p.exists():
+        return {}
+    try:
+        raw = json.loads(p.read_text(encoding="utf-8"))
+    except Exception:
+        return {}
+    if not isinstance(raw, dict):
+        return {}
+
+    known_fields = ConnectionProfile().__dict__.keys()
+    profiles: dict[str, ConnectionProfile] = {}
+    for key, value in raw.items():
+        if not isinstance(value, dict):
+            continue
+        try:
+            profiles[key] = ConnectionProfile(**{k: v for k, v in value.items() if k in known_fields})
+        except Exception:
+            continue
+    return profiles
+
+
+def save_connection_profiles(profiles: dict[str, ConnectionProfile], paths: "AppPaths") -> None:
+    data = {key: asdict(profile) for key, profile in profiles.items()}
+    atomic_write_json(connection_profiles_file(paths), data)
 
 
 def load_state(paths: "AppPaths") -> AppState:
@@ -171,9 +326,9 @@ def discover_paths() -> AppPaths:
     state_file = data_dir / "state.json"
 
     cfg_path = None
-    if state_file.exists():
+    state_data = _read_state_file(state_file)
+    if state_data is not None:
         try:
-            state_data = json.loads(state_file.read_text(encoding="utf-8"))
             maybe_cfg = state_data.get("cfg_file", "")
             if maybe_cfg and Path(maybe_cfg).exists():
                 cfg_path = Path(maybe_cfg)
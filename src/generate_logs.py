@@ -0,0 +1,283 @@
+"""
+generate_logs.py - Synthetic recording trees for load-testing the log pipeline.
+
+Writes sessions in the layout a real recording produces (services.session.session_naming):
+
+    <log_root>/<SW>/<SW>_<date>/<prefix>/<prefix>_<MeasurementStart>.blf
+                                        /_<prefix>_<MeasurementStart>_<window>.avi
+                                        /<prefix>_<MeasurementStart>.txt
+
+    python generate_logs.py D:/LoadTest --sessions 200 --duration 600 --rate 4000
+    python generate_logs.py /tmp/corpus --sessions 20 --size-mb 256 --workers 8
+
+BLF files hold CAN frames in compressed containers (services.blf), one
+process per file; .avi files are RIFF placeholders of --video-kb (valid
+chunk structure, blank frame data); comment
+files carry the recording metadata header and --comments operator lines.
+Sessions are laid out back to back by their actual length (with --size-mb
+that is only known once the BLF is written), --pause apart. Every file's
+mtime is set to the end of its session.
+"""
+
+from __future__ import annotations
+
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from dataclasses import dataclass
+from datetime import datetime, timedelta
+from pathlib import Path
+import argparse
+import math
+import os
+import random
+import struct
+import time
+
+from services.blf import CAN_OBJECT_SIZE, BlfWriter, encode_can_frames, restamp
+from services.session import SessionMetadata, format_seconds, session_naming
+
+_STAMP_FORMAT = "%Y-%m-%d_%H-%M-%S"  # CANoe's {MeasurementStart}
+
+
+@dataclass
+class SyntheticSession:
+    index: int
+    metadata: SessionMetadata
+    start: datetime
+    log_folder: Path
+    prefix: str
+
+    @property
+    def stem(self) -> str:
+        return f"{self.prefix}_{self.start.strftime(_STAMP_FORMAT)}"
+
+    @property
+    def blf_path(self) -> Path:
+        return self.log_folder / f"{self.stem}.blf"
+
+    def video_path(self, window: str) -> Path:
+        return self.log_folder / f"_{self.stem}_{window}.avi"
+
+    @property
+    def comment_path(self) -> Path:
+        return self.log_folder / f"{self.stem}.txt"
+
+
+def plan_sessions(
+    log_root: Path,
+    *,
+    spans: list[float],
+    pause: float,
+    days: int,
+    first_day: datetime,
+    sw_rel: str,
+    vehicle_token: str,
+    tags: list[str],
+) -> list[SyntheticSession]:
+    """
+    Session start times, spread over `days` from 08:00 on, and their
+    folders. spans[i] is how long session i records; the next session of
+    the same day starts `pause` seconds after it ends.
+    """
+    per_day = max(1, -(-len(spans) // max(1, days)))
+    planned = []
+    offset = 0.0
+    for index, span in enumerate(spans):
+        day, slot = divmod(index, per_day)
+        if slot == 0:
+            offset = 0.0
+        start = first_day.replace(hour=8, minute=0, second=0, microsecond=0) + timedelta(days=day, seconds=offset)
+        # CANoe stamps {MeasurementStart} to the second; keep sessions a second apart at least.
+        offset += max(1.0, math.ceil(span + pause))
+        metadata = SessionMetadata(
+            sw_rel=sw_rel,
+            me_version="0.0",
+            tag=tags[index % len(tags)] if tags else "",
+            vehicle_id="SYNTHETIC",
+            vehicle_token=vehicle_token,
+            vehicle_model="Synthetic",
+            title=f"anSWer Logging Hub {sw_rel} (synthetic)",
+        )
+        log_folder, prefix, _log_name = session_naming(log_root, metadata, now=start)
+        planned.append(SyntheticSession(index, metadata, start, log_folder, prefix))
+    return planned
+
+
+def write_session_blf(
+    path: str,
+    start: datetime,
+    *,
+    duration: float,
+    rate: float,
+    channels: int,
+    ids: int,
+    size_bytes: int,
+    seed: int,
+    compression_level: int = 6,
+) -> tuple[int, int, float]:
+    """
+    One session's CAN log: frames round-robin over channels x ids at `rate`
+    frames/s with rolling counters in the payload, until `duration` seconds
+    or `size_bytes` on disk (whichever is set and reached first).
+    Returns (file size, frames, covered seconds). Runs in a worker process.
+    """
+    rng = random.Random(seed)
+    table = []
+    for channel in range(1, channels + 1):
+        for arbitration_id in rng.sample(range(0x100, 0x7FF), ids):
+            table.append((channel, arbitration_id, rng.randbytes(8)))
+    # One block covers every id with all 256 rolling-counter values; it
+    # repeats with fresh timestamps, so frames are encoded only once.
+    block = encode_can_frames(
+        (channel, arbitration_id, bytes((b + counter) & 0xFF for b in base))
+        for counter in range(256)
+        for channel, arbitration_id, base in table
+    )
+    block_frames = len(block) // CAN_OBJECT_SIZE
+
+    step_ns = 1e9 / rate
+    limit = int(duration * rate) if duration > 0 else None
+    frames = 0
+    with BlfWriter(Path(path), start=start, compression_level=compression_level) as writer:
+        while limit is None or frames < limit:
+            count = block_frames if limit is None else min(block_frames, limit - frames)
+            # Bus jitter of up to 50 us, deterministic per frame.
+            writer.write_encoded(
+                block[: count * CAN_OBJECT_SIZE],
+                [int(n * step_ns) + (n * 7919) % 50_000 for n in range(frames, frames + count)],
+            )
+            frames += count
+            if size_bytes and writer.bytes_written >= size_bytes:
+                break
+        covered = writer.last_timestamp_ns / 1e9
+    size = os.path.getsize(path)
+    end = start.timestamp() + covered
+    os.utime(path, (end, end))
+    return size, frames, covered
+
+
+def write_video_placeholder(path: Path, size: int, mtime: float) -> int:
+    """
+    A structurally valid AVI of about `size` bytes: RIFF "AVI " with an
+    hdrl list (zeroed avih) and a movi list of one padding video chunk.
+    """
+    avih = b"avih" + struct.pack("<L", 56) + b"\x00" * 56
+    hdrl = b"LIST" + struct.pack("<L", 4 + len(avih)) + b"hdrl" + avih
+    frame = max(0, size - 12 - len(hdrl) - 12 - 8) & ~1
+    movi = b"LIST" + struct.pack("<L", 4 + 8 + frame) + b"movi" + b"00dc" + struct.pack("<L", frame)
+    with open(path, "wb") as f:
+        f.write(b"RIFF" + struct.pack("<L", 4 + len(hdrl) + len(movi) + frame) + b"AVI ")
+        f.write(hdrl)
+        f.write(movi)
+        f.write(b"\x00" * frame)
+    os.utime(path, (mtime, mtime))
+    return path.stat().st_size
+
+
+def write_comment_file(session: SyntheticSession, covered: float, count: int, mtime: float) -> int:
+    lines = session.metadata.header_lines(now=session.start)
+    for n in range(count):
+        at = covered * (n + 1) / (count + 1)
+        lines.append(f"[{format_seconds(at)}] synthetic comment {n + 1} ({session.metadata.tag or 'untagged'})")
+    session.comment_path.write_text("\n".join(lines) + "\n", encoding="utf-8")
+    os.utime(session.comment_path, (mtime, mtime))
+    return session.comment_path.stat().st_size
+
+
+def run(argv: list[str] | None = None) -> int:
+    parser = argparse.ArgumentParser(description="Generate synthetic recording trees.")
+    parser.add_argument("log_root", type=Path, help="root folder (created if missing)")
+    parser.add_argument("--sessions", type=int, default=10)
+    parser.add_argument("--duration", type=float, default=60.0, help="seconds of CAN traffic per session")
+    parser.add_argument("--size-mb", type=float, default=0.0, help="BLF size per session instead of --duration")
+    parser.add_argument("--rate", type=float, default=2000.0, help="CAN frames per second (all channels)")
+    parser.add_argument("--channels", type=int, default=2)
+    parser.add_argument("--ids", type=int, default=40, help="distinct CAN ids per channel")
+    parser.add_argument("--videos", default="Front,Rear", help="video window names (comma separated)")
+    parser.add_argument("--video-kb", type=int, default=256)
+    parser.add_argument("--comments", type=int, default=5, help="operator comments per session")
+    parser.add_argument("--sw-rel", default="R000SYN")
+    parser.add_argument("--vehicle", default="Synthetic_Veh0", help="vehicle token in file names")
+    parser.add_argument("--tags", default="highway,city,parking")
+    parser.add_argument("--days", type=int, default=1, help="spread sessions over this many dates")
+    parser.add_argument("--first-day", type=datetime.fromisoformat, default=datetime.now(), help="YYYY-MM-DD")
+    parser.add_argument("--pause", type=float, default=30.0, help="seconds between sessions")
+    parser.add_argument("--compression", type=int, default=6, help="zlib level of the BLF containers (1 = fastest)")
+    parser.add_argument("--workers", type=int, default=os.cpu_count() or 1)
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args(argv)
+
+    if args.size_mb <= 0 and args.duration <= 0:
+        parser.error("one of --duration or --size-mb must be positive")
+    duration = 0.0 if args.size_mb else args.duration
+    windows = [w for w in args.videos.split(",") if w]
+    first_start = args.first_day.replace(hour=8, minute=0, second=0, microsecond=0)
+
+    # The BLFs go first, to a scratch folder with a provisional start: with
+    # --size-mb a session's length is only known once its BLF is written,
+    # and the sessions are laid out by their actual spans afterwards.
+    scratch = args.log_root / ".generate_logs"
+    scratch.mkdir(parents=True, exist_ok=True)
+    started = time.perf_counter()
+    results: dict[int, tuple[int, int, float]] = {}
+    with ProcessPoolExecutor(max_workers=max(1, args.workers)) as pool:
+        futures = {
+            pool.submit(
+                write_session_blf,
+                str(scratch / f"{index:06d}.blf"),
+                first_start,
+                duration=duration,
+                rate=args.rate,
+                channels=args.channels,
+                ids=args.ids,
+                size_bytes=int(args.size_mb * 1024 * 1024),
+                seed=args.seed * 1_000_003 + index,
+                compression_level=args.compression,
+            ): index
+            for index in range(args.sessions)
+        }
+        for done, future in enumerate(as_completed(futures), start=1):
+            index = futures[future]
+            size, frames, covered = results[index] = future.result()
+            print(
+                f"[{done}/{args.sessions}] session {index + 1}: {size / 1e6:.1f} MB, {frames} frames, {covered:.0f} s"
+            )
+
+    planned = plan_sessions(
+        args.log_root,
+        spans=[results[index][2] for index in range(args.sessions)],
+        pause=args.pause,
+        days=args.days,
+        first_day=args.first_day,
+        sw_rel=args.sw_rel,
+        vehicle_token=args.vehicle,
+        tags=[t for t in args.tags.split(",") if t],
+    )
+    total_bytes = 0
+    total_frames = 0
+    files = 0
+    for session in planned:
+        size, frames, covered = results[session.index]
+        end = session.start.timestamp() + covered
+        session.log_folder.mkdir(parents=True, exist_ok=True)
+        scratch_blf = scratch / f"{session.index:06d}.blf"
+        restamp(scratch_blf, session.start)
+        os.utime(scratch_blf, (end, end))
+        os.replace(scratch_blf, session.blf_path)
+        total_bytes += size
+        total_frames += frames
+        for window in windows:
+            total_bytes += write_video_placeholder(session.video_path(window), args.video_kb * 1024, end)
+        total_bytes += write_comment_file(session, covered, args.comments, end)
+        files += 2 + len(windows)
+    scratch.rmdir()
+
+    elapsed = time.perf_counter() - started
+    print(
+        f"Wrote {len(planned)} session(s), {files} file(s), {total_bytes / 1e6:.1f} MB, {total_frames} frames "
+        f"in {elapsed:.1f} s ({total_bytes / 1e6 / max(elapsed, 1e-9):.1f} MB/s) under {args.log_root}"
+    )
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(run())
@@ -0,0 +1,87 @@
+"""
+report.py - Per-phase latency percentiles from the hub's lifecycle event log.
+
+    python report.py                       # data_dir/events/events.jsonl (+ rotated files)
+    python report.py --events path/to/events.jsonl --phase start --last-runs 5
+"""
+
+from __future__ import annotations
+
+from collections import defaultdict
+from datetime import datetime
+from pathlib import Path
+import argparse
+import math
+
+from core.state import discover_paths
+from services.events import event_files, read_events
+
+
+def percentile(sorted_values: list[float], pct: float) -> float:
+    """Nearest-rank percentile of an ascending list."""
+    if not sorted_values:
+        return math.nan
+    rank = max(1, math.ceil(pct / 100.0 * len(sorted_values)))
+    return sorted_values[rank - 1]
+
+
+def summarize(events, *, phase: str | None = None, last_runs: int | None = None) -> dict:
+    """
+    Group span_end durations by phase. Returns
+    {"runs": [...], "phases": {phase: {"ok": [ms...], "failed": n}}}.
+    """
+    spans = [e for e in events if e.get("event") == "span_end" and "duration_ns" in e]
+    runs = list(dict.fromkeys(e.get("run", "?") for e in spans))
+    if last_runs:
+        runs = runs[-last_runs:]
+    wanted_runs = set(runs)
+
+    phases: dict[str, dict] = defaultdict(lambda: {"ok": [], "failed": 0})
+    for e in spans:
+        if e.get("run", "?") not in wanted_runs:
+            continue
+        name = str(e.get("phase", "?"))
+        if phase and name != phase:
+            continue
+        if e.get("ok", True):
+            phases[name]["ok"].append(e["duration_ns"] / 1e6)
+        else:
+            phases[name]["failed"] += 1
+    return {"runs": runs, "phases": dict(phases)}
+
+
+def format_report(summary: dict) -> str:
+    header = f"{'phase':<22}{'n':>6}{'fail':>6}{'p50 ms':>11}{'p90 ms':>11}{'p99 ms':>11}{'max ms':>11}"
+    lines = [f"{len(summary['runs'])} run(s)", header, "-" * len(header)]
+    for name in sorted(summary["phases"]):
+        data = summary["phases"][name]
+        values = sorted(data["ok"])
+        cells = [percentile(values, p) for p in (50, 90, 99)] + [values[-1] if values else math.nan]
+        lines.append(
+            f"{name:<22}{len(values):>6}{data['failed']:>6}" + "".join(f"{v:>11.1f}" for v in cells)
+        )
+    return "\n".join(lines)
+
+
+def run(argv: list[str] | None = None) -> int:
+    parser = argparse.ArgumentParser(description="Latency percentiles per lifecycle phase.")
+    parser.add_argument("--events", type=Path, help="event log (default: data_dir/events/events.jsonl)")
+    parser.add_argument("--phase", help="only this phase")
+    parser.add_argument("--last-runs", type=int, help="only the most recent N hub runs")
+    args = parser.parse_args(argv)
+
+    path = args.events or discover_paths().data_dir / "events" / "events.jsonl"
+    files = event_files(path)
+    if not files:
+        print(f"No event files at {path}")
+        return 1
+    summary = summarize(read_events(files), phase=args.phase, last_runs=args.last_runs)
+    first_ts = min((f.stat().st_mtime for f in files), default=None)
+    if first_ts is not None:
+        print(f"Event files: {len(files)} (oldest modified {datetime.fromtimestamp(first_ts):%Y-%m-%d %H:%M})")
+    print(format_report(summary))
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(run())
@@ -1,3 +1,6 @@
+from .archive import ArchiveError, ArchiveJob, ArchivePipeline, ArchiveStats, Codec, parse_codecs
+from .blf import BlfError, BlfHeader, BlfWriter, iter_can_messages, read_header, restamp
+from .blf_tail import BlfTail, TailSnapshot
 from .canoe import (
     CANoeInstallation,
     connect_canoe,
@@ -5,21 +8,141 @@ from .canoe import (
     get_logging_block_status,
     is_canoe_running,
     load_canoe_config,
+    load_installation_cache,
     open_canoe_installation,
+    save_installation_cache,
     wait_for_process,
     _extract_major_from_text,
     _major_from_hint,
     _prog_id_exists,
 )
+from .cfg_index import CfgSummary, load_cfg_summary, scan_cfg
+from .com_stats import ComStats, InstrumentedDispatch, MemberStats, instrument
+from .comments import CommentEntry, CommentJournal, FlushPolicy
+from .control_api import ControlCommand, ControlServer, load_or_create_token
+from .events import EventRecorder, Span, configure_events, emit, get_recorder, span
+from .fake_canoe import FakeCANoe, FakeCOMError
+from .fingerprint import ConfigFingerprint, FingerprintStore, config_fingerprint
+from .histogram import Log2Histogram
+from .integrity import FileIntegrity, IntegrityVerifier, SessionIntegrity, record_path
+from .job_queue import QueueWorker
+from .manifest import HashCache, Manifest, ManifestEntry, build_manifest, hash_file, manifest_is_current
+from .mover import MoveError, MoveJob, MoverStats, SessionMover, job_for_files
+from .prewarm import CANoePrewarmer, PrewarmStage, prewarmer_for_installation
+from .registry import (
+    ComRegistryIndex,
+    MappingRegistryBackend,
+    RegistryBackend,
+    WinregBackend,
+    normalize_path_key,
+)
+from .scheduler import Backoff, PeriodicTask, TaskScheduler, TaskStats
+from .session import (
+    RecordingSession,
+    SessionController,
+    SessionError,
+    SessionMetadata,
+    session_naming,
+    vehicle_descriptor,
+    vehicle_token,
+)
+from .status_segment import StatusSegment, StatusSegmentReader, StatusSnapshot
+from .storage import StorageMonitor, StorageSample, format_duration
+from .watchdog import JitterHistogram, StallReport, StallWatchdog
 
 __all__ = [
+    "ArchiveError",
+    "ArchiveJob",
+    "ArchivePipeline",
+    "ArchiveStats",
+    "Backoff",
+    "BlfError",
+    "BlfHeader",
+    "BlfTail",
+    "BlfWriter",
     "CANoeInstallation",
+    "CANoePrewarmer",
+    "CfgSummary",
+    "Codec",
+    "ComRegistryIndex",
+    "ComStats",
+    "CommentEntry",
+    "CommentJournal",
+    "ConfigFingerprint",
+    "ControlCommand",
+    "ControlServer",
+    "EventRecorder",
+    "FakeCANoe",
+    "FakeCOMError",
+    "FileIntegrity",
+    "FingerprintStore",
+    "FlushPolicy",
+    "HashCache",
+    "InstrumentedDispatch",
+    "IntegrityVerifier",
+    "JitterHistogram",
+    "Log2Histogram",
+    "Manifest",
+    "ManifestEntry",
+    "MappingRegistryBackend",
+    "MemberStats",
+    "MoveError",
+    "MoveJob",
+    "MoverStats",
+    "PeriodicTask",
+    "PrewarmStage",
+    "QueueWorker",
+    "RecordingSession",
+    "RegistryBackend",
+    "SessionController",
+    "SessionError",
+    "SessionIntegrity",
+    "SessionMetadata",
+    "SessionMover",
+    "StallReport",
+    "StallWatchdog",
+    "Span",
+    "StatusSegment",
+    "StatusSegmentReader",
+    "StatusSnapshot",
+    "StorageMonitor",
+    "StorageSample",
+    "TailSnapshot",
+    "TaskScheduler",
+    "TaskStats",
+    "WinregBackend",
+    "build_manifest",
+    "config_fingerprint",
+    "configure_events",
     "connect_canoe",
     "discover_canoe_installations",
+    "emit",
+    "format_duration",
+    "get_recorder",
+    "instrument",
     "get_logging_block_status",
+    "hash_file",
     "is_canoe_running",
+    "iter_can_messages",
+    "job_for_files",
     "load_canoe_config",
+    "load_cfg_summary",
+    "load_installation_cache",
+    "load_or_create_token",
+    "manifest_is_current",
+    "normalize_path_key",
     "open_canoe_installation",
+    "parse_codecs",
+    "prewarmer_for_installation",
+    "read_header",
+    "record_path",
+    "restamp",
+    "save_installation_cache",
+    "scan_cfg",
+    "session_naming",
+    "span",
+    "vehicle_descriptor",
+    "vehicle_token",
     "wait_for_process",
     "_extract_major_from_text",
     "_major_from_hint",
@@ -0,0 +1,533 @@
+from __future__ import annotations
+
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from dataclasses import asdict, dataclass, field
+from datetime import datetime
+from pathlib import Path
+from typing import Callable
+import hashlib
+import json
+import lzma
+import os
+import sys
+import threading
+import time
+import zlib
+
+from core.fileio import atomic_write_json
+from services.job_queue import QueueWorker
+from services.manifest import MANIFEST_NAME, ManifestEntry, manifest_is_current, tree_hash
+
+ARCHIVE_INDEX = "archive.json"
+ARCHIVE_VERSION = 1
+_PART_SUFFIX = ".part"
+
+
+class ArchiveError(RuntimeError):
+    """A file could not be archived or did not verify; the job stays queued."""
+
+
+@dataclass(frozen=True)
+class Codec:
+    name: str       # "lzma", "zlib" or "store"
+    level: int = 6
+
+    @property
+    def suffix(self) -> str:
+        return {"lzma": ".xz", "zlib": ".zz"}.get(self.name, "")
+
+    def compressor(self):
+        if self.name == "lzma":
+            return lzma.LZMACompressor(format=lzma.FORMAT_XZ, preset=self.level)
+        if self.name == "zlib":
+            return zlib.compressobj(self.level)
+        return None
+
+    def decompressor(self):
+        if self.name == "lzma":
+            return lzma.LZMADecompressor(format=lzma.FORMAT_XZ)
+        if self.name == "zlib":
+            return zlib.decompressobj()
+        return None
+
+    def __str__(self) -> str:
+        return self.name if self.name == "store" else f"{self.name}:{self.level}"
+
+
+# BLF containers are already deflated by CANoe, so a light zlib pass only
+# catches headers and uncompressed loggers; video is stored as is; text and
+# JSON shrink well under lzma.
+DEFAULT_CODECS: dict[str, Codec] = {
+    ".blf": Codec("zlib", 1),
+    ".avi": Codec("store", 0),
+    ".mp4": Codec("store", 0),
+    "*": Codec("lzma", 6),
+}
+
+_LEVELS = {"lzma": range(0, 10), "zlib": range(0, 10), "store": range(0, 1)}
+
+
+def parse_codecs(spec: str) -> dict[str, Codec]:
+    """
+    Codec table from a setting like ".blf=zlib:1, .txt=lzma:9, .avi=store,
+    *=lzma:6"; entries override DEFAULT_CODECS. Raises ValueError.
+    """
+    codecs = dict(DEFAULT_CODECS)
+    for item in (spec or "").split(","):
+        item = item.strip()
+        if not item:
+            continue
+        suffix, _, value = item.partition("=")
+        name, _, level = value.strip().partition(":")
+        name = name.strip().lower()
+        if name not in _LEVELS:
+            raise ValueError(f"unknown codec {name!r} in {item!r}")
+        try:
+            number = int(level) if level.strip() else (6 if name != "store" else 0)
+        except ValueError:
+            raise ValueError(f"bad level in {item!r}") from None
+        if number not in _LEVELS[name]:
+            raise ValueError(f"level {number} out of range for {name}")
+        suffix = suffix.strip().lower()
+        if suffix != "*" and not suffix.startswith("."):
+            suffix = "." + suffix
+        codecs[suffix] = Codec(name, number)
+    return codecs
+
+
+def codec_for(name: str, codecs: dict[str, Codec]) -> Codec:
+    return codecs.get(Path(name).suffix.lower()) or codecs.get("*") or Codec("store", 0)
+
+
+@dataclass
+class ArchiveJob:
+    """
+    One finished session folder to archive into `target`. `done` lists the
+    manifest entries already archived and verified, so a restarted pipeline
+    skips them.
+    """
+
+    folder: str
+    target: str
+    tree_sha256: str = ""
+    label: str = ""
+    done: list[str] = field(default_factory=list)
+    not_before: float = 0.0
+    attempts: int = 0
+    last_error: str = ""
+
+    @classmethod
+    def from_dict(cls, raw: dict) -> "ArchiveJob":
+        known = {k: v for k, v in raw.items() if k in cls.__dataclass_fields__}
+        return cls(**known)
+
+
+@dataclass
+class ArchiveStats:
+    jobs_done: int = 0
+    files_archived: int = 0
+    bytes_in: int = 0
+    bytes_out: int = 0
+    busy_seconds: float = 0.0
+    failures: int = 0
+
+    @property
+    def throughput(self) -> float:
+        """Input bytes/s while a job runs (pauses included)."""
+        return self.bytes_in / self.busy_seconds if self.busy_seconds else 0.0
+
+    @property
+    def ratio(self) -> float:
+        return self.bytes_out / self.bytes_in if self.bytes_in else 0.0
+
+    def to_dict(self) -> dict:
+        data = asdict(self)
+        data["throughput"] = round(self.throughput, 1)
+        data["ratio"] = round(self.ratio, 4)
+        return data
+
+
+def _background_thread() -> None:
+    # Pool initializer: archive threads give way to the UI and to CANoe.
+    # Per thread, not per process, so the UI thread keeps its priority.
+    try:
+        if sys.platform == "win32":
+            import ctypes
+
+            THREAD_MODE_BACKGROUND_BEGIN = 0x00010000  # low CPU, I/O and memory priority
+            kernel32 = ctypes.windll.kernel32
+            kernel32.SetThreadPriority(kernel32.GetCurrentThread(), THREAD_MODE_BACKGROUND_BEGIN)
+        else:
+            # Linux: the tid renices just this thread; CFQ/BFQ derive its I/O priority from it.
+            os.setpriority(os.PRIO_PROCESS, threading.get_native_id(), 19)
+    except Exception:
+        pass
+
+
+def _inflate(decompressor, data: bytes, limit: int):
+    # At most `limit` bytes per step, so a very compressible file cannot balloon memory.
+    if isinstance(decompressor, lzma.LZMADecompressor):
+        yield decompressor.decompress(data, limit)
+        while not decompressor.eof and not decompressor.needs_input:
+            yield decompressor.decompress(b"", limit)
+    else:
+        while data:
+            yield decompressor.decompress(data, limit)
+            data = decompressor.unconsumed_tail
+
+
+def find_finished_sessions(
+    root: Path, *, exclude: tuple[Path, ...] = (), skip: Callable[[Path], bool] | None = None
+) -> list[Path]:
+    """
+    Folders below root with a complete, current manifest.json, oldest first.
+    skip(folder) is asked before the manifest is checked file by file, so
+    folders already archived or queued cost no more than skip itself.
+    """
+    root = Path(root)
+    skipped = {Path(p).resolve() for p in exclude}
+    found = []
+    for current, dirs, names in os.walk(root):
+        here = Path(current)
+        if here.resolve() in skipped:
+            dirs[:] = []
+            continue
+        if MANIFEST_NAME in names:
+            dirs[:] = []  # session folders do not nest
+            if skip is not None and skip(here):
+                continue
+            if manifest_is_current(here):
+                found.append(here)
+    return sorted(found, key=lambda p: (p / MANIFEST_NAME).stat().st_mtime)
+
+
+def is_archived(folder: Path, target: Path) -> bool:
+    """True if target holds an archive of exactly the folder's manifest."""
+    try:
+        manifest = json.loads((Path(folder) / MANIFEST_NAME).read_text(encoding="utf-8"))
+        index = json.loads((Path(target) / ARCHIVE_INDEX).read_text(encoding="utf-8"))
+    except (OSError, ValueError):
+        return False
+    return bool(manifest.get("tree_sha256")) and index.get("tree_sha256") == manifest.get("tree_sha256")
+
+
+def _read_json(path: Path) -> dict:
+    try:
+        data = json.loads(Path(path).read_text(encoding="utf-8"))
+    except (OSError, ValueError):
+        return {}
+    return data if isinstance(data, dict) else {}
+
+
+def _archived_digests(target: Path) -> dict[str, tuple[str, str]]:
+    # name -> (sha256, codec) of an earlier archive.json in target
+    index = _read_json(Path(target) / ARCHIVE_INDEX)
+    return {item["name"]: (item["sha256"], item["codec"]) for item in index.get("files", [])}
+
+
+def _merge_manifest(previous: dict, current: dict) -> dict:
+    """
+    Target manifest after another run of the same folder: files and
+    sessions of earlier runs stay listed (their sources may be deleted),
+    entries of the current run win, and the totals and tree digest cover
+    the union.
+    """
+    if not previous.get("files"):
+        return current
+    files = {entry["name"]: entry for entry in previous.get("files", [])}
+    files.update({entry["name"]: entry for entry in current.get("files", [])})
+    merged = dict(current)
+    merged["files"] = [files[name] for name in sorted(files)]
+    merged["sessions"] = {**previous.get("sessions", {}), **current.get("sessions", {})}
+    merged["file_count"] = len(files)
+    merged["total_bytes"] = sum(entry["size"] for entry in files.values())
+    merged["tree_sha256"] = tree_hash(
+        [ManifestEntry(e["name"], e["size"], e["mtime"], e["sha256"]) for e in merged["files"]]
+    )
+    return merged
+
+
+class ArchivePipeline(QueueWorker):
+    """
+    Background compression of finished session folders into archive_root.
+
+    A folder qualifies once its manifest.json is complete and current; it
+    is archived to the same relative path below archive_root, each file on
+    its own with the codec configured for its suffix (codecs, see
+    parse_codecs). Files are compressed in a bounded pool of `workers`
+    low-priority threads (lzma, zlib and hashlib release the GIL), the
+    input is checked against the manifest's SHA-256, and the compressed
+    .part is decompressed and hashed once more before it is renamed into
+    place. archive.json in the target lists codec, sizes and digests; with
+    delete_source the session folder is removed afterwards.
+
+    The queue, pause/resume and messages come from QueueWorker, as for the
+    staging mover; pause() holds every pool thread between chunks (the hub
+    pauses it while a measurement runs). Scans for new folders run on the
+    worker thread (request_scan()), never on the UI.
+    """
+
+    job_type = ArchiveJob
+    errors = (ArchiveError, OSError, lzma.LZMAError, zlib.error)
+    action = "Archive"
+    thread_name = "session-archiver"
+
+    def __init__(
+        self,
+        archive_root: Path,
+        queue_file: Path | None = None,
+        *,
+        workers: int = 2,
+        codecs: dict[str, Codec] | None = None,
+        delete_source: bool = False,
+        chunk_size: int = 4 * 1024 * 1024,
+        retry_delay: float = 60.0,
+    ) -> None:
+        super().__init__(queue_file, retry_delay=retry_delay)
+        self.archive_root = Path(archive_root)
+        self.workers = max(1, workers)
+        self.codecs = codecs if codecs is not None else dict(DEFAULT_CODECS)
+        self.delete_source = delete_source
+        self.chunk_size = chunk_size
+        self.stats = ArchiveStats()
+        self._scan: tuple[Path, tuple[Path, ...]] | None = None
+        self._archived: dict[str, int] = {}  # folder -> manifest mtime_ns when it was found archived
+        self._pool: ThreadPoolExecutor | None = None
+
+    # ---- queue ----
+    def request_scan(self, root: Path, *, exclude: tuple[Path, ...] = ()) -> None:
+        """Have the worker look for newly finished sessions below root."""
+        self._scan = (Path(root), tuple(exclude))
+        self._wake.set()
+
+    def scan(self, root: Path, *, exclude: tuple[Path, ...] = ()) -> int:
+        """Queue finished, not yet archived folders below root; returns how many."""
+        root = Path(root)
+        exclude = (*exclude, self.archive_root)
+        with self._lock:
+            queued = {job.folder for job in self._jobs}
+
+        def known(folder: Path) -> bool:
+            # One stat for a folder seen archived before, two small JSON reads
+            # otherwise; only unknown folders get the per-file manifest check.
+            if str(folder) in queued:
+                return True
+            try:
+                stamp = (folder / MANIFEST_NAME).stat().st_mtime_ns
+            except OSError:
+                return True
+            if self._archived.get(str(folder)) == stamp:
+                return True
+            if is_archived(folder, self.archive_root / folder.relative_to(root)):
+                self._archived[str(folder)] = stamp
+                return True
+            return False
+
+        added = 0
+        for folder in find_finished_sessions(root, exclude=exclude, skip=known):
+            relative = folder.relative_to(root)
+            tree = _read_json(folder / MANIFEST_NAME).get("tree_sha256", "")
+            if not tree:
+                continue
+            self.enqueue(
+                ArchiveJob(
+                    folder=str(folder),
+                    target=str(self.archive_root / relative),
+                    tree_sha256=tree,
+                    label=relative.as_posix(),
+                )
+            )
+            added += 1
+        return added
+
+    # ---- worker ----
+    def stop(self, timeout: float = 5.0) -> None:
+        """Stop after the current chunks; unfinished files start over next time."""
+        super().stop(timeout)
+        if self._pool is not None:
+            self._pool.shutdown(wait=False, cancel_futures=True)
+            self._pool = None
+
+    def _between_jobs(self) -> None:
+        scan, self._scan = self._scan, None
+        if scan is None:
+            return
+        try:
+            added = self.scan(scan[0], exclude=scan[1])
+        except OSError as exc:
+            self._messages.append(("warning", f"Archive scan of {scan[0]} failed: {exc}"))
+        else:
+            if added:
+                self._messages.append(("info", f"Queued {added} session(s) for the archive."))
+
+    def _executor(self) -> ThreadPoolExecutor:
+        if self._pool is None:
+            self._pool = ThreadPoolExecutor(
+                max_workers=self.workers, thread_name_prefix="archive", initializer=_background_thread
+            )
+        return self._pool
+
+    def _skip_reason(self, job: ArchiveJob) -> str | None:
+        if not manifest_is_current(Path(job.folder)):
+            # Changed or gone since it was queued; a later scan picks it up again.
+            return f"Archive of {job.label} skipped: its manifest is out of date."
+        return None
+
+    def _process(self, job: ArchiveJob) -> str:
+        started = time.monotonic()
+        before = (self.stats.bytes_in, self.stats.bytes_out)
+        try:
+            self._archive(job)
+        finally:
+            self.stats.busy_seconds += time.monotonic() - started
+        bytes_in = self.stats.bytes_in - before[0]
+        bytes_out = self.stats.bytes_out - before[1]
+        return (
+            f"Archived {job.label} ({bytes_in / 1e6:.0f} MB -> {bytes_out / 1e6:.0f} MB, "
+            f"{self.stats.throughput / 1e6:.0f} MB/s) to {job.target}"
+        )
+
+    def _archive(self, job: ArchiveJob) -> None:
+        folder, target = Path(job.folder), Path(job.target)
+        manifest = json.loads((folder / MANIFEST_NAME).read_text(encoding="utf-8"))
+        if manifest.get("tree_sha256") != job.tree_sha256:
+            raise ArchiveError(f"{folder} changed since it was queued")
+        entries = manifest.get("files", [])
+        # A folder archived before (and grown since) keeps its unchanged files.
+        previous = _archived_digests(target)
+        for entry in entries:
+            codec = codec_for(entry["name"], self.codecs)
+            if previous.get(entry["name"]) == (entry["sha256"], str(codec)) and entry["name"] not in job.done:
+                if (target / (entry["name"] + codec.suffix)).exists():
+                    job.done.append(entry["name"])
+        todo = [e for e in entries if e["name"] not in job.done]
+        # Largest first, so one big BLF does not start last and stretch the job.
+        todo.sort(key=lambda e: e["size"], reverse=True)
+        pool = self._executor()
+        futures = {pool.submit(self._archive_file, folder, target, entry): entry for entry in todo}
+        error: Exception | None = None
+        for future in as_completed(futures):
+            try:
+                future.result()
+            except Exception as exc:
+                error = error or exc
+                continue
+            if self._stopping:
+                continue
+            job.done.append(futures[future]["name"])
+            self.stats.files_archived += 1
+            self._save()
+        if error is not None:
+            raise error
+        if self._stopping:
+            return
+
+        # Earlier runs of this folder stay listed; tree_sha256 is the source
+        # manifest of the latest run, which is what is_archived() compares.
+        files = {item["name"]: item for item in _read_json(target / ARCHIVE_INDEX).get("files", [])}
+        for entry in entries:
+            codec = codec_for(entry["name"], self.codecs)
+            archive_name = entry["name"] + codec.suffix
+            files[entry["name"]] = {
+                "name": entry["name"],
+                "archive_name": archive_name,
+                "codec": str(codec),
+                "size": entry["size"],
+                "archived_size": (target / archive_name).stat().st_size,
+                "sha256": entry["sha256"],
+            }
+        atomic_write_json(target / MANIFEST_NAME, _merge_manifest(_read_json(target / MANIFEST_NAME), manifest))
+        atomic_write_json(
+            target / ARCHIVE_INDEX,
+            {
+                "version": ARCHIVE_VERSION,
+                "source": str(folder),
+                "created_at": datetime.now().isoformat(timespec="seconds"),
+                "tree_sha256": job.tree_sha256,
+                "files": [files[name] for name in sorted(files)],
+            },
+        )
+        if self.delete_source:
+            self._delete_source(folder, entries, job.tree_sha256)
+
+    def _archive_file(self, folder: Path, target: Path, entry: dict) -> None:
+        source = folder / entry["name"]
+        codec = codec_for(entry["name"], self.codecs)
+        destination = target / (entry["name"] + codec.suffix)
+        destination.parent.mkdir(parents=True, exist_ok=True)
+        part = destination.with_name(destination.name + _PART_SUFFIX)
+        compressor = codec.compressor()
+        hasher = hashlib.sha256()
+        read = written = 0
+        with open(source, "rb") as src, open(part, "wb") as dst:
+            while True:
+                self._resume.wait()
+                if self._stopping:
+                    return
+                chunk = src.read(self.chunk_size)
+                if not chunk:
+                    break
+                hasher.update(chunk)
+                read += len(chunk)
+                data = compressor.compress(chunk) if compressor is not None else chunk
+                dst.write(data)
+                written += len(data)
+            if compressor is not None:
+                tail = compressor.flush()
+                dst.write(tail)
+                written += len(tail)
+            dst.flush()
+            os.fsync(dst.fileno())
+        if hasher.hexdigest() != entry["sha256"]:
+            part.unlink()
+            raise ArchiveError(f"{entry['name']} does not match its manifest")
+        if self._verify(part, codec) != entry["sha256"]:
+            part.unlink()
+            raise ArchiveError(f"{destination.name} did not verify after compression")
+        stat = source.stat()
+        os.utime(part, ns=(stat.st_atime_ns, stat.st_mtime_ns))
+        os.replace(part, destination)
+        with self._lock:
+            self.stats.bytes_in += read
+            self.stats.bytes_out += written
+
+    def _verify(self, path: Path, codec: Codec) -> str:
+        """SHA-256 of the decompressed content of path."""
+        decompressor = codec.decompressor()
+        hasher = hashlib.sha256()
+        with open(path, "rb") as f:
+            while True:
+                chunk = f.read(self.chunk_size)
+                if not chunk:
+                    break
+                if decompressor is None:
+                    hasher.update(chunk)
+                    continue
+                for block in _inflate(decompressor, chunk, self.chunk_size):
+                    hasher.update(block)
+        if decompressor is not None and not decompressor.eof:
+            raise ArchiveError(f"{path.name} is truncated")
+        return hasher.hexdigest()
+
+    def _delete_source(self, folder: Path, entries: list[dict], tree_sha256: str) -> None:
+        for entry in entries:
+            path = folder / entry["name"]
+            try:
+                stat = path.stat()
+                if stat.st_size != entry["size"] or abs(stat.st_mtime - entry["mtime"]) > 1e-3:
+                    continue  # rewritten after it was archived: not ours to delete
+                path.unlink()
+            except FileNotFoundError:
+                pass
+            except OSError as exc:
+                self._messages.append(("warning", f"Archived, but could not delete {entry['name']}: {exc}"))
+                return
+        # A manifest rebuilt for a newer recording in the meantime stays.
+        if _read_json(folder / MANIFEST_NAME).get("tree_sha256") != tree_sha256:
+            return
+        try:
+            (folder / MANIFEST_NAME).unlink()
+            for current, _dirs, _names in sorted(os.walk(folder), key=lambda item: len(item[0]), reverse=True):
+                Path(current).rmdir()  # raises once a folder is not empty
+        except OSError:
+            pass
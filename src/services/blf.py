@@ -0,0 +1,380 @@
+from __future__ import annotations
+
+from dataclasses import dataclass
+from datetime import datetime
+from pathlib import Path
+from array import array
+import struct
+import sys
+import zlib
+
+# Vector binary logging format (.blf), the subset CANoe writes for CAN:
+# a 144-byte "LOGG" file header followed by "LOBJ" objects. CAN frames are
+# packed into zlib-compressed LOG_CONTAINER objects. Objects are followed by
+# obj_size % 4 padding bytes.
+FILE_HEADER = struct.Struct("<4sLBBBBBBBBQQLL8H8H")
+FILE_HEADER_SIZE = 144
+OBJ_HEADER_BASE = struct.Struct("<4sHHLL")       # signature, header size, header version, obj size, obj type
+OBJ_HEADER_V1 = struct.Struct("<LHHQ")           # flags, client index, object version, timestamp
+LOG_CONTAINER_HEADER = struct.Struct("<H6xL4x")  # compression method, uncompressed size
+CAN_MSG = struct.Struct("<HBBL8s")               # channel, flags, dlc, arbitration id, data
+
+LOG_CONTAINER = 10
+CAN_MESSAGE = 1
+CAN_MESSAGE2 = 86  # same leading body layout as CAN_MESSAGE
+NO_COMPRESSION = 0
+ZLIB_DEFLATE = 2
+TIME_TEN_MICS = 0x00000001
+TIME_ONE_NANS = 0x00000002
+CAN_MSG_EXT = 0x80000000
+APPLICATION_CANOE = 2
+
+# One CAN_MESSAGE object (base + v1 header + body) in a single pack call.
+_CAN_OBJECT = struct.Struct("<4sHHLL" + "LHHQ" + "HBBL8s")
+_CAN_OBJECT_HEADER_SIZE = OBJ_HEADER_BASE.size + OBJ_HEADER_V1.size
+CAN_OBJECT_SIZE = _CAN_OBJECT.size
+_TIMESTAMP_WORD = (OBJ_HEADER_BASE.size + 8) // 8  # 8-byte word holding the v1 timestamp
+
+
+class BlfError(ValueError):
+    """The file is not a readable BLF (bad signature, truncated object...)."""
+
+
+def _systemtime(at: datetime) -> tuple[int, ...]:
+    return (
+        at.year,
+        at.month,
+        (at.weekday() + 1) % 7,  # SYSTEMTIME: Sunday = 0
+        at.day,
+        at.hour,
+        at.minute,
+        at.second,
+        at.microsecond // 1000,
+    )
+
+
+def _from_systemtime(fields: tuple[int, ...]) -> datetime | None:
+    year, month, _dow, day, hour, minute, second, millis = fields
+    try:
+        return datetime(year, month, day, hour, minute, second, millis * 1000)
+    except ValueError:
+        return None
+
+
+@dataclass
+class BlfHeader:
+    application_id: int
+    application_version: tuple[int, int, int]
+    file_size: int           # 0 while CANoe is still writing
+    uncompressed_size: int
+    object_count: int
+    start: datetime | None
+    stop: datetime | None
+
+    @property
+    def finalized(self) -> bool:
+        return self.file_size > 0
+
+
+def parse_header(raw: bytes) -> BlfHeader:
+    if len(raw) < FILE_HEADER.size:
+        raise BlfError("file shorter than the BLF header")
+    fields = FILE_HEADER.unpack_from(raw)
+    if fields[0] != b"LOGG":
+        raise BlfError(f"bad signature {fields[0]!r}")
+    return BlfHeader(
+        application_id=fields[2],
+        application_version=(fields[3], fields[4], fields[5]),
+        file_size=fields[10],
+        uncompressed_size=fields[11],
+        object_count=fields[12],
+        start=_from_systemtime(fields[14:22]),
+        stop=_from_systemtime(fields[22:30]),
+    )
+
+
+def read_header(path: Path) -> BlfHeader:
+    with open(path, "rb") as f:
+        return parse_header(f.read(FILE_HEADER_SIZE))
+
+
+def restamp(path: Path, start: datetime) -> None:
+    """
+    Move a finished BLF to a new start time. Object timestamps are relative
+    to the start, so only the header's start and stop fields change; the
+    stop keeps its distance from the start.
+    """
+    with open(path, "r+b") as f:
+        fields = list(FILE_HEADER.unpack(f.read(FILE_HEADER.size)))
+        if fields[0] != b"LOGG":
+            raise BlfError(f"bad signature {fields[0]!r}")
+        old_start = _from_systemtime(tuple(fields[14:22]))
+        old_stop = _from_systemtime(tuple(fields[22:30]))
+        fields[14:22] = _systemtime(start)
+        if old_start is not None and old_stop is not None:
+            fields[22:30] = _systemtime(start + (old_stop - old_start))
+        f.seek(0)
+        f.write(FILE_HEADER.pack(*fields))
+
+
+def encode_can_frames(frames) -> bytearray:
+    """
+    Encode (channel, arbitration_id, data) received standard-id frames as
+    CAN_MESSAGE objects with zero timestamps, for BlfWriter.write_encoded().
+    """
+    pack = _CAN_OBJECT.pack
+    out = bytearray()
+    for channel, arbitration_id, data in frames:
+        out += pack(
+            b"LOBJ", _CAN_OBJECT_HEADER_SIZE, 1, _CAN_OBJECT.size, CAN_MESSAGE, TIME_ONE_NANS, 0, 0,
+            0, channel, 0, len(data), arbitration_id, data,
+        )
+    return out
+
+
+class BlfWriter:
+    """
+    Streams CAN frames into a BLF file the way CANoe lays it out: a
+    provisional header (file size 0, no stop time), compressed LOG_CONTAINERs of about container_size
+    uncompressed bytes, and the final header (sizes, object count,
+    start/stop time) written on close(). Timestamps are nanoseconds since
+    `start`.
+    """
+
+    def __init__(
+        self,
+        path: Path,
+        *,
+        start: datetime,
+        container_size: int = 128 * 1024,
+        compression_level: int = 6,
+        application_version: tuple[int, int, int] = (17, 0, 0),
+    ) -> None:
+        self.path = Path(path)
+        self.start = start
+        self.container_size = container_size
+        self.compression_level = compression_level
+        self.application_version = application_version
+        self.object_count = 0
+        self.uncompressed_size = FILE_HEADER_SIZE
+        self.last_timestamp_ns = 0
+        self._buffer = bytearray()
+        self._file = open(self.path, "wb")
+        self._file.write(self._header(0, None))
+
+    @property
+    def bytes_written(self) -> int:
+        """Bytes on disk so far, excluding frames still buffered for the next container."""
+        return self._file.tell()
+
+    def write_can(
+        self,
+        timestamp_ns: int,
+        channel: int,
+        arbitration_id: int,
+        data: bytes,
+        *,
+        extended: bool = False,
+        tx: bool = False,
+    ) -> None:
+        dlc = len(data)
+        self._buffer += _CAN_OBJECT.pack(
+            b"LOBJ",
+            _CAN_OBJECT_HEADER_SIZE,
+            1,
+            _CAN_OBJECT.size,
+            CAN_MESSAGE,
+            TIME_ONE_NANS,
+            0,
+            0,
+            timestamp_ns,
+            channel,
+            1 if tx else 0,
+            dlc,
+            arbitration_id | (CAN_MSG_EXT if extended else 0),
+            data,
+        )
+        self.object_count += 1
+        self.last_timestamp_ns = timestamp_ns
+        if len(self._buffer) >= self.container_size:
+            self.flush_container()
+
+    def write_encoded(self, objects: bytes | bytearray, timestamps) -> None:
+        """
+        Append CAN objects pre-encoded by encode_can_frames(), stamped with
+        `timestamps` (one per object). The timestamps are patched in place
+        through a memoryview, so bulk writers skip per-frame packing.
+        """
+        size = _CAN_OBJECT.size
+        count = len(objects) // size
+        if len(timestamps) != count:
+            raise ValueError(f"{count} objects but {len(timestamps)} timestamps")
+        if not count:
+            return
+        block = bytearray(objects)
+        stamps = array("Q", timestamps)
+        if sys.byteorder != "little":
+            stamps.byteswap()
+        memoryview(block).cast("Q")[_TIMESTAMP_WORD::size // 8] = stamps
+        per_container = max(1, self.container_size // size) * size
+        position = 0
+        while position < len(block):
+            room = per_container - len(self._buffer)
+            if room <= 0:
+                self.flush_container()
+                continue
+            self._buffer += block[position:position + room]
+            position += room
+            if len(self._buffer) >= per_container:
+                self.flush_container()
+        self.object_count += count
+        self.last_timestamp_ns = int(timestamps[-1])
+
+    def flush_container(self) -> None:
+        if not self._buffer:
+            return
+        data = bytes(self._buffer)
+        self._buffer.clear()
+        compressed = zlib.compress(data, self.compression_level)
+        obj_size = OBJ_HEADER_BASE.size + LOG_CONTAINER_HEADER.size + len(compressed)
+        self._file.write(OBJ_HEADER_BASE.pack(b"LOBJ", OBJ_HEADER_BASE.size, 1, obj_size, LOG_CONTAINER))
+        self._file.write(LOG_CONTAINER_HEADER.pack(ZLIB_DEFLATE, len(data)))
+        self._file.write(compressed)
+        self._file.write(b"\x00" * (obj_size % 4))
+        self.uncompressed_size += OBJ_HEADER_BASE.size + LOG_CONTAINER_HEADER.size + len(data)
+
+    def close(self, stop: datetime | None = None) -> int:
+        """Flush, write the final header and close; returns the file size."""
+        if self._file.closed:
+            return self.path.stat().st_size
+        self.flush_container()
+        file_size = self._file.tell()
+        if stop is None:
+            stop = datetime.fromtimestamp(self.start.timestamp() + self.last_timestamp_ns / 1e9)
+        self._file.seek(0)
+        self._file.write(self._header(file_size, stop))
+        self._file.close()
+        return file_size
+
+    def _header(self, file_size: int, stop: datetime | None) -> bytes:
+        major, minor, build = self.application_version
+        header = FILE_HEADER.pack(
+            b"LOGG",
+            FILE_HEADER_SIZE,
+            APPLICATION_CANOE,
+            major,
+            minor,
+            build,
+            # binlog API version (major, minor, build, patch)
+            4,
+            7,
+            0,
+            0,
+            file_size,
+            self.uncompressed_size,
+            self.object_count,
+            0,
+            *_systemtime(self.start),
+            *(_systemtime(stop) if stop is not None else (0,) * 8),
+        )
+        return header.ljust(FILE_HEADER_SIZE, b"\x00")
+
+    def __enter__(self) -> "BlfWriter":
+        return self
+
+    def __exit__(self, exc_type, exc, tb) -> bool:
+        self.close()
+        return False
+
+
+def iter_objects(raw: bytes, offset: int = FILE_HEADER_SIZE):
+    """
+    Yield (offset, obj_type, obj_size, payload) for the top-level objects in
+    raw, a whole file or a prefix of one. Stops at the first incomplete
+    object (padding included), so a file that is still being written yields
+    its complete part.
+    """
+    end = len(raw)
+    while offset + OBJ_HEADER_BASE.size <= end:
+        signature, header_size, _version, obj_size, obj_type = OBJ_HEADER_BASE.unpack_from(raw, offset)
+        if signature != b"LOBJ":
+            raise BlfError(f"bad object signature at offset {offset}")
+        if obj_size < header_size or offset + obj_size + obj_size % 4 > end:
+            return
+        yield offset, obj_type, obj_size, raw[offset + header_size:offset + obj_size]
+        offset += obj_size + obj_size % 4
+
+
+def container_data(payload: bytes) -> bytes:
+    """Uncompressed bytes of a LOG_CONTAINER payload."""
+    method, size = LOG_CONTAINER_HEADER.unpack_from(payload)
+    body = payload[LOG_CONTAINER_HEADER.size:]
+    if method == ZLIB_DEFLATE:
+        data = zlib.decompress(body)
+    elif method == NO_COMPRESSION:
+        data = body
+    else:
+        raise BlfError(f"unknown container compression {method}")
+    if len(data) != size:
+        raise BlfError(f"container holds {len(data)} bytes, header says {size}")
+    return data
+
+
+def _plain_can(block: bytes, count: int) -> bool:
+    """
+    True if block is exactly `count` CAN_MESSAGE objects as encode_can_frames()
+    and CANoe lay them out (48 bytes, v1 header, ns timestamps). Stepped
+    slices check every object's signature, size, type and timestamp unit at
+    C speed, so bulk readers can skip per-object parsing.
+    """
+    step = CAN_OBJECT_SIZE
+    return (
+        block[0::step] == b"L" * count
+        and block[8::step] == bytes([CAN_OBJECT_SIZE]) * count
+        and block[9::step] == b"\x00" * count
+        and block[12::step] == bytes([CAN_MESSAGE]) * count
+        and block[16::step] == bytes([TIME_ONE_NANS]) * count
+    )
+
+
+def count_objects(inner: bytes, position: int = 0) -> tuple[int, int]:
+    """
+    Count the complete objects of uncompressed container data from position.
+    Returns (count, end), end being where the first incomplete object starts.
+    """
+    count = 0
+    plain = (len(inner) - position) // CAN_OBJECT_SIZE
+    if plain and _plain_can(inner[position:position + plain * CAN_OBJECT_SIZE], plain):
+        count = plain
+        position += plain * CAN_OBJECT_SIZE
+    while position + OBJ_HEADER_BASE.size <= len(inner):
+        signature, header_size, _version, obj_size, _obj_type = OBJ_HEADER_BASE.unpack_from(inner, position)
+        if signature != b"LOBJ" or obj_size < header_size:
+            raise BlfError(f"bad object at container offset {position}")
+        if position + obj_size > len(inner):
+            break
+        count += 1
+        position += obj_size + obj_size % 4
+    return count, min(position, len(inner))
+
+
+def iter_can_messages(path: Path):
+    """Yield (timestamp_ns, channel, arbitration_id, data) for every CAN frame in the file."""
+    raw = Path(path).read_bytes()
+    parse_header(raw)
+    tail = b""  # CANoe lets objects straddle container boundaries
+    for _offset, obj_type, _size, payload in iter_objects(raw):
+        if obj_type != LOG_CONTAINER:
+            continue
+        inner = tail + container_data(payload)
+        position = 0
+        while position + OBJ_HEADER_BASE.size <= len(inner):
+            _sig, header_size, _v, obj_size, inner_type = OBJ_HEADER_BASE.unpack_from(inner, position)
+            if position + obj_size > len(inner):
+                break
+            if inner_type == CAN_MESSAGE and header_size == _CAN_OBJECT_HEADER_SIZE:
+                timestamp_ns = OBJ_HEADER_V1.unpack_from(inner, position + OBJ_HEADER_BASE.size)[3]
+                channel, _flags, dlc, arbitration_id, data = CAN_MSG.unpack_from(inner, position + header_size)
+                yield timestamp_ns, channel, arbitration_id & ~CAN_MSG_EXT, data[:dlc]
+            position += obj_size + obj_size % 4
+        tail = inner[position:]
@@ -0,0 +1,260 @@
+from __future__ import annotations
+
+from collections import Counter, deque
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import Callable
+import sys
+import time
+
+from services.blf import (
+    CAN_MESSAGE,
+    CAN_MESSAGE2,
+    CAN_MSG,
+    CAN_MSG_EXT,
+    CAN_OBJECT_SIZE,
+    FILE_HEADER_SIZE,
+    LOG_CONTAINER,
+    OBJ_HEADER_BASE,
+    OBJ_HEADER_V1,
+    TIME_TEN_MICS,
+    BlfError,
+    _plain_can,
+    container_data,
+    iter_objects,
+    parse_header,
+)
+
+
+@dataclass
+class _Batch:
+    """Frames of one decoded container, in bus time."""
+
+    first_ns: int
+    last_ns: int
+    frames: int
+    channels: Counter
+    ids: Counter
+
+
+@dataclass
+class TailSnapshot:
+    path: Path
+    file_bytes: int = 0
+    bytes_per_s: float = 0.0        # file growth, wall clock
+    frames_total: int = 0           # frames decoded since the tail started
+    frames_per_s: float = 0.0       # bus time, over the rate window
+    channel_rates: dict[int, float] = field(default_factory=dict)
+    top_ids: list[tuple[int, float]] = field(default_factory=list)  # busiest IDs, fr/s
+    growth_age: float | None = None  # seconds since the file last grew
+    catching_up: bool = False        # more than max_read behind the end of the file
+    error: str = ""
+
+    def describe(self) -> str:
+        if self.error:
+            return f"Logging: {self.error}"
+        if self.catching_up and not self.frames_per_s:
+            return f"Logging: catching up on {self.path.name} ({self.file_bytes / 1e6:.1f} MB)"
+        if not self.frames_per_s and not self.bytes_per_s:
+            return f"Logging: {self.path.name} ({self.file_bytes / 1e6:.1f} MB, waiting for data)"
+        channels = ", ".join(f"CAN{ch} {rate:.0f}" for ch, rate in sorted(self.channel_rates.items()))
+        text = f"Logging: {self.frames_per_s:.0f} fr/s"
+        if channels:
+            text += f" ({channels})"
+        text += f", {self.bytes_per_s / 1e6:.2f} MB/s, {self.file_bytes / 1e6:.1f} MB"
+        if self.catching_up:
+            text += " (catching up)"
+        if self.top_ids:
+            busiest = ", ".join(f"0x{arbitration_id:X} {rate:.0f}" for arbitration_id, rate in self.top_ids)
+            text += f"\nTop IDs: {busiest} fr/s"
+        return text
+
+
+class BlfTail:
+    """
+    Follows a BLF file while CANoe is still writing it, straight from disk.
+
+    Every poll() reads what was appended since the last one (at most
+    max_read bytes), decodes the LOG_CONTAINERs that are complete and keeps
+    a partial object for the next poll; objects straddling two containers
+    are carried over the same way. Frame rates per channel and per
+    arbitration id are computed in bus time over the last `window` seconds,
+    file growth in wall-clock time.
+
+    Containers of plain CAN_MESSAGE objects are counted through memoryview
+    slices without touching single frames in Python. While the tail is more
+    than max_read behind (attached late to a long recording), containers
+    are only skipped over and the rates start once it has caught up.
+    """
+
+    def __init__(
+        self,
+        path: Path,
+        *,
+        window: float = 5.0,
+        max_read: int = 1024 * 1024,
+        top: int = 5,
+        clock: Callable[[], float] = time.monotonic,
+    ) -> None:
+        self.path = Path(path)
+        self.window = window
+        self.max_read = max_read
+        self.top = top
+        self._clock = clock
+        self._reset()
+
+    def _reset(self) -> None:
+        self._offset = 0           # file offset read up to
+        self._pending = b""        # incomplete top-level object at the end of the read data
+        self._inner_tail = b""     # incomplete object at the end of the last container
+        self._resync = False       # inner object boundary unknown after skipped containers
+        self._batches: deque[_Batch] = deque()
+        self._growth: deque[tuple[float, int]] = deque()
+        self._last_size = -1
+        self._last_growth: float | None = None
+        self.frames_total = 0
+
+    def poll(self) -> TailSnapshot:
+        snapshot = TailSnapshot(self.path)
+        now = self._clock()
+        try:
+            size = self.path.stat().st_size
+        except OSError:
+            snapshot.error = f"waiting for {self.path.name}"
+            return snapshot
+        if size < self._offset:
+            self._reset()  # truncated or rewritten in place
+        if size != self._last_size:
+            self._last_size = size
+            self._last_growth = now
+        self._growth.append((now, size))
+        while len(self._growth) > 2 and now - self._growth[1][0] >= self.window:
+            self._growth.popleft()
+
+        snapshot.file_bytes = size
+        behind = 0
+        if size > self._offset:
+            try:
+                behind = self._read(size)
+            except (OSError, BlfError) as exc:
+                snapshot.error = str(exc)
+                return snapshot
+        return self._snapshot(snapshot, now, behind)
+
+    def _read(self, size: int) -> int:
+        """Read and decode new data; returns the bytes still left behind."""
+        with open(self.path, "rb") as f:
+            if self._offset == 0:
+                if size < FILE_HEADER_SIZE:
+                    return 0
+                parse_header(f.read(FILE_HEADER_SIZE))
+                self._offset = FILE_HEADER_SIZE
+            f.seek(self._offset)
+            chunk = f.read(min(size - self._offset, self.max_read))
+        self._offset += len(chunk)
+        behind = size - self._offset
+        raw = self._pending + chunk
+        consumed = 0
+        for offset, obj_type, obj_size, payload in iter_objects(raw, 0):
+            consumed = offset + obj_size + obj_size % 4
+            if obj_type != LOG_CONTAINER:
+                continue
+            if behind > 0:
+                self._inner_tail = b""
+                self._resync = True
+                continue
+            self._decode(container_data(payload))
+        self._pending = raw[consumed:]
+        return behind
+
+    def _decode(self, data: bytes) -> None:
+        inner = self._inner_tail + data
+        position = 0
+        if self._resync:
+            position = inner.find(b"LOBJ")
+            if position < 0:
+                self._inner_tail = b""
+                return
+            self._resync = False
+        count = (len(inner) - position) // CAN_OBJECT_SIZE
+        block = inner[position:position + count * CAN_OBJECT_SIZE]
+        if count and sys.byteorder == "little" and _plain_can(block, count):
+            self._count_plain(block, count)
+            position += len(block)
+        else:
+            position = self._count_generic(inner, position)
+        self._inner_tail = inner[position:]
+
+    def _count_plain(self, block: bytes, count: int) -> None:
+        view = memoryview(block)
+        stamps = view.cast("Q")[3::CAN_OBJECT_SIZE // 8]    # v1 timestamp at offset 24
+        channels = view.cast("H")[16::CAN_OBJECT_SIZE // 2]  # channel at offset 32
+        ids = view.cast("I")[9::CAN_OBJECT_SIZE // 4]        # arbitration id at offset 36
+        self._add_batch(_Batch(stamps[0], stamps[count - 1], count, Counter(channels), Counter(ids)))
+
+    def _count_generic(self, inner: bytes, position: int) -> int:
+        channels: Counter = Counter()
+        ids: Counter = Counter()
+        first_ns = last_ns = None
+        frames = 0
+        while position + OBJ_HEADER_BASE.size <= len(inner):
+            signature, header_size, _version, obj_size, obj_type = OBJ_HEADER_BASE.unpack_from(inner, position)
+            if signature != b"LOBJ":
+                raise BlfError(f"bad object signature in container at {self._offset}")
+            if position + obj_size > len(inner):
+                break
+            if obj_type in (CAN_MESSAGE, CAN_MESSAGE2) and obj_size >= header_size + CAN_MSG.size:
+                # v1 and v2 object headers both keep flags first and the timestamp at +8
+                flags, _client, _object_version, timestamp = OBJ_HEADER_V1.unpack_from(
+                    inner, position + OBJ_HEADER_BASE.size
+                )
+                if flags == TIME_TEN_MICS:
+                    timestamp *= 10_000
+                channel, _flags, _dlc, arbitration_id, _data = CAN_MSG.unpack_from(inner, position + header_size)
+                channels[channel] += 1
+                ids[arbitration_id] += 1
+                first_ns = timestamp if first_ns is None else first_ns
+                last_ns = timestamp
+                frames += 1
+            position += obj_size + obj_size % 4
+        if frames:
+            self._add_batch(_Batch(first_ns, last_ns, frames, channels, ids))
+        return position
+
+    def _add_batch(self, batch: _Batch) -> None:
+        self.frames_total += batch.frames
+        if self._batches and batch.last_ns < self._batches[-1].last_ns:
+            self._batches.clear()  # timestamps went backwards: new measurement in the same file
+        self._batches.append(batch)
+        horizon = batch.last_ns - int(self.window * 1e9)
+        while len(self._batches) > 1 and self._batches[0].first_ns < horizon:
+            self._batches.popleft()
+
+    def _snapshot(self, snapshot: TailSnapshot, now: float, behind: int) -> TailSnapshot:
+        snapshot.frames_total = self.frames_total
+        snapshot.catching_up = behind > 0
+        if self._last_growth is not None:
+            snapshot.growth_age = now - self._last_growth
+        (then, old_size), (latest, new_size) = self._growth[0], self._growth[-1]
+        if latest > then:
+            snapshot.bytes_per_s = (new_size - old_size) / (latest - then)
+
+        if not self._batches:
+            return snapshot
+        span_s = (self._batches[-1].last_ns - self._batches[0].first_ns) / 1e9
+        if span_s <= 0:
+            return snapshot
+        frames = 0
+        channels: Counter = Counter()
+        ids: Counter = Counter()
+        for batch in self._batches:
+            frames += batch.frames
+            channels.update(batch.channels)
+            ids.update(batch.ids)
+        snapshot.frames_per_s = frames / span_s
+        snapshot.channel_rates = {channel: n / span_s for channel, n in channels.items()}
+        merged: Counter = Counter()
+        for arbitration_id, n in ids.items():
+            merged[arbitration_id & ~CAN_MSG_EXT] += n
+        snapshot.top_ids = [(arbitration_id, n / span_s) for arbitration_id, n in merged.most_common(self.top)]
+        return snapshot
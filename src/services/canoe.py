@@ -1,16 +1,26 @@
 from __future__ import annotations
 
+from contextlib import contextmanager
 from dataclasses import dataclass
 from pathlib import Path
+import json
 import os
 import re
 import subprocess
 import time
 import psutil
-import win32com.client
-import win32api
-import pythoncom
-import winreg
+
+try:
+    import win32com.client
+    import win32api
+    import pythoncom
+    import winreg
+except ImportError:  # non-Windows host (fake registry / fake CANoe)
+    win32com = win32api = pythoncom = winreg = None
+
+from core.fileio import atomic_write_json
+from services.events import emit, span
+from services.registry import ComRegistryIndex, _extract_executable_from_command, normalize_path_key
 
 
 @dataclass(frozen=True)
@@ -21,10 +31,6 @@ class CANoeInstallation:
     prog_id: str | None = None
 
 
-def _normalize_path_key(value: str | Path) -> str:
-    return str(Path(value).resolve(strict=False)).lower()
-
-
 def _extract_version_hint(text: str) -> tuple[int, ...]:
     match = re.search(r"(\d+(?:\.\d+)*)", text)
     if not match:
@@ -53,27 +59,6 @@ def _file_version_hint(executable: Path) -> tuple[int, ...]:
     return (ms >> 16, ms & 0xFFFF, ls >> 16, ls & 0xFFFF)
 
 
-def _extract_executable_from_command(command: str) -> Path | None:
-    command = (command or "").strip()
-    if not command:
-        return None
-    if command.startswith('"'):
-        end = command.find('"', 1)
-        if end == -1:
-            return None
-        raw_path = command[1:end]
-    else:
-        parts = command.split()
-        if not parts:
-            return None
-        raw_path = parts[0]
-    expanded = os.path.expandvars(raw_path)
-    try:
-        return Path(expanded)
-    except Exception:
-        return None
-
-
 _PROG_ID_EXEC_CACHE: dict[str, Path | None] = {}
 
 
@@ -83,6 +68,8 @@ def _prog_id_executable(prog_id: str) -> Path | None:
         return None
     if prog_id in _PROG_ID_EXEC_CACHE:
         return _PROG_ID_EXEC_CACHE[prog_id]
+    if winreg is None:
+        return None
     try:
         with winreg.OpenKey(winreg.HKEY_CLASSES_ROOT, f"{prog_id}\\CLSID") as clsid_key:
             clsid, _ = winreg.QueryValueEx(clsid_key, None)
@@ -104,10 +91,17 @@ def _prog_id_targets_exec(prog_id: str, executable: Path) -> bool:
     target = _prog_id_executable(prog_id)
     if target is None:
         return False
-    return _normalize_path_key(target) == _normalize_path_key(executable)
+    return normalize_path_key(target) == normalize_path_key(executable)
+
 
+def _resolve_prog_id_for_installation(
+    executable: Path,
+    major_hint: int | None,
+    registry_index: ComRegistryIndex | None = None,
+) -> str | None:
+    if registry_index is not None:
+        return registry_index.best_prog_id(executable, major_hint)
 
-def _resolve_prog_id_for_installation(executable: Path, major_hint: int | None) -> str | None:
     candidates: list[str] = []
     if major_hint is not None:
         suffixes = {
@@ -180,7 +174,9 @@ def _candidate_directories(root: Path, max_depth: int = 2) -> list[Path]:
     return candidates
 
 
-def _installation_from_dir(directory: Path) -> CANoeInstallation | None:
+def _installation_from_dir(
+    directory: Path, registry_index: ComRegistryIndex | None = None
+) -> CANoeInstallation | None:
     candidates = [
         (directory / "Exec64" / "CANoe64.exe", "64-bit"),
         (directory / "Exec32" / "CANoe32.exe", "32-bit"),
@@ -199,7 +195,7 @@ def _installation_from_dir(directory: Path) -> CANoeInstallation | None:
             version_hint = _file_version_hint(candidate)
 
         major = _major_from_hint(version_hint)
-        prog_id = _resolve_prog_id_for_installation(candidate, major)
+        prog_id = _resolve_prog_id_for_installation(candidate, major, registry_index)
 
         return CANoeInstallation(
             label=label,
@@ -231,24 +227,29 @@ def _candidate_roots() -> list[Path]:
     return roots
 
 
-def discover_canoe_installations() -> list[CANoeInstallation]:
+def discover_canoe_installations(registry_index: ComRegistryIndex | None = None) -> list[CANoeInstallation]:
+    """
+    Scan the usual install roots for CANoe executables.
+    If registry_index is given, ProgIDs are looked up there instead of
+    probing the registry per installation.
+    """
     installs: list[CANoeInstallation] = []
     seen_execs: set[str] = set()
 
     for root in _candidate_roots():
         if "canoe" in root.name.lower():
-            inst = _installation_from_dir(root)
+            inst = _installation_from_dir(root, registry_index)
             if inst:
-                key = _normalize_path_key(inst.exec_path)
+                key = normalize_path_key(inst.exec_path)
                 if key not in seen_execs:
                     installs.append(inst)
                     seen_execs.add(key)
 
         for directory in _candidate_directories(root):
-            inst = _installation_from_dir(directory)
+            inst = _installation_from_dir(directory, registry_index)
             if not inst:
                 continue
-            key = _normalize_path_key(inst.exec_path)
+            key = normalize_path_key(inst.exec_path)
             if key in seen_execs:
                 continue
             installs.append(inst)
@@ -259,6 +260,79 @@ def discover_canoe_installations() -> list[CANoeInstallation]:
     return installs
 
 
+def _installation_stamp(installs: list[CANoeInstallation]) -> dict[str, list[int]]:
+    """
+    Cheap staleness stamp for the installation cache: mtime_ns of every
+    install root (a new or removed CANoe folder changes it) plus
+    (size, mtime_ns) of each cached executable (in-place upgrades).
+    """
+    stamp: dict[str, list[int]] = {}
+    paths = [*_candidate_roots(), *(inst.exec_path for inst in installs)]
+    for path in paths:
+        try:
+            st = path.stat()
+        except OSError:
+            continue
+        stamp[normalize_path_key(path)] = [st.st_size if path.is_file() else 0, st.st_mtime_ns]
+    return stamp
+
+
+def load_installation_cache(
+    cache_file: Path,
+) -> tuple[list[CANoeInstallation], ComRegistryIndex] | None:
+    """
+    Read installations + COM registry index saved by save_installation_cache().
+    Returns None if the cache is missing, invalid, points at executables
+    that no longer exist or its stamp no longer matches the install roots
+    and executables on disk (the caller should rescan).
+    """
+    try:
+        raw = json.loads(Path(cache_file).read_text(encoding="utf-8"))
+    except Exception:
+        return None
+    if not isinstance(raw, dict):
+        return None
+
+    installs: list[CANoeInstallation] = []
+    for item in raw.get("installations") or []:
+        try:
+            inst = CANoeInstallation(
+                label=str(item["label"]),
+                exec_path=Path(item["exec_path"]),
+                version_hint=tuple(int(part) for part in item.get("version_hint") or ()),
+                prog_id=item.get("prog_id") or None,
+            )
+        except Exception:
+            return None
+        if not inst.exec_path.exists():
+            return None
+        installs.append(inst)
+    if not installs:
+        return None
+    if raw.get("stamp") != _installation_stamp(installs):
+        return None
+    return installs, ComRegistryIndex.from_dict(raw.get("registry"))
+
+
+def save_installation_cache(
+    cache_file: Path, installs: list[CANoeInstallation], registry_index: ComRegistryIndex
+) -> None:
+    data = {
+        "installations": [
+            {
+                "label": inst.label,
+                "exec_path": str(inst.exec_path),
+                "version_hint": list(inst.version_hint),
+                "prog_id": inst.prog_id,
+            }
+            for inst in installs
+        ],
+        "registry": registry_index.to_dict(),
+        "stamp": _installation_stamp(installs),
+    }
+    atomic_write_json(Path(cache_file), data)
+
+
 def connect_canoe(prog_id: str | None = None, *, new_instance: bool = False):
     """
     Get a COM handle to a CANoe instance.
@@ -276,49 +350,116 @@ def _get_active_canoe(prog_id: str) -> object | None:
         return None
 
 
+@contextmanager
+def com_apartment():
+    """Initialize COM for the calling (worker) thread; no-op without pywin32."""
+    if pythoncom is None:
+        yield
+        return
+    pythoncom.CoInitialize()
+    try:
+        yield
+    finally:
+        pythoncom.CoUninitialize()
+
+
+def _matches_major(canoe_obj, expected_major: int | None) -> bool:
+    if expected_major is None:
+        return True
+    try:
+        return _extract_major_from_text(str(canoe_obj.Version)) == expected_major
+    except Exception:
+        return False
+
+
 def wait_for_process(executable: Path, timeout: float = 20.0) -> None:
+    process_span = span("process_wait", exec=str(executable))
     deadline = time.time() + timeout
     while time.time() < deadline:
         if is_canoe_running(executable):
+            process_span.end()
             return
         time.sleep(0.5)
+    process_span.end(ok=False, error="timeout")
 
 
-def _attach_running_canoe(prog_ids: list[str], matcher, timeout: float = 15.0):
+def _attach_running_canoe(prog_ids: list[str], matcher, timeout: float = 15.0, interval: float = 0.5):
+    return _attach_running_canoe_with_prog_id(prog_ids, matcher, timeout=timeout, interval=interval)[0]
+
+
+def _attach_running_canoe_with_prog_id(
+    prog_ids: list[str], matcher, timeout: float = 15.0, interval: float = 0.5
+) -> tuple[object | None, str | None]:
+    """Like _attach_running_canoe, but also return the ProgID that matched."""
+    attach_span = span("com_attach", candidates=list(prog_ids), timeout=timeout)
+    attempts = 0
+    rejected = 0
     deadline = time.time() + timeout
     while time.time() < deadline:
         for prog_id in prog_ids:
+            attempts += 1
             candidate = _get_active_canoe(prog_id)
             if candidate and matcher(candidate):
-                return candidate
-        time.sleep(0.5)
-    return None
+                attach_span.end(prog_id=prog_id, attempts=attempts, rejected=rejected)
+                return candidate, prog_id
+            if candidate:
+                rejected += 1
+        time.sleep(interval)
+    attach_span.end(ok=False, attempts=attempts, rejected=rejected, error="timeout")
+    return None, None
 
 
 def _spawn_canoe_instance(prog_ids: list[str], matcher, timeout: float = 10.0):
+    return _spawn_canoe_instance_with_prog_id(prog_ids, matcher, timeout=timeout)[0]
+
+
+def _spawn_canoe_instance_with_prog_id(
+    prog_ids: list[str], matcher, timeout: float = 10.0
+) -> tuple[object | None, str | None]:
+    """Like _spawn_canoe_instance, but also return the ProgID that matched."""
     if not prog_ids:
-        return None
+        return None, None
+    spawn_span = span("com_spawn", candidates=list(prog_ids), timeout=timeout)
+    attempts = 0
     deadline = time.time() + timeout
     while time.time() < deadline:
         for prog_id in prog_ids:
+            attempts += 1
             try:
                 candidate = connect_canoe(prog_id=prog_id, new_instance=True)
             except Exception:
                 continue
             if candidate and matcher(candidate):
-                return candidate
+                spawn_span.end(prog_id=prog_id, attempts=attempts)
+                return candidate, prog_id
         time.sleep(0.5)
-    return None
+    spawn_span.end(ok=False, attempts=attempts, error="timeout")
+    return None, None
 
 
-def load_canoe_config(canoe, cfg_file: str | Path) -> None:
+def load_canoe_config(
+    canoe,
+    cfg_file: str | Path,
+    *,
+    fingerprint: str | None = None,
+    loaded_fingerprint: str | None = None,
+) -> bool:
     """
     Load a .cfg file into the running CANoe instance
-    if it's not already open.
+    if it's not already open (including when CANoe has no configuration
+    loaded at all), or if it is open but its fingerprint (cfg + referenced
+    files) differs from the one recorded at the last load.
+    Returns True if the configuration was (re)opened, False if cfg_file was
+    already loaded and unchanged; either way cfg_file is loaded afterwards.
     """
     current = getattr(canoe.Configuration, "FullName", "")
-    if current and Path(current).resolve() != Path(cfg_file).resolve():
+    same_path = bool(current) and normalize_path_key(current) == normalize_path_key(cfg_file)
+    if same_path and (fingerprint is None or fingerprint == loaded_fingerprint):
+        emit("cfg_load_skipped", cfg=str(cfg_file))
+        return False
+    with span("cfg_load", cfg=str(cfg_file), same_path=same_path):
         canoe.Open(str(cfg_file))
+    return True
 
 
 def open_canoe_installation(executable: Path) -> bool:
@@ -332,6 +473,7 @@ def open_canoe_installation(executable: Path) -> bool:
 
     if not is_canoe_running(exe):
         subprocess.Popen([str(exe)])
+        emit("launch", exec=str(exe))
     return True
 
 
@@ -345,7 +487,7 @@ def get_logging_block_status(canoe) -> str:
 
 def is_canoe_running(executable: str | Path | None = None) -> bool:
     """Check process list to see if CANoe is running (optionally matching an executable)."""
-    exec_key = _normalize_path_key(executable) if executable else None
+    exec_key = normalize_path_key(executable) if executable else None
     for proc in psutil.process_iter(["name", "exe"]):
         try:
             name = proc.info.get("name") or ""
@@ -357,7 +499,7 @@ def is_canoe_running(executable: str | Path | None = None) -> bool:
             exe_path = proc.info.get("exe")
             if exe_path:
                 try:
-                    if _normalize_path_key(exe_path) == exec_key:
+                    if normalize_path_key(exe_path) == exec_key:
                         return True
                 except Exception:
                     continue
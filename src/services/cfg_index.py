@@ -0,0 +1,217 @@
+from __future__ import annotations
+
+from dataclasses import asdict, dataclass, field
+from pathlib import Path, PureWindowsPath
+import hashlib
+import json
+import os
+import re
+
+from core.fileio import atomic_write_json
+
+_BEGIN_RE = re.compile(r"^(\S+) \d+ Begin_Of_Object$")
+_END_RE = re.compile(r"^End_Of_Object (\S+) \d+$")
+_FILENAME_RE = re.compile(r'<VFileName V\d+ QL> \d+ "([^"]*)"')
+_VERSION_RE = re.compile(r"^Version: (.+)$")
+
+# Object types (as written in the .cfg) that decide what a file reference is.
+_DATABASE_OBJECTS = {"VDatabaseContainerStreamer"}
+_NODE_OBJECTS = {"VProgrammedNode", "VSimulationNode"}
+_LOGGING_OBJECTS = {"VLoggingConfiguration"}
+_VIDEO_OBJECTS = {"VMultimediaWrapper"}
+_OFFLINE_OBJECTS = {"VOfflineCfgData"}
+# Outputs, exports, macros and templates: referenced, but not needed to load.
+_AUXILIARY_OBJECTS = {
+    "VLogCfgData",
+    "VLogExportPersister",
+    "VLogFileConverter",
+    "VStandaloneLoggingUserConfig",
+    "VMacroManager",
+    "VWriteControlAdapter",
+    "VTraceControlCfg",
+}
+
+SUMMARY_VERSION = 1
+
+
+@dataclass
+class CfgSummary:
+    """
+    What a CANoe .cfg references, read offline without CANoe.
+    Paths are kept as written in the .cfg (usually relative to its folder).
+    """
+    cfg_file: str
+    sha256: str
+    canoe_version: str = ""
+    databases: list[str] = field(default_factory=list)
+    capl_nodes: list[str] = field(default_factory=list)
+    logging_targets: list[str] = field(default_factory=list)  # one per logging block
+    video_files: list[str] = field(default_factory=list)
+    offline_sources: list[str] = field(default_factory=list)
+    auxiliary_files: list[str] = field(default_factory=list)
+    other_files: list[str] = field(default_factory=list)  # panels, sysvars, NM INIs, ...
+
+    def resolve(self, raw: str) -> Path:
+        return _resolve_reference(Path(self.cfg_file).parent, raw)
+
+    def input_files(self) -> list[Path]:
+        """Files the configuration loads (databases, CAPL, panels, ...), resolved."""
+        seen: list[Path] = []
+        for raw in (*self.databases, *self.capl_nodes, *self.other_files):
+            resolved = self.resolve(raw)
+            if resolved not in seen:
+                seen.append(resolved)
+        return seen
+
+    def missing_files(self) -> list[Path]:
+        return [p for p in self.input_files() if not p.exists()]
+
+    def logging_extensions(self) -> list[str]:
+        return [PureWindowsPath(target).suffix.lstrip(".") for target in self.logging_targets]
+
+    def video_window_names(self) -> list[str]:
+        """Window names as encoded in the last recorded "_<prefix>_<Name>.avi" paths."""
+        names: list[str] = []
+        for raw in self.video_files:
+            stem = PureWindowsPath(raw).stem
+            marker = "{MeasurementStart}_"
+            if marker in stem:
+                names.append(stem.split(marker, 1)[1])
+            else:
+                names.append(stem.rsplit("_", 1)[-1])
+        return names
+
+    def to_dict(self) -> dict:
+        return {"summary_version": SUMMARY_VERSION, **asdict(self)}
+
+    @classmethod
+    def from_dict(cls, raw: dict) -> "CfgSummary | None":
+        if not isinstance(raw, dict) or raw.get("summary_version") != SUMMARY_VERSION:
+            return None
+        known = {k: v for k, v in raw.items() if k in cls.__dataclass_fields__}
+        try:
+            return cls(**known)
+        except TypeError:
+            return None
+
+
+def _resolve_reference(base_dir: Path, raw: str) -> Path:
+    windows = PureWindowsPath(raw)
+    if windows.drive or windows.is_absolute():
+        return Path(raw)
+    joined = os.path.normpath(os.path.join(str(base_dir), raw.replace("\\", os.sep)))
+    return Path(joined)
+
+
+def _pick_logging_target(names: list[str]) -> str | None:
+    # A logging block lists several historic file names; the one carrying a
+    # CANoe field such as {MeasurementStart} is the active target.
+    non_empty = [name for name in names if name]
+    for name in non_empty:
+        if "{" in name and "}" in name:
+            return name
+    return non_empty[-1] if non_empty else None
+
+
+def scan_cfg(cfg_file: str | Path) -> CfgSummary:
+    """
+    Stream the .cfg once, hashing it and collecting file references by the
+    kind of object that holds them.
+    """
+    cfg_path = Path(cfg_file)
+    digest = hashlib.sha256()
+    stack: list[str] = []
+    summary = CfgSummary(cfg_file=str(cfg_path), sha256="")
+    logging_names: list[str] | None = None
+    logging_depth = 0
+    own_name = cfg_path.name.lower()
+
+    with open(cfg_path, "rb") as f:
+        for raw_line in f:
+            digest.update(raw_line)
+            line = raw_line.decode("utf-8", errors="replace").rstrip("\r\n")
+
+            begin = _BEGIN_RE.match(line)
+            if begin:
+                stack.append(begin.group(1))
+                if begin.group(1) in _LOGGING_OBJECTS and logging_names is None:
+                    logging_names = []
+                    logging_depth = len(stack)
+                continue
+
+            end = _END_RE.match(line)
+            if end:
+                if stack and stack[-1] == end.group(1):
+                    stack.pop()
+                if logging_names is not None and len(stack) < logging_depth:
+                    target = _pick_logging_target(logging_names)
+                    if target:
+                        summary.logging_targets.append(target)
+                    logging_names = None
+                continue
+
+            if not summary.canoe_version and len(stack) == 0:
+                version = _VERSION_RE.match(line)
+                if version:
+                    summary.canoe_version = version.group(1).strip()
+                    continue
+
+            for match in _FILENAME_RE.finditer(line):
+                name = match.group(1)
+                if logging_names is not None:
+                    logging_names.append(name)
+                    continue
+                if not name or name.endswith("\\"):
+                    continue
+                kinds = set(stack)
+                if kinds & _DATABASE_OBJECTS:
+                    bucket = summary.databases
+                elif kinds & _NODE_OBJECTS:
+                    bucket = summary.capl_nodes
+                elif kinds & _VIDEO_OBJECTS:
+                    bucket = summary.video_files
+                elif kinds & _OFFLINE_OBJECTS:
+                    bucket = summary.offline_sources
+                elif kinds & _AUXILIARY_OBJECTS:
+                    bucket = summary.auxiliary_files
+                elif PureWindowsPath(name).name.lower() == own_name:
+                    continue
+                else:
+                    bucket = summary.other_files
+                if name not in bucket:
+                    bucket.append(name)
+
+    summary.sha256 = digest.hexdigest()
+    return summary
+
+
+def file_sha256(path: str | Path, chunk_size: int = 1 << 20) -> str:
+    digest = hashlib.sha256()
+    with open(path, "rb") as f:
+        for chunk in iter(lambda: f.read(chunk_size), b""):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+def load_cfg_summary(cfg_file: str | Path, cache_dir: Path) -> CfgSummary:
+    """
+    Return the summary for cfg_file, reusing cache_dir/<sha256>.json when the
+    file content is unchanged; otherwise scan and store a fresh one.
+    """
+    cfg_path = Path(cfg_file)
+    sha = file_sha256(cfg_path)
+    cache_file = Path(cache_dir) / f"{sha}.json"
+    try:
+        cached = CfgSummary.from_dict(json.loads(cache_file.read_text(encoding="utf-8")))
+    except Exception:
+        cached = None
+    if cached is not None:
+        cached.cfg_file = str(cfg_path)
+        return cached
+
+    summary = scan_cfg(cfg_path)
+    try:
+        atomic_write_json(Path(cache_dir) / f"{summary.sha256}.json", summary.to_dict())
+    except OSError:
+        pass
+    return summary
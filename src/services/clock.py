@@ -0,0 +1,146 @@
+from __future__ import annotations
+
+from collections import deque
+import time
+
+
+class MeasurementClock:
+    """
+    Local model of CANoe's measurement time.
+
+    Pairs of (local perf_counter_ns, Measurement.GetTime()) are fitted with a
+    least-squares line, so now_ns() answers "current measurement time" without
+    a COM round trip. The slope of that line is the drift between the PC clock
+    and CANoe's clock; drift_ppm reports it.
+    """
+
+    def __init__(
+        self,
+        *,
+        window: int = 16,
+        resync_interval: float = 5.0,
+        warmup_interval: float = 0.5,
+        warmup_samples: int = 4,
+        jump_tolerance: float = 0.25,
+        clock_ns=time.perf_counter_ns,
+    ) -> None:
+        self.window = window
+        self.resync_interval_ns = int(resync_interval * 1e9)
+        self.warmup_interval_ns = int(warmup_interval * 1e9)
+        self.warmup_samples = warmup_samples
+        self.jump_tolerance_ns = int(jump_tolerance * 1e9)
+        self.clock_ns = clock_ns
+        self.resets = 0
+        self.reset()
+
+    def reset(self) -> None:
+        self._samples: deque[tuple[int, int]] = deque(maxlen=self.window)
+        self._last_sample_ns: int | None = None
+        self._last_returned_ns = 0
+        self._rate = 1.0
+        self._x_mean = 0.0
+        self._y_mean = 0.0
+        self.residual_ns = 0.0
+        self.sample_count = 0
+
+    # ---- sampling ----
+    def sample(self, read_seconds) -> bool:
+        """
+        Call read_seconds() (e.g. Measurement.GetTime) and record the result
+        against the midpoint of the call. Returns False if the call failed.
+        """
+        before = self.clock_ns()
+        try:
+            value = float(read_seconds())
+        except Exception:
+            return False
+        after = self.clock_ns()
+        self.add_sample(value, (before + after) // 2)
+        return True
+
+    def add_sample(self, measurement_seconds: float, local_ns: int | None = None) -> None:
+        local_ns = self.clock_ns() if local_ns is None else local_ns
+        meas_ns = int(measurement_seconds * 1e9)
+        if self._samples:
+            predicted = self._predict(local_ns)
+            if abs(predicted - meas_ns) > self.jump_tolerance_ns:
+                # Measurement restarted (or CANoe paused); the old fit is useless.
+                self.reset()
+                self.resets += 1
+        self._samples.append((local_ns, meas_ns))
+        self._last_sample_ns = local_ns
+        self.sample_count += 1
+        self._fit()
+
+    def needs_sample(self, local_ns: int | None = None) -> bool:
+        if self._last_sample_ns is None:
+            return True
+        local_ns = self.clock_ns() if local_ns is None else local_ns
+        interval = (
+            self.warmup_interval_ns if len(self._samples) < self.warmup_samples else self.resync_interval_ns
+        )
+        return local_ns - self._last_sample_ns >= interval
+
+    # ---- queries ----
+    @property
+    def synced(self) -> bool:
+        return bool(self._samples)
+
+    def now_ns(self, local_ns: int | None = None) -> int | None:
+        """
+        Measurement time in nanoseconds at local_ns (default: now).
+        Live readings never go backwards, even when a resync shifts the fit.
+        """
+        if not self._samples:
+            return None
+        live = local_ns is None
+        local_ns = self.clock_ns() if live else local_ns
+        value = max(0, int(self._predict(local_ns)))
+        if live:
+            value = max(value, self._last_returned_ns)
+            self._last_returned_ns = value
+        return value
+
+    def now_seconds(self, local_ns: int | None = None) -> float | None:
+        value = self.now_ns(local_ns)
+        return None if value is None else value / 1e9
+
+    @property
+    def drift_ppm(self) -> float | None:
+        """Observed rate difference between CANoe and the PC clock, in ppm."""
+        if len(self._samples) < 2:
+            return None
+        return (self._rate - 1.0) * 1e6
+
+    def describe(self) -> str:
+        drift = self.drift_ppm
+        drift_text = f"{drift:+.1f} ppm" if drift is not None else "n/a"
+        return (
+            f"{self.sample_count} sample(s), drift {drift_text}, "
+            f"residual {self.residual_ns / 1e3:.0f} µs, resets {self.resets}"
+        )
+
+    # ---- model ----
+    def _predict(self, local_ns: int) -> float:
+        return self._y_mean + self._rate * (local_ns - self._x_mean)
+
+    def _fit(self) -> None:
+        n = len(self._samples)
+        xs = [float(x) for x, _ in self._samples]
+        ys = [float(y) for _, y in self._samples]
+        # Center on the newest sample to keep the float math well conditioned.
+        x0, y0 = xs[-1], ys[-1]
+        dx = [x - x0 for x in xs]
+        dy = [y - y0 for y in ys]
+        mx = sum(dx) / n
+        my = sum(dy) / n
+        sxx = sum((x - mx) ** 2 for x in dx)
+        rate = 1.0
+        # Too short a baseline makes the slope pure noise; assume no drift.
+        if n >= 2 and sxx > 0 and (dx[-1] - dx[0]) >= 1e9:
+            sxy = sum((x - mx) * (y - my) for x, y in zip(dx, dy))
+            rate = sxy / sxx
+        self._rate = rate
+        self._x_mean = x0 + mx
+        self._y_mean = y0 + my
+        self.residual_ns = max(abs(y - (my + rate * (x - mx))) for x, y in zip(dx, dy))
@@ -0,0 +1,175 @@
+from __future__ import annotations
+
+from dataclasses import dataclass, field
+import functools
+import threading
+import time
+import types
+
+from services.histogram import Log2Histogram
+
+# Bucket i holds calls that took [2^(i-1), 2^i) microseconds; bucket 0 is < 1 us.
+_BUCKETS = 32
+
+# Values handed back as-is; anything else is treated as a COM sub-object.
+_PLAIN_TYPES = (str, bytes, int, float, bool, type(None), tuple, list, dict)
+_METHOD_TYPES = (types.MethodType, types.FunctionType, types.BuiltinMethodType, functools.partial)
+
+
+@dataclass
+class MemberStats:
+    member: str
+    count: int = 0
+    errors: int = 0
+    total_ns: int = 0
+    max_ns: int = 0
+    histogram: Log2Histogram = field(default_factory=lambda: Log2Histogram(_BUCKETS, unit=1000))  # ns -> us
+
+    def add(self, duration_ns: int, error: bool) -> None:
+        self.count += 1
+        self.errors += 1 if error else 0
+        self.total_ns += duration_ns
+        self.max_ns = max(self.max_ns, duration_ns)
+        self.histogram.add(duration_ns)
+
+    @property
+    def mean_us(self) -> float:
+        return self.total_ns / self.count / 1000.0 if self.count else 0.0
+
+    def percentile_us(self, pct: float) -> float:
+        """Upper bound of the histogram bucket holding the pct-th call."""
+        return self.histogram.percentile(pct)
+
+
+class ComStats:
+    """Per-member call counts and log2 latency histograms; thread-safe."""
+
+    def __init__(self) -> None:
+        self._lock = threading.Lock()
+        self._members: dict[str, MemberStats] = {}
+
+    def record(self, member: str, duration_ns: int, error: bool = False) -> None:
+        with self._lock:
+            stats = self._members.get(member)
+            if stats is None:
+                stats = self._members[member] = MemberStats(member)
+            stats.add(duration_ns, error)
+
+    def reset(self) -> None:
+        with self._lock:
+            self._members.clear()
+
+    def snapshot(self) -> list[MemberStats]:
+        with self._lock:
+            return [
+                MemberStats(s.member, s.count, s.errors, s.total_ns, s.max_ns, s.histogram.copy())
+                for s in self._members.values()
+            ]
+
+    @property
+    def total_calls(self) -> int:
+        with self._lock:
+            return sum(s.count for s in self._members.values())
+
+    def top(self, n: int = 5, key: str = "total") -> list[MemberStats]:
+        """Worst n members by "total" time, call "count" or "max" latency."""
+        sort_key = {
+            "total": lambda s: s.total_ns,
+            "count": lambda s: s.count,
+            "max": lambda s: s.max_ns,
+        }[key]
+        return sorted(self.snapshot(), key=sort_key, reverse=True)[:n]
+
+    def format_top(self, n: int = 5, key: str = "total") -> list[str]:
+        lines = []
+        for s in self.top(n, key):
+            lines.append(
+                f"{s.member}: {s.count} call(s), total {s.total_ns / 1e6:.1f} ms, mean {s.mean_us:.0f} us, "
+                f"p95 <{s.percentile_us(95):.0f} us, max {s.max_ns / 1000.0:.0f} us"
+                + (f", {s.errors} error(s)" if s.errors else "")
+            )
+        return lines
+
+
+def _describe_args(args: tuple) -> str:
+    # String arguments (sysvar/namespace names) identify the call site;
+    # numeric indices (LoggingCollection.Item(i)) are folded together.
+    return ", ".join(f'"{a}"' if isinstance(a, str) and len(a) <= 64 else "#" for a in args)
+
+
+class InstrumentedDispatch:
+    """
+    Transparent timing proxy around a COM dispatch object (or a fake).
+    Attribute reads, writes and method calls are timed and recorded under
+    their access path, e.g. "Measurement.Running" or
+    'System.Namespaces.Item("anSWer_SysVal").Variables.Item("Camera_Mode").Value'.
+    Returned sub-objects are wrapped as well; plain values pass through.
+    """
+
+    __slots__ = ("_target", "_stats", "_path")
+
+    def __init__(self, target, stats: ComStats, path: str = "") -> None:
+        object.__setattr__(self, "_target", target)
+        object.__setattr__(self, "_stats", stats)
+        object.__setattr__(self, "_path", path)
+
+    @property
+    def com_target(self):
+        return self._target
+
+    def _member(self, name: str) -> str:
+        return f"{self._path}.{name}" if self._path else name
+
+    def _wrap(self, value, path: str):
+        if isinstance(value, _PLAIN_TYPES) or isinstance(value, InstrumentedDispatch):
+            return value
+        return InstrumentedDispatch(value, self._stats, path)
+
+    def __getattr__(self, name: str):
+        member = self._member(name)
+        started = time.perf_counter_ns()
+        try:
+            value = getattr(self._target, name)
+        except Exception:
+            self._stats.record(member, time.perf_counter_ns() - started, error=True)
+            raise
+        if isinstance(value, _METHOD_TYPES):
+            return self._method(value, member)
+        self._stats.record(member, time.perf_counter_ns() - started)
+        return self._wrap(value, member)
+
+    def _method(self, method, member: str):
+        def call(*args, **kwargs):
+            path = f"{member}({_describe_args(args)})"
+            started = time.perf_counter_ns()
+            try:
+                result = method(*args, **kwargs)
+            except Exception:
+                self._stats.record(path, time.perf_counter_ns() - started, error=True)
+                raise
+            self._stats.record(path, time.perf_counter_ns() - started)
+            return self._wrap(result, path)
+
+        return call
+
+    def __setattr__(self, name: str, value) -> None:
+        member = f"{self._member(name)}="
+        if isinstance(value, InstrumentedDispatch):
+            value = value.com_target
+        started = time.perf_counter_ns()
+        try:
+            setattr(self._target, name, value)
+        except Exception:
+            self._stats.record(member, time.perf_counter_ns() - started, error=True)
+            raise
+        self._stats.record(member, time.perf_counter_ns() - started)
+
+    def __repr__(self) -> str:
+        return f"<InstrumentedDispatch {self._path or 'root'} of {self._target!r}>"
+
+
+def instrument(canoe, stats: ComStats):
+    """Wrap canoe for accounting; None and already wrapped objects pass through."""
+    if canoe is None or isinstance(canoe, InstrumentedDispatch):
+        return canoe
+    return InstrumentedDispatch(canoe, stats)
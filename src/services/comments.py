@@ -0,0 +1,297 @@
+from __future__ import annotations
+
+from dataclasses import dataclass
+from pathlib import Path
+import json
+import os
+import queue
+import threading
+import time
+
+
+@dataclass(frozen=True)
+class FlushPolicy:
+    """
+    How eagerly the comment writer pushes data to disk.
+
+    flush_every: flush the session .txt after this many comments.
+    fsync: "never", "always" (every record) or "interval".
+    fsync_interval: seconds between fsyncs when fsync == "interval".
+    """
+    flush_every: int = 1
+    fsync: str = "interval"
+    fsync_interval: float = 2.0
+
+
+@dataclass(frozen=True)
+class CommentEntry:
+    line: str           # formatted line, e.g. "[00:01:02.345] text"
+    pressed_at: float   # time.perf_counter() when the operator hit Enter
+
+
+class CommentJournal:
+    """
+    Append-only writer for the per-session comment .txt.
+
+    All file I/O happens on a background thread that owns the open handles;
+    callers only enqueue operations. Every record is first appended to a
+    JSONL journal (data dir) so recover() can rebuild the .txt if the hub
+    dies mid-session. Renames of the session file (once CANoe's
+    {MeasurementStart} suffix is known) are applied in order by the writer.
+    """
+
+    def __init__(
+        self,
+        journal_path: Path,
+        *,
+        policy: FlushPolicy | None = None,
+        clock=time.perf_counter,
+    ) -> None:
+        self.journal_path = Path(journal_path)
+        self.policy = policy or FlushPolicy()
+        self.clock = clock
+        self.current_path: Path | None = None
+        self.written_count = 0
+        self.last_error: str | None = None
+
+        self._queue: queue.Queue = queue.Queue()
+        self._txt = None
+        self._journal = None
+        self._unflushed = 0
+        self._last_fsync = 0.0
+        self._seq = 0  # append records written to the journal this session
+        self._thread = threading.Thread(target=self._run, name="comment-journal", daemon=True)
+        self._thread.start()
+
+    # ---- public API (any thread) ----
+    def open_session(self, path: Path, header_lines: list[str]) -> None:
+        self.current_path = Path(path)
+        self._queue.put(("open", Path(path), list(header_lines)))
+
+    def append(self, entry: CommentEntry) -> None:
+        self._queue.put(("append", entry))
+
+    def rename(self, new_path: Path) -> None:
+        self.current_path = Path(new_path)
+        self._queue.put(("rename", Path(new_path)))
+
+    def close_session(self, *, wait: bool = True, timeout: float = 5.0) -> bool:
+        self._queue.put(("close",))
+        return self.sync(timeout) if wait else True
+
+    def sync(self, timeout: float = 5.0) -> bool:
+        """Block until all queued operations have been written."""
+        done = threading.Event()
+        self._queue.put(("barrier", done))
+        return done.wait(timeout)
+
+    def shutdown(self, timeout: float = 5.0) -> None:
+        self._queue.put(("close",))
+        self._queue.put(None)
+        self._thread.join(timeout)
+
+    # ---- recovery ----
+    def recover(self) -> Path | None:
+        """
+        Replay a journal left behind by a crashed session into its .txt.
+        Returns the recovered file path, or None if there was nothing to do.
+        Must be called before the first open_session().
+        """
+        records = _read_journal(self.journal_path)
+        if not records:
+            _unlink_quietly(self.journal_path)
+            return None
+        if records[-1].get("op") == "close":
+            _unlink_quietly(self.journal_path)
+            return None
+
+        header: list[str] = []
+        appends: list[tuple[int, str]] = []  # (seq, line)
+        known_paths: list[Path] = []
+        for record in records:
+            op = record.get("op")
+            if op == "open":
+                header = list(record.get("header") or [])
+                appends = []
+                known_paths = [Path(record["path"])]
+            elif op == "rename":
+                known_paths.append(Path(record["path"]))
+            elif op == "append":
+                appends.append((int(record.get("seq", len(appends) + 1)), record.get("line", "")))
+        if not known_paths:
+            _unlink_quietly(self.journal_path)
+            return None
+
+        target = known_paths[-1]
+        if not target.exists():
+            for previous in reversed(known_paths[:-1]):
+                if previous.exists():
+                    try:
+                        previous.replace(target)
+                    except OSError:
+                        target = previous
+                    break
+
+        # The .txt is written in journal order, so the comments it already
+        # holds are a prefix of the appends: count its complete lines past
+        # the header and replay the rest by sequence number. (Comparing
+        # text would drop a repeated comment or one equal to a header line.)
+        header_text = "\n".join(header) + "\n"
+        present = _complete_lines(target) - header_text.count("\n") if target.exists() else -1
+        pending: list[str] = []
+        for _seq, line in sorted(appends):
+            size = line.count("\n") + 1
+            if not pending and present >= size:
+                present -= size
+                continue
+            pending.append(line)
+        target.parent.mkdir(parents=True, exist_ok=True)
+        with open(target, "a" if present >= 0 else "w", encoding="utf-8") as f:
+            if present < 0:
+                # Missing, or torn inside the header: rebuild it completely.
+                f.write(header_text)
+                pending = [line for _seq, line in sorted(appends)]
+            for line in pending:
+                f.write(line + "\n")
+            f.flush()
+            os.fsync(f.fileno())
+        _unlink_quietly(self.journal_path)
+        return target
+
+    # ---- writer thread ----
+    def _run(self) -> None:
+        while True:
+            item = self._queue.get()
+            if item is None:
+                break
+            try:
+                self._handle(item)
+            except Exception as exc:
+                self.last_error = f"{type(exc).__name__}: {exc}"
+
+    def _handle(self, item: tuple) -> None:
+        op = item[0]
+        if op == "barrier":
+            self._flush(force_fsync=False)
+            item[1].set()
+        elif op == "open":
+            self._close_files()
+            _, path, header = item
+            self.journal_path.parent.mkdir(parents=True, exist_ok=True)
+            self._journal = open(self.journal_path, "w", encoding="utf-8")
+            self._seq = 0
+            self._record({"op": "open", "path": str(path), "header": header})
+            path.parent.mkdir(parents=True, exist_ok=True)
+            self._txt = open(path, "w", encoding="utf-8")
+            self._txt.write("\n".join(header) + "\n")
+            self._flush(force_fsync=True)
+        elif op == "append":
+            entry: CommentEntry = item[1]
+            if self._txt is None:
+                raise RuntimeError("comment appended without an open session")
+            self._seq += 1
+            self._record(
+                {"op": "append", "seq": self._seq, "line": entry.line.rstrip("\n"), "pressed_at": entry.pressed_at}
+            )
+            self._txt.write(entry.line if entry.line.endswith("\n") else entry.line + "\n")
+            self.written_count += 1
+            self._unflushed += 1
+            if self._unflushed >= max(1, self.policy.flush_every):
+                self._flush(force_fsync=False)
+        elif op == "rename":
+            new_path: Path = item[1]
+            if self._txt is None:
+                return
+            old_path = Path(self._txt.name)
+            if old_path == new_path:
+                return
+            self._flush(force_fsync=False)
+            self._txt.close()
+            try:
+                new_path.parent.mkdir(parents=True, exist_ok=True)
+                old_path.replace(new_path)
+            except OSError as exc:
+                # Keep writing to the original file if renaming fails.
+                self.last_error = f"rename failed: {exc}"
+                self.current_path = old_path
+                new_path = old_path
+            self._txt = open(new_path, "a", encoding="utf-8")
+            self._record({"op": "rename", "path": str(new_path)})
+            self._flush(force_fsync=True)
+        elif op == "close":
+            if self._journal is not None:
+                self._record({"op": "close"})
+            self._close_files()
+            _unlink_quietly(self.journal_path)
+
+    def _record(self, payload: dict) -> None:
+        if self._journal is None:
+            return
+        payload["t"] = self.clock()
+        self._journal.write(json.dumps(payload, ensure_ascii=False) + "\n")
+        self._journal.flush()
+        if self.policy.fsync == "always":
+            os.fsync(self._journal.fileno())
+
+    def _flush(self, *, force_fsync: bool) -> None:
+        self._unflushed = 0
+        handles = [h for h in (self._journal, self._txt) if h is not None]
+        for handle in handles:
+            handle.flush()
+        now = self.clock()
+        want_fsync = force_fsync or self.policy.fsync == "always" or (
+            self.policy.fsync == "interval" and now - self._last_fsync >= self.policy.fsync_interval
+        )
+        if want_fsync and self.policy.fsync != "never":
+            for handle in handles:
+                os.fsync(handle.fileno())
+            self._last_fsync = now
+
+    def _close_files(self) -> None:
+        if self._txt is not None or self._journal is not None:
+            self._flush(force_fsync=True)
+        for handle in (self._txt, self._journal):
+            if handle is not None:
+                handle.close()
+        self._txt = None
+        self._journal = None
+        self._unflushed = 0
+
+
+def _read_journal(path: Path) -> list[dict]:
+    if not path.exists():
+        return []
+    records: list[dict] = []
+    try:
+        with open(path, "r", encoding="utf-8") as f:
+            for raw in f:
+                raw = raw.strip()
+                if not raw:
+                    continue
+                try:
+                    records.append(json.loads(raw))
+                except ValueError:
+                    # A torn last line from the crash; everything before it is valid.
+                    break
+    except OSError:
+        return []
+    return records
+
+
+def _complete_lines(path: Path) -> int:
+    """Newline-terminated lines in path; a torn last line is cut off first."""
+    try:
+        data = path.read_bytes()
+        if data and not data.endswith(b"\n"):
+            with open(path, "r+b") as f:
+                f.truncate(data.rfind(b"\n") + 1)
+    except OSError:
+        return 0
+    return data.count(b"\n")
+
+
+def _unlink_quietly(path: Path) -> None:
+    try:
+        path.unlink()
+    except OSError:
+        pass
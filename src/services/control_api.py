@@ -0,0 +1,326 @@
+from __future__ import annotations
+
+from dataclasses import dataclass, field
+from pathlib import Path
+import asyncio
+import hmac
+import json
+import os
+import queue
+import secrets
+import threading
+
+# Actions a client may request; the UI thread decides what they mean.
+CONTROL_ACTIONS = ("connect", "start", "stop", "discard", "comment")
+
+_REASONS = {
+    200: "OK",
+    400: "Bad Request",
+    401: "Unauthorized",
+    403: "Forbidden",
+    404: "Not Found",
+    405: "Method Not Allowed",
+    413: "Payload Too Large",
+    415: "Unsupported Media Type",
+    504: "Gateway Timeout",
+}
+
+TOKEN_HEADER = "x-hub-token"
+MAX_BODY_BYTES = 64 * 1024
+_MAX_HEADER_LINES = 64
+_LOCAL_HOSTS = ("127.0.0.1", "localhost", "[::1]")
+
+
+class _RequestTooLarge(ValueError):
+    pass
+
+
+def load_or_create_token(path: Path) -> str:
+    """
+    The per-install secret clients send in the X-Hub-Token header; created
+    on first use and readable only by the current user where the OS allows.
+    """
+    path = Path(path)
+    try:
+        token = path.read_text(encoding="utf-8").strip()
+        if token:
+            return token
+    except OSError:
+        pass
+    token = secrets.token_urlsafe(32)
+    path.parent.mkdir(parents=True, exist_ok=True)
+    fd = os.open(path, os.O_WRONLY | os.O_CREAT | os.O_TRUNC, 0o600)
+    with os.fdopen(fd, "w", encoding="utf-8") as f:
+        f.write(token)
+    return token
+
+
+@dataclass
+class ControlCommand:
+    action: str
+    payload: dict = field(default_factory=dict)
+    _loop: asyncio.AbstractEventLoop | None = field(default=None, repr=False)
+    _future: asyncio.Future | None = field(default=None, repr=False)
+
+    def resolve(self, result: dict) -> None:
+        """Hand the result back to the waiting HTTP request (any thread)."""
+        if self._loop is None or self._future is None:
+            return
+        try:
+            self._loop.call_soon_threadsafe(self._set_result, result)
+        except RuntimeError:
+            pass  # server loop already closed
+
+    def _set_result(self, result: dict) -> None:
+        if not self._future.done():
+            self._future.set_result(result)
+
+
+class ControlServer:
+    """
+    Localhost HTTP control API on its own asyncio loop thread.
+
+      POST /connect | /start | /stop | /discard   -> {"ok": ..., "status": ...}
+      POST /comment   {"text": "..."}
+      GET  /status                                -> latest status snapshot
+      GET  /events                                -> text/event-stream of snapshots
+
+    Every request must carry the install token in X-Hub-Token and a Host of
+    127.0.0.1/localhost; requests with an Origin header (browsers) are
+    refused unless the origin is in allowed_origins, and POST bodies must be
+    application/json of at most MAX_BODY_BYTES. A web page open on the
+    recording PC therefore cannot stop or discard a run.
+
+    Commands are queued for the UI thread, which drains them with
+    pending_commands() and answers through ControlCommand.resolve(); the
+    server never touches Tk. publish_status() may be called from any thread
+    and fans the snapshot out to every event-stream client.
+    """
+
+    def __init__(
+        self,
+        host: str = "127.0.0.1",
+        port: int = 8765,
+        *,
+        token: str,
+        allowed_origins: tuple[str, ...] = (),
+        command_timeout: float = 30.0,
+    ) -> None:
+        if not token:
+            raise ValueError("the control API needs a token")
+        self.host = host
+        self.port = port
+        self.token = token
+        self.allowed_origins = tuple(allowed_origins)
+        self.command_timeout = command_timeout
+        self.commands: queue.Queue[ControlCommand] = queue.Queue()
+        self.last_error: str | None = None
+        self._status: dict = {}
+        self._subscribers: set[asyncio.Queue] = set()
+        self._loop: asyncio.AbstractEventLoop | None = None
+        self._server: asyncio.base_events.Server | None = None
+        self._ready = threading.Event()
+        self._thread: threading.Thread | None = None
+
+    # ---- lifecycle (UI thread) ----
+    def start(self, timeout: float = 5.0) -> bool:
+        """Start the loop thread; returns False if the port could not be bound."""
+        if self._thread is not None:
+            return self._server is not None
+        self._thread = threading.Thread(target=self._run, name="control-api", daemon=True)
+        self._thread.start()
+        self._ready.wait(timeout)
+        return self._server is not None
+
+    def stop(self, timeout: float = 5.0) -> None:
+        loop = self._loop
+        if loop is None or self._thread is None:
+            return
+        try:
+            loop.call_soon_threadsafe(loop.stop)
+        except RuntimeError:
+            pass
+        self._thread.join(timeout)
+        self._thread = None
+
+    def pending_commands(self) -> list[ControlCommand]:
+        result: list[ControlCommand] = []
+        while True:
+            try:
+                result.append(self.commands.get_nowait())
+            except queue.Empty:
+                return result
+
+    def publish_status(self, status: dict) -> None:
+        """Store and push a status snapshot; unchanged snapshots are not re-sent."""
+        loop = self._loop
+        if loop is None:
+            self._status = dict(status)
+            return
+        try:
+            loop.call_soon_threadsafe(self._broadcast, dict(status))
+        except RuntimeError:
+            pass
+
+    @property
+    def client_count(self) -> int:
+        return len(self._subscribers)
+
+    # ---- loop thread ----
+    def _run(self) -> None:
+        loop = asyncio.new_event_loop()
+        asyncio.set_event_loop(loop)
+        try:
+            self._server = loop.run_until_complete(asyncio.start_server(self._handle, self.host, self.port))
+            self.port = self._server.sockets[0].getsockname()[1]
+        except OSError as exc:
+            self.last_error = f"{type(exc).__name__}: {exc}"
+            self._server = None
+            self._ready.set()
+            loop.close()
+            return
+        self._loop = loop
+        self._ready.set()
+        try:
+            loop.run_forever()
+        finally:
+            self._server.close()
+            for subscriber in list(self._subscribers):
+                if subscriber.full():
+                    subscriber.get_nowait()
+                subscriber.put_nowait(None)  # ends the event stream
+            loop.run_until_complete(self._server.wait_closed())
+            pending = [task for task in asyncio.all_tasks(loop) if not task.done()]
+            for task in pending:
+                task.cancel()
+            loop.run_until_complete(asyncio.gather(*pending, return_exceptions=True))
+            self._loop = None
+            loop.close()
+
+    def _broadcast(self, status: dict) -> None:
+        if status == self._status:
+            return
+        self._status = status
+        for subscriber in self._subscribers:
+            if subscriber.full():
+                # Slow client: status is latest-wins, drop the oldest snapshot.
+                subscriber.get_nowait()
+            subscriber.put_nowait(status)
+
+    async def _handle(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter) -> None:
+        try:
+            method, path, headers, body = await self._read_request(reader)
+        except _RequestTooLarge:
+            try:
+                await self._respond(writer, 413, {"ok": False, "error": f"body over {MAX_BODY_BYTES} bytes"})
+            except ConnectionError:
+                pass
+            writer.close()
+            return
+        except (ValueError, asyncio.IncompleteReadError, asyncio.LimitOverrunError, ConnectionError):
+            writer.close()
+            return
+        try:
+            refusal = self._refusal(method, headers)
+            if refusal is not None:
+                await self._respond(writer, refusal[0], {"ok": False, "error": refusal[1]})
+            elif method == "GET" and path == "/events":
+                await self._stream_events(writer)
+                return
+            elif method == "GET" and path == "/status":
+                await self._respond(writer, 200, self._status)
+            elif path.lstrip("/") in CONTROL_ACTIONS:
+                if method != "POST":
+                    await self._respond(writer, 405, {"ok": False, "error": "use POST"})
+                else:
+                    await self._dispatch(writer, path.lstrip("/"), body)
+            else:
+                await self._respond(writer, 404, {"ok": False, "error": f"unknown path {path}"})
+        except ConnectionError:
+            pass
+        finally:
+            writer.close()
+
+    def _refusal(self, method: str, headers: dict[str, str]) -> tuple[int, str] | None:
+        """(status, reason) if the request must not reach the hub, else None."""
+        host = headers.get("host", "").lower()
+        if host not in {f"{name}:{self.port}" for name in _LOCAL_HOSTS} | set(_LOCAL_HOSTS):
+            return 403, "bad Host header"  # DNS rebinding
+        origin = headers.get("origin")
+        if origin is not None and origin not in self.allowed_origins:
+            return 403, "cross-origin requests are not allowed"
+        if not hmac.compare_digest(headers.get(TOKEN_HEADER, "").encode("utf-8"), self.token.encode("utf-8")):
+            return 401, "missing or wrong X-Hub-Token header"
+        if method == "POST":
+            content_type = headers.get("content-type", "").split(";", 1)[0].strip().lower()
+            if content_type != "application/json":
+                return 415, "Content-Type must be application/json"
+        return None
+
+    async def _dispatch(self, writer: asyncio.StreamWriter, action: str, body: bytes) -> None:
+        try:
+            payload = json.loads(body.decode("utf-8")) if body.strip() else {}
+        except ValueError:
+            payload = None
+        if not isinstance(payload, dict):
+            await self._respond(writer, 400, {"ok": False, "error": "body must be a JSON object"})
+            return
+        loop = asyncio.get_running_loop()
+        command = ControlCommand(action, payload, _loop=loop, _future=loop.create_future())
+        self.commands.put(command)
+        try:
+            result = await asyncio.wait_for(command._future, self.command_timeout)
+        except asyncio.TimeoutError:
+            await self._respond(writer, 504, {"ok": False, "error": "hub did not answer in time"})
+            return
+        await self._respond(writer, 200, result)
+
+    async def _stream_events(self, writer: asyncio.StreamWriter) -> None:
+        subscriber: asyncio.Queue = asyncio.Queue(maxsize=16)
+        self._subscribers.add(subscriber)
+        try:
+            writer.write(
+                b"HTTP/1.1 200 OK\r\nContent-Type: text/event-stream\r\n"
+                b"Cache-Control: no-cache\r\nConnection: close\r\n\r\n"
+            )
+            status = self._status
+            while status is not None:
+                writer.write(f"data: {json.dumps(status)}\n\n".encode("utf-8"))
+                await writer.drain()
+                status = await subscriber.get()
+        except ConnectionError:
+            pass
+        finally:
+            self._subscribers.discard(subscriber)
+            writer.close()
+
+    @staticmethod
+    async def _read_request(reader: asyncio.StreamReader) -> tuple[str, str, dict[str, str], bytes]:
+        request_line = (await reader.readline()).decode("latin-1").strip()
+        method, path, _version = request_line.split(" ", 2)
+        headers: dict[str, str] = {}
+        for _ in range(_MAX_HEADER_LINES):
+            line = (await reader.readline()).decode("latin-1").strip()
+            if not line:
+                break
+            name, _, value = line.partition(":")
+            headers[name.strip().lower()] = value.strip()
+        else:
+            raise ValueError("too many header lines")
+        length = int(headers.get("content-length", "0") or 0)
+        if length < 0:
+            raise ValueError("negative Content-Length")
+        if length > MAX_BODY_BYTES:
+            raise _RequestTooLarge(length)
+        body = await reader.readexactly(length) if length else b""
+        return method.upper(), path.split("?", 1)[0], headers, body
+
+    @staticmethod
+    async def _respond(writer: asyncio.StreamWriter, code: int, data: dict) -> None:
+        body = json.dumps(data).encode("utf-8")
+        writer.write(
+            f"HTTP/1.1 {code} {_REASONS.get(code, '')}\r\nContent-Type: application/json\r\n"
+            f"Content-Length: {len(body)}\r\nConnection: close\r\n\r\n".encode("latin-1")
+            + body
+        )
+        await writer.drain()
@@ -0,0 +1,169 @@
+from __future__ import annotations
+
+from pathlib import Path
+import itertools
+import json
+import os
+import threading
+import time
+
+# One id per hub process so the report can tell runs apart.
+RUN_ID = f"{time.strftime('%Y%m%d-%H%M%S')}-{os.getpid()}"
+
+
+class Span:
+    """
+    One timed lifecycle phase. Writes span_start when created and span_end
+    (with duration_ns from perf_counter_ns) on end(); end() is idempotent.
+    Usable as a context manager: an exception ends it with ok=False.
+    """
+
+    def __init__(self, recorder: "EventRecorder", phase: str, fields: dict) -> None:
+        self.recorder = recorder
+        self.phase = phase
+        self.id = next(recorder._span_ids)
+        self.start_ns = time.perf_counter_ns()
+        self.duration_ns: int | None = None
+        recorder.emit("span_start", phase=phase, span=self.id, **fields)
+
+    def end(self, ok: bool = True, **fields) -> int:
+        if self.duration_ns is None:
+            self.duration_ns = time.perf_counter_ns() - self.start_ns
+            self.recorder.emit(
+                "span_end", phase=self.phase, span=self.id, duration_ns=self.duration_ns, ok=ok, **fields
+            )
+        return self.duration_ns
+
+    def __enter__(self) -> "Span":
+        return self
+
+    def __exit__(self, exc_type, exc, tb) -> bool:
+        if exc is not None:
+            self.end(ok=False, error=f"{exc_type.__name__}: {exc}")
+        else:
+            self.end()
+        return False
+
+
+class EventRecorder:
+    """
+    Structured lifecycle events as JSON lines: {"ts", "run", "event", ...}.
+    The file rotates to <name>.1 ... <name>.<backups> past max_bytes.
+    With path=None every call is a cheap no-op (recording disabled).
+    Thread-safe; each event is one small buffered write plus flush.
+    """
+
+    def __init__(self, path: Path | None, *, max_bytes: int = 5 * 1024 * 1024, backups: int = 5) -> None:
+        self.path = Path(path) if path is not None else None
+        self.max_bytes = max_bytes
+        self.backups = backups
+        self.last_error: str | None = None
+        self._lock = threading.Lock()
+        self._span_ids = itertools.count(1)
+        self._file = None
+        self._size = 0
+
+    @property
+    def enabled(self) -> bool:
+        return self.path is not None
+
+    def emit(self, event: str, **fields) -> None:
+        if self.path is None:
+            return
+        record = {"ts": round(time.time(), 6), "run": RUN_ID, "event": event, **fields}
+        line = json.dumps(record, default=str) + "\n"
+        size = len(line.encode("utf-8"))
+        with self._lock:
+            try:
+                if self._file is None:
+                    self._open()
+                elif self._size + size > self.max_bytes:
+                    self._rotate()
+                self._file.write(line)
+                self._file.flush()
+                self._size += size
+            except OSError as exc:
+                self.last_error = f"{type(exc).__name__}: {exc}"
+
+    def span(self, phase: str, **fields) -> Span:
+        return Span(self, phase, fields)
+
+    def close(self) -> None:
+        with self._lock:
+            if self._file is not None:
+                self._file.close()
+                self._file = None
+
+    def files(self) -> list[Path]:
+        """Current and rotated event files, oldest first."""
+        if self.path is None:
+            return []
+        return event_files(self.path)
+
+    def _open(self) -> None:
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        self._file = open(self.path, "a", encoding="utf-8")
+        self._size = self._file.tell()
+
+    def _rotate(self) -> None:
+        self._file.close()
+        self._file = None
+        for index in range(self.backups - 1, 0, -1):
+            src = self.path.with_name(f"{self.path.name}.{index}")
+            if src.exists():
+                os.replace(src, self.path.with_name(f"{self.path.name}.{index + 1}"))
+        if self.backups > 0:
+            os.replace(self.path, self.path.with_name(f"{self.path.name}.1"))
+        else:
+            self.path.unlink()
+        self._open()
+
+
+def event_files(path: Path) -> list[Path]:
+    path = Path(path)
+    rotated = sorted(
+        (p for p in path.parent.glob(f"{path.name}.*") if p.suffix.lstrip(".").isdigit()),
+        key=lambda p: int(p.suffix.lstrip(".")),
+        reverse=True,
+    )
+    return [*rotated, *([path] if path.exists() else [])]
+
+
+def read_events(files: list[Path]):
+    """Yield event dicts from JSONL files, skipping torn or foreign lines."""
+    for file in files:
+        try:
+            with open(file, "r", encoding="utf-8") as f:
+                for line in f:
+                    try:
+                        record = json.loads(line)
+                    except ValueError:
+                        continue
+                    if isinstance(record, dict) and "event" in record:
+                        yield record
+        except OSError:
+            continue
+
+
+# Process-wide recorder used by services.canoe, the session controller and
+# the UI; disabled until the app calls configure_events().
+_recorder = EventRecorder(None)
+
+
+def configure_events(path: Path, **kwargs) -> EventRecorder:
+    global _recorder
+    _recorder.close()
+    _recorder = EventRecorder(path, **kwargs)
+    return _recorder
+
+
+def get_recorder() -> EventRecorder:
+    return _recorder
+
+
+def emit(event: str, **fields) -> None:
+    _recorder.emit(event, **fields)
+
+
+def span(phase: str, **fields) -> Span:
+    return _recorder.span(phase, **fields)
@@ -0,0 +1,325 @@
+from __future__ import annotations
+
+from collections import Counter
+from datetime import datetime
+from pathlib import Path
+import random
+import threading
+import time
+
+# HRESULTs pywin32 reports for the failures the hub has to survive.
+DISP_E_EXCEPTION = -2147352567     # member raised inside CANoe
+RPC_E_DISCONNECTED = -2147417848   # CANoe exited under us
+RPC_E_CALL_REJECTED = -2147418111  # CANoe busy (modal dialog, cfg load)
+
+# The status sysvars MainWindow polls, in their healthy state.
+DEFAULT_SYSVARS: dict[str, object] = {
+    "anSWer_SysVal::Camera_Mode": 4,
+    "anSWer_SysVal::Network_Status::Ethernet": 1,
+    "anSWer_SysVal::Network_Status::Flexray": 1,
+    "anSWer_SysVal::Network_Status::Ethernet_Drops": 0,
+    "anSWer_SysVal::Network_Status::Flexray_Drops": 0,
+}
+
+
+class FakeCOMError(Exception):
+    """Raised where pywin32 would raise pywintypes.com_error."""
+
+    def __init__(self, member: str, hresult: int = DISP_E_EXCEPTION, message: str = "Exception occurred.") -> None:
+        super().__init__(hresult, f"{message} ({member})")
+        self.hresult = hresult
+        self.member = member
+
+
+class _FakeObject:
+    """
+    Base for the fake dispatch objects. Capitalized attributes are COM
+    members: every read or write goes through FakeCANoe._call() under the
+    key "<Kind>.<Member>" (e.g. "LoggingBlock.FullName"), which counts it,
+    applies the configured latency and raises injected failures.
+    """
+
+    _kind = "Object"
+
+    def __init__(self, canoe: "FakeCANoe", **props) -> None:
+        object.__setattr__(self, "_canoe", canoe)
+        object.__setattr__(self, "_props", props)
+
+    def __getattr__(self, name: str):
+        props = object.__getattribute__(self, "_props")
+        if name not in props:
+            raise AttributeError(name)
+        self._canoe._call(f"{self._kind}.{name}")
+        return props[name]
+
+    def __setattr__(self, name: str, value) -> None:
+        if not name[:1].isupper():
+            object.__setattr__(self, name, value)
+            return
+        self._canoe._call(f"{self._kind}.{name}=")
+        self._props[name] = value
+
+
+class _FakeCollection(_FakeObject):
+    def __init__(self, canoe: "FakeCANoe", kind: str, items: list) -> None:
+        super().__init__(canoe)
+        object.__setattr__(self, "_kind", kind)
+        object.__setattr__(self, "_items", items)
+
+    @property
+    def Count(self) -> int:
+        self._canoe._call(f"{self._kind}.Count")
+        return len(self._items)
+
+    def Item(self, key):
+        """1-based index, or the item name (namespaces, variables)."""
+        member = f"{self._kind}.Item"
+        self._canoe._call(member)
+        if isinstance(key, int):
+            if 1 <= key <= len(self._items):
+                return self._items[key - 1]
+        else:
+            for item in self._items:
+                if item._props.get("Name") == key:
+                    return item
+        raise FakeCOMError(member, message=f"No item {key!r}")
+
+
+class _FakeMeasurement(_FakeObject):
+    _kind = "Measurement"
+
+    def __init__(self, canoe: "FakeCANoe") -> None:
+        super().__init__(canoe)
+        self._started_at: float | None = None  # perf_counter when Running turns true
+        self._timer: threading.Timer | None = None
+
+    @property
+    def Running(self) -> bool:
+        self._canoe._call("Measurement.Running")
+        return self._started_at is not None and time.perf_counter() >= self._started_at
+
+    def Start(self) -> None:
+        self._canoe._call("Measurement.Start")
+        if self._started_at is not None:
+            return
+        delay = self._canoe.start_delay
+        self._started_at = time.perf_counter() + delay
+        if delay > 0:
+            # CANoe starts asynchronously; the log files show up once it runs.
+            self._timer = threading.Timer(delay, self._canoe._write_log_files)
+            self._timer.daemon = True
+            self._timer.start()
+        else:
+            self._canoe._write_log_files()
+
+    def Stop(self) -> None:
+        self._canoe._call("Measurement.Stop")
+        if self._timer is not None:
+            self._timer.cancel()
+            self._timer = None
+        self._started_at = None
+
+    def GetTime(self) -> float:
+        self._canoe._call("Measurement.GetTime")
+        if self._started_at is None:
+            return 0.0
+        return max(0.0, time.perf_counter() - self._started_at)
+
+
+def _build_namespaces(canoe: "FakeCANoe", sysvars: dict[str, object]) -> _FakeCollection:
+    # {"NS::Sub::Var": value} -> nested Namespace/Variable fakes
+    tree: dict = {}
+    for name, value in sysvars.items():
+        *chain, var_name = _sysvar_path(name)
+        node = tree
+        for part in chain:
+            node = node.setdefault(part, {})
+        node[var_name] = ("var", value)
+
+    def build(node: dict) -> tuple[list, list]:
+        namespaces, variables = [], []
+        for key, child in node.items():
+            if isinstance(child, tuple):
+                variables.append(_make(canoe, "Variable", Name=key, Value=child[1]))
+            else:
+                sub_namespaces, sub_variables = build(child)
+                namespaces.append(
+                    _make(
+                        canoe,
+                        "Namespace",
+                        Name=key,
+                        Namespaces=_FakeCollection(canoe, "Namespaces", sub_namespaces),
+                        Variables=_FakeCollection(canoe, "Variables", sub_variables),
+                    )
+                )
+        return namespaces, variables
+
+    namespaces, _variables = build(tree)  # always empty: _sysvar_path() requires a namespace
+    return _FakeCollection(canoe, "Namespaces", namespaces)
+
+
+def _sysvar_path(name: str) -> list[str]:
+    # CANoe system variables always live in a namespace, as in "NS::Var".
+    parts = [part for part in name.split("::") if part]
+    if len(parts) < 2:
+        raise ValueError(f"system variable {name!r} needs a namespace (\"Namespace::Variable\")")
+    return parts
+
+
+def _make(canoe: "FakeCANoe", kind: str, **props) -> _FakeObject:
+    obj = _FakeObject(canoe, **props)
+    object.__setattr__(obj, "_kind", kind)
+    return obj
+
+
+class FakeCANoe(_FakeObject):
+    """
+    Pure-Python stand-in for the CANoe.Application object model parts the
+    hub uses: Version, Open, Configuration.OnlineSetup logging blocks and
+    video windows, System.Namespaces sysvars and Measurement.
+    Measurement.Start() creates empty log files where CANoe would, with
+    {MeasurementStart} expanded, after start_delay seconds.
+
+    Every member access is counted in call_counts and can be slowed down
+    (latency: seconds for all members, or {"Measurement.Start": 0.2,
+    "*": 0.001}) or made to fail: inject_failure() for the next n calls of
+    one member, failure_rate for random failures (seeded), disconnect() for
+    a CANoe that went away. cfg_file is the configuration open at startup
+    ("" for none).
+    """
+
+    _kind = "Application"
+
+    def __init__(
+        self,
+        *,
+        version: str = "17.0.0",
+        logging_extensions: tuple[str, ...] = ("blf",),
+        video_windows: tuple[str, ...] = (),
+        sysvars: dict[str, object] | None = None,
+        latency: float | dict[str, float] = 0.0,
+        failure_rate: float = 0.0,
+        start_delay: float = 0.0,
+        seed: int | None = None,
+        cfg_file: str = "Untitled.cfg",
+    ) -> None:
+        super().__init__(self)
+        if isinstance(latency, dict):
+            self._latency = dict(latency)
+            self._default_latency = float(self._latency.pop("*", 0.0))
+        else:
+            self._latency = {}
+            self._default_latency = float(latency)
+        self.failure_rate = failure_rate
+        self.start_delay = start_delay
+        self.call_counts: Counter[str] = Counter()
+        self.open_count = 0
+        self._lock = threading.Lock()
+        self._rng = random.Random(seed)
+        self._failures: dict[str, tuple[int, int]] = {}  # member -> (remaining, hresult)
+        self._disconnected = False
+
+        logging = _FakeCollection(
+            self,
+            "LoggingCollection",
+            [
+                _make(self, "LoggingBlock", FullName=f"C:\\Logs\\block{i}.{ext}")
+                for i, ext in enumerate(logging_extensions, start=1)
+            ],
+        )
+        video = _FakeCollection(
+            self, "VideoWindows", [_make(self, "VideoWindow", Name=name, RecordFile="") for name in video_windows]
+        )
+        self._props.update(
+            Version=version,
+            # CANoe normally has some configuration open; cfg_file="" models
+            # one started without any (FullName is then empty).
+            Configuration=_make(
+                self,
+                "Configuration",
+                FullName=cfg_file,
+                OnlineSetup=_make(self, "OnlineSetup", LoggingCollection=logging, VideoWindows=video),
+            ),
+            Measurement=_FakeMeasurement(self),
+            System=_make(
+                self,
+                "System",
+                Namespaces=_build_namespaces(self, DEFAULT_SYSVARS if sysvars is None else sysvars),
+            ),
+        )
+
+    def Open(self, cfg_file: str) -> None:
+        self._call("Application.Open")
+        self.open_count += 1
+        self._props["Configuration"]._props["FullName"] = str(cfg_file)
+
+    # -------------------- Test controls (not part of the COM model) --------------------
+    def inject_failure(self, member: str, count: int = 1, hresult: int = DISP_E_EXCEPTION) -> None:
+        """Make the next `count` calls of member (e.g. "Measurement.Start") raise FakeCOMError."""
+        with self._lock:
+            self._failures[member] = (count, hresult)
+
+    def disconnect(self) -> None:
+        """Simulate CANoe exiting: every later call raises RPC_E_DISCONNECTED."""
+        with self._lock:
+            self._disconnected = True
+
+    def set_sysvar(self, name: str, value) -> None:
+        """Change a sysvar's value behind the client's back; KeyError if it does not exist."""
+        *chain, var_name = _sysvar_path(name)
+        collection = self._props["System"]._props["Namespaces"]
+        namespace = None
+        for part in chain:
+            namespace = next((n for n in collection._items if n._props["Name"] == part), None)
+            if namespace is None:
+                raise KeyError(name)
+            collection = namespace._props["Namespaces"]
+        variables = namespace._props["Variables"]
+        variable = next((v for v in variables._items if v._props["Name"] == var_name), None)
+        if variable is None:
+            raise KeyError(name)
+        variable._props["Value"] = value
+
+    @property
+    def total_calls(self) -> int:
+        with self._lock:
+            return sum(self.call_counts.values())
+
+    def reset_counts(self) -> None:
+        with self._lock:
+            self.call_counts.clear()
+
+    def _call(self, member: str) -> None:
+        with self._lock:
+            self.call_counts[member] += 1
+            error: FakeCOMError | None = None
+            if self._disconnected:
+                error = FakeCOMError(
+                    member, RPC_E_DISCONNECTED, "The object invoked has disconnected from its clients."
+                )
+            elif member in self._failures:
+                remaining, hresult = self._failures[member]
+                if remaining <= 1:
+                    del self._failures[member]
+                else:
+                    self._failures[member] = (remaining - 1, hresult)
+                error = FakeCOMError(member, hresult, "Injected failure.")
+            elif self.failure_rate and self._rng.random() < self.failure_rate:
+                error = FakeCOMError(member, message="Random injected failure.")
+        delay = self._latency.get(member, self._default_latency)
+        if delay > 0:
+            time.sleep(delay)
+        if error is not None:
+            raise error
+
+    def _write_log_files(self) -> None:
+        stamp = datetime.now().strftime("%Y-%m-%d_%H-%M-%S")
+        online = self._props["Configuration"]._props["OnlineSetup"]._props
+        targets = [block._props["FullName"] for block in online["LoggingCollection"]._items]
+        targets += [window._props["RecordFile"] for window in online["VideoWindows"]._items]
+        for target in targets:
+            if not target or "{MeasurementStart}" not in target:
+                continue
+            path = Path(target.replace("{MeasurementStart}", stamp))
+            if path.parent.is_dir():
+                path.touch()
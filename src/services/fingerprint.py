@@ -0,0 +1,117 @@
+from __future__ import annotations
+
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass, field
+from pathlib import Path
+import hashlib
+import json
+import threading
+
+from core.fileio import atomic_write_json
+from services.cfg_index import CfgSummary, scan_cfg
+from services.registry import normalize_path_key
+
+
+class FingerprintStore:
+    """
+    Persistent per-file hash cache plus the fingerprint each cfg had when
+    the hub last loaded it into CANoe. File hashes are reused while
+    (size, mtime_ns) are unchanged.
+    """
+
+    def __init__(self, store_file: Path) -> None:
+        self.store_file = Path(store_file)
+        self._lock = threading.Lock()
+        self._files: dict[str, dict] = {}
+        self._loaded: dict[str, str] = {}
+        self._dirty = False
+        try:
+            raw = json.loads(self.store_file.read_text(encoding="utf-8"))
+        except Exception:
+            raw = {}
+        if isinstance(raw, dict):
+            self._files = dict(raw.get("files") or {})
+            self._loaded = dict(raw.get("loaded") or {})
+
+    def file_hash(self, path: Path) -> str | None:
+        """sha256 of path, or None if it does not exist."""
+        try:
+            st = path.stat()
+        except OSError:
+            return None
+        key = normalize_path_key(path)
+        with self._lock:
+            entry = self._files.get(key)
+        if entry and entry.get("size") == st.st_size and entry.get("mtime_ns") == st.st_mtime_ns:
+            return entry.get("sha256")
+        digest = hashlib.sha256()
+        try:
+            with open(path, "rb") as f:
+                for chunk in iter(lambda: f.read(1 << 20), b""):
+                    digest.update(chunk)
+        except OSError:
+            return None
+        sha = digest.hexdigest()
+        with self._lock:
+            self._files[key] = {"size": st.st_size, "mtime_ns": st.st_mtime_ns, "sha256": sha}
+            self._dirty = True
+        return sha
+
+    def loaded_fingerprint(self, cfg_file: str | Path) -> str | None:
+        return self._loaded.get(normalize_path_key(cfg_file))
+
+    def record_loaded(self, cfg_file: str | Path, fingerprint: str) -> None:
+        with self._lock:
+            if self._loaded.get(normalize_path_key(cfg_file)) != fingerprint:
+                self._loaded[normalize_path_key(cfg_file)] = fingerprint
+                self._dirty = True
+
+    def save(self) -> None:
+        with self._lock:
+            if not self._dirty:
+                return
+            data = {"files": dict(self._files), "loaded": dict(self._loaded)}
+            self._dirty = False
+        atomic_write_json(self.store_file, data)
+
+
+@dataclass
+class ConfigFingerprint:
+    cfg_file: str
+    root: str
+    files: dict[str, str | None] = field(default_factory=dict)  # path -> sha256 (None = missing)
+
+    @property
+    def missing(self) -> list[str]:
+        return [path for path, sha in self.files.items() if sha is None]
+
+
+def config_fingerprint(
+    cfg_file: str | Path,
+    store: FingerprintStore,
+    summary: CfgSummary | None = None,
+    *,
+    max_workers: int = 8,
+) -> ConfigFingerprint:
+    """
+    Merkle-style hash over the .cfg and every input file it references.
+    Leaves are sha256(path + content hash), hashed in parallel; the root is
+    the hash of the sorted leaves, so any changed, added or removed file
+    changes it.
+    """
+    cfg_path = Path(cfg_file)
+    if summary is None:
+        summary = scan_cfg(cfg_path)
+    files = [cfg_path, *summary.input_files()]
+
+    with ThreadPoolExecutor(max_workers=max_workers) as pool:
+        hashes = list(pool.map(store.file_hash, files))
+
+    leaves: list[str] = []
+    per_file: dict[str, str | None] = {}
+    for path, sha in zip(files, hashes):
+        key = normalize_path_key(path)
+        per_file[key] = sha
+        leaves.append(hashlib.sha256(f"{key}\0{sha or 'missing'}".encode("utf-8")).hexdigest())
+    root = hashlib.sha256("".join(sorted(leaves)).encode("ascii")).hexdigest()
+    return ConfigFingerprint(cfg_file=str(cfg_path), root=root, files=per_file)
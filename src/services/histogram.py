@@ -0,0 +1,43 @@
+from __future__ import annotations
+
+
+class Log2Histogram:
+    """
+    Counts of non-negative samples in power-of-two buckets: bucket i holds
+    samples of [2^(i-1), 2^i) units, bucket 0 those below one unit, the
+    last bucket everything above. `unit` is one unit in the scale of the
+    samples passed to add() (e.g. 1000 to bucket nanosecond samples by
+    microsecond); percentiles are reported in units, max_value in the
+    sample scale.
+    """
+
+    def __init__(self, buckets: int, unit: float = 1.0) -> None:
+        self.unit = unit
+        self.buckets = [0] * buckets
+        self.count = 0
+        self.max_value = 0.0
+
+    def add(self, value: float) -> None:
+        value = max(0.0, value)
+        self.count += 1
+        self.max_value = max(self.max_value, value)
+        self.buckets[min(len(self.buckets) - 1, int(value // self.unit).bit_length())] += 1
+
+    def percentile(self, pct: float) -> float:
+        """Upper bound (in units) of the bucket holding the pct-th sample."""
+        if not self.count:
+            return 0.0
+        target = max(1, int(round(pct / 100.0 * self.count)))
+        seen = 0
+        for index, n in enumerate(self.buckets):
+            seen += n
+            if seen >= target:
+                return float(1 << index)
+        return self.max_value / self.unit
+
+    def copy(self) -> "Log2Histogram":
+        clone = Log2Histogram(len(self.buckets), self.unit)
+        clone.buckets = list(self.buckets)
+        clone.count = self.count
+        clone.max_value = self.max_value
+        return clone
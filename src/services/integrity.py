@@ -0,0 +1,439 @@
+from __future__ import annotations
+
+from concurrent.futures import Future, ProcessPoolExecutor, as_completed
+from dataclasses import asdict, dataclass, field
+from datetime import datetime
+from pathlib import Path
+import mmap
+import os
+import struct
+import sys
+import time
+import zlib
+
+from core.fileio import atomic_write_json
+from services.blf import (
+    FILE_HEADER_SIZE,
+    LOG_CONTAINER,
+    LOG_CONTAINER_HEADER,
+    NO_COMPRESSION,
+    OBJ_HEADER_BASE,
+    ZLIB_DEFLATE,
+    BlfError,
+    count_objects,
+    parse_header,
+)
+
+_RIFF_HEADER = struct.Struct("<4sL4s")  # "RIFF", size, form type
+_CHUNK_HEADER = struct.Struct("<4sL")   # chunk id, size
+
+
+@dataclass
+class FileIntegrity:
+    path: str
+    kind: str                   # "blf", "avi", "txt" or "other"
+    size: int
+    problems: list[str] = field(default_factory=list)
+    details: dict = field(default_factory=dict)
+
+    @property
+    def ok(self) -> bool:
+        return not self.problems
+
+
+@dataclass
+class SessionIntegrity:
+    label: str
+    checked_at: str
+    elapsed_s: float
+    files: list[FileIntegrity] = field(default_factory=list)
+
+    @property
+    def ok(self) -> bool:
+        return all(f.ok for f in self.files)
+
+    @property
+    def problems(self) -> list[str]:
+        return [f"{Path(f.path).name}: {problem}" for f in self.files for problem in f.problems]
+
+    @property
+    def total_bytes(self) -> int:
+        return sum(f.size for f in self.files)
+
+    def to_dict(self) -> dict:
+        data = asdict(self)
+        data["ok"] = self.ok
+        return data
+
+    def write(self, path: Path) -> None:
+        atomic_write_json(Path(path), self.to_dict())
+
+
+def record_path(files: list[Path]) -> Path | None:
+    """Where verify results go: "<stem>.integrity.json" next to the session's BLF (or first file)."""
+    if not files:
+        return None
+    main = next((f for f in files if f.suffix.lower() == ".blf"), files[0])
+    return main.with_name(f"{main.stem}.integrity.json")
+
+
+def _lower_priority() -> None:
+    # Worker initializer: verification must not take CPU from a recording.
+    try:
+        if sys.platform == "win32":
+            import ctypes
+
+            BELOW_NORMAL_PRIORITY_CLASS = 0x4000
+            kernel32 = ctypes.windll.kernel32
+            kernel32.SetPriorityClass(kernel32.GetCurrentProcess(), BELOW_NORMAL_PRIORITY_CLASS)
+        else:
+            os.nice(10)
+    except Exception:
+        pass
+
+
+# -------------------- BLF --------------------
+@dataclass
+class _BlfPlan:
+    """Top-level walk of one BLF: header facts, problems and container ranges for the workers."""
+
+    path: str
+    size: int
+    header: dict = field(default_factory=dict)
+    problems: list[str] = field(default_factory=list)
+    top_level_objects: int = 0
+    containers: int = 0
+    ranges: list[tuple[int, int]] = field(default_factory=list)
+
+
+@dataclass
+class _RangeResult:
+    start: int
+    containers: int = 0
+    uncompressed: int = 0
+    objects: int = 0             # inner objects complete within the range
+    lead: int = 0                # bytes skipped before the first inner object boundary
+    tail: int = 0                # bytes of an inner object left open at the end of the range
+    tail_missing: int | None = None  # bytes that object still needs (None: header incomplete)
+    problems: list[str] = field(default_factory=list)
+
+
+def _plan_blf(path: str, split_bytes: int) -> _BlfPlan:
+    size = os.path.getsize(path)
+    plan = _BlfPlan(path=path, size=size)
+    if size == 0:
+        plan.problems.append("empty file")
+        return plan
+    with open(path, "rb") as f, mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mm:
+        try:
+            header = parse_header(mm[:FILE_HEADER_SIZE])
+        except BlfError as exc:
+            plan.problems.append(str(exc))
+            return plan
+        plan.header = {
+            "file_size": header.file_size,
+            "object_count": header.object_count,
+            "start": header.start.isoformat() if header.start else None,
+            "stop": header.stop.isoformat() if header.stop else None,
+        }
+        if not header.finalized:
+            plan.problems.append("header not finalized (recording did not stop cleanly)")
+        elif header.file_size != size:
+            plan.problems.append(f"header says {header.file_size} bytes, file has {size}")
+
+        offset = FILE_HEADER_SIZE
+        range_start = offset
+        unpack = OBJ_HEADER_BASE.unpack_from
+        while offset + OBJ_HEADER_BASE.size <= size:
+            signature, header_size, _version, obj_size, obj_type = unpack(mm, offset)
+            if signature != b"LOBJ" or obj_size < header_size:
+                plan.problems.append(f"bad object header at offset {offset}")
+                break
+            end = offset + obj_size + obj_size % 4
+            if end > size:
+                plan.problems.append(f"file ends inside an object at offset {offset} ({end - size} bytes missing)")
+                break
+            if obj_type == LOG_CONTAINER:
+                plan.containers += 1
+            else:
+                plan.top_level_objects += 1
+            offset = end
+            if offset - range_start >= split_bytes:
+                plan.ranges.append((range_start, offset))
+                range_start = offset
+        else:
+            if offset < size:
+                plan.problems.append(f"{size - offset} trailing byte(s) after the last object")
+        if offset > range_start:
+            plan.ranges.append((range_start, offset))
+    return plan
+
+
+def _check_blf_range(path: str, start: int, end: int) -> _RangeResult:
+    """Inflate every container in [start, end) and count the objects inside."""
+    result = _RangeResult(start=start)
+    syncing = start > FILE_HEADER_SIZE  # inner objects may straddle into this range
+    leading = syncing                   # still looking for the range's first object boundary
+    tail = b""
+    with open(path, "rb") as f, mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mm:
+        offset = start
+        while offset < end:
+            _sig, header_size, _version, obj_size, obj_type = OBJ_HEADER_BASE.unpack_from(mm, offset)
+            next_offset = offset + obj_size + obj_size % 4
+            if obj_type != LOG_CONTAINER:
+                offset = next_offset
+                continue
+            result.containers += 1
+            payload = mm[offset + header_size:offset + obj_size]
+            try:
+                method, expected = LOG_CONTAINER_HEADER.unpack_from(payload)
+                if method == ZLIB_DEFLATE:
+                    data = zlib.decompress(memoryview(payload)[LOG_CONTAINER_HEADER.size:])
+                elif method == NO_COMPRESSION:
+                    data = payload[LOG_CONTAINER_HEADER.size:]
+                else:
+                    raise BlfError(f"unknown compression {method}")
+            except (zlib.error, BlfError, struct.error) as exc:
+                result.problems.append(f"container at offset {offset} does not inflate: {exc}")
+                tail = b""
+                syncing = True
+                leading = False
+                offset = next_offset
+                continue
+            if len(data) != expected:
+                result.problems.append(f"container at offset {offset} holds {len(data)} bytes, header says {expected}")
+            result.uncompressed += len(data)
+
+            inner = tail + data
+            position = 0
+            if syncing:
+                position = _first_object(inner)
+                if position is None:
+                    if leading:
+                        result.lead += len(data)
+                    tail = b""
+                    offset = next_offset
+                    continue
+                if leading:
+                    result.lead += position
+                syncing = leading = False
+            try:
+                count, position = count_objects(inner, position)
+            except BlfError as exc:
+                result.problems.append(f"container at offset {offset}: {exc}")
+                tail = b""
+                syncing = True
+                offset = next_offset
+                continue
+            result.objects += count
+            tail = inner[position:]
+            offset = next_offset
+
+    result.tail = len(tail)
+    if len(tail) >= OBJ_HEADER_BASE.size:
+        obj_size = OBJ_HEADER_BASE.unpack_from(tail)[3]
+        result.tail_missing = obj_size + obj_size % 4 - len(tail)
+    return result
+
+
+def _first_object(inner: bytes) -> int | None:
+    # First "LOBJ" that starts a plausible chain (the next object, if it
+    # fits in the data, starts with "LOBJ" too); payload bytes can contain
+    # the signature by chance.
+    position = inner.find(b"LOBJ")
+    while position >= 0:
+        if position + OBJ_HEADER_BASE.size <= len(inner):
+            _sig, header_size, _version, obj_size, _type = OBJ_HEADER_BASE.unpack_from(inner, position)
+            following = position + obj_size + obj_size % 4
+            if obj_size >= header_size >= OBJ_HEADER_BASE.size and (
+                following + 4 > len(inner) or inner[following:following + 4] == b"LOBJ"
+            ):
+                return position
+        position = inner.find(b"LOBJ", position + 1)
+    return None
+
+
+def _merge_blf(plan: _BlfPlan, results: list[_RangeResult]) -> FileIntegrity:
+    record = FileIntegrity(path=plan.path, kind="blf", size=plan.size, problems=list(plan.problems))
+    results = sorted(results, key=lambda r: r.start)
+    objects = plan.top_level_objects
+    uncompressed = 0
+    previous: _RangeResult | None = None
+    for result in results:
+        record.problems.extend(result.problems)
+        objects += result.objects
+        uncompressed += result.uncompressed
+        if previous is None:
+            if result.lead:
+                record.problems.append(f"{result.lead} stray byte(s) before the first object")
+        elif previous.tail:
+            objects += 1  # the object straddling the two ranges
+            if previous.tail_missing is not None and previous.tail_missing != result.lead:
+                record.problems.append(f"object chain broken near offset {result.start}")
+        elif result.lead:
+            record.problems.append(f"object chain broken near offset {result.start}")
+        previous = result
+    if previous is not None and previous.tail:
+        record.problems.append(f"last container ends inside an object ({previous.tail} bytes)")
+
+    expected = plan.header.get("object_count")
+    if expected is not None and plan.header.get("file_size") and expected != objects:
+        record.problems.append(f"header counts {expected} objects, containers hold {objects}")
+    record.details = {
+        **plan.header,
+        "containers": plan.containers,
+        "objects": objects,
+        "uncompressed_bytes": uncompressed,
+        "ranges": len(results),
+    }
+    return record
+
+
+# -------------------- AVI and other files --------------------
+def _check_avi(path: str) -> FileIntegrity:
+    size = os.path.getsize(path)
+    record = FileIntegrity(path=path, kind="avi", size=size)
+    if size == 0:
+        record.problems.append("empty file")
+        return record
+    lists: list[str] = []
+    riffs = 0
+    movi_bytes = 0
+    with open(path, "rb") as f:
+        offset = 0
+        # OpenDML files (> 1 GB) continue in further "RIFF....AVIX" chunks.
+        while offset + _RIFF_HEADER.size <= size:
+            f.seek(offset)
+            chunk_id, riff_size, form = _RIFF_HEADER.unpack(f.read(_RIFF_HEADER.size))
+            expected_form = b"AVI " if riffs == 0 else b"AVIX"
+            if chunk_id != b"RIFF" or form != expected_form:
+                record.problems.append(f"no RIFF {expected_form.decode().strip()} chunk at offset {offset}")
+                break
+            riffs += 1
+            riff_end = offset + 8 + riff_size
+            if riff_end > size:
+                record.problems.append(f"RIFF chunk at offset {offset} truncated ({riff_end - size} bytes missing)")
+                riff_end = size
+            position = offset + _RIFF_HEADER.size
+            while position + _CHUNK_HEADER.size <= riff_end:
+                f.seek(position)
+                sub_id, sub_size = _CHUNK_HEADER.unpack(f.read(_CHUNK_HEADER.size))
+                if not all(32 <= b < 127 for b in sub_id):
+                    record.problems.append(f"garbage chunk id at offset {position}")
+                    break
+                if sub_id == b"LIST" and sub_size >= 4:
+                    list_type = f.read(4).decode("ascii", "replace")
+                    lists.append(list_type)
+                    if list_type == "movi":
+                        movi_bytes += sub_size - 4
+                sub_end = position + 8 + sub_size + (sub_size & 1)
+                if sub_end > riff_end:
+                    if riff_end == size:
+                        record.problems.append(f"chunk {sub_id.decode('ascii', 'replace')} at offset {position} truncated")
+                    break
+                position = sub_end
+            offset = offset + 8 + riff_size + (riff_size & 1)
+        else:
+            if offset < size and riffs:
+                record.problems.append(f"{size - offset} trailing byte(s) after the RIFF data")
+    if riffs:
+        if "hdrl" not in lists:
+            record.problems.append("no hdrl header list")
+        if "movi" not in lists:
+            record.problems.append("no movi list (no video data)")
+        elif not movi_bytes:
+            record.problems.append("movi list is empty")
+    record.details = {"riff_chunks": riffs, "lists": lists, "movi_bytes": movi_bytes}
+    return record
+
+
+def _check_plain(path: str) -> FileIntegrity:
+    size = os.path.getsize(path)
+    kind = "txt" if path.lower().endswith(".txt") else "other"
+    record = FileIntegrity(path=path, kind=kind, size=size)
+    if size == 0:
+        record.problems.append("empty file")
+    return record
+
+
+# -------------------- Verifier --------------------
+class IntegrityVerifier:
+    """
+    Post-stop check of a session's files in a process pool.
+
+    BLFs are first walked at the top level (object headers only, through
+    mmap) to find truncation and to cut the file into ranges of about
+    split_bytes; the ranges are then inflated and their objects counted in
+    parallel, and the results stitched together (objects straddling two
+    ranges are matched by their missing byte count). AVIs get a RIFF chunk
+    walk, every file a zero-length check. Workers run at lowered priority
+    so a new recording keeps the CPU.
+    """
+
+    def __init__(self, *, workers: int | None = None, split_bytes: int = 64 * 1024 * 1024) -> None:
+        self.workers = workers or max(1, (os.cpu_count() or 2) - 1)
+        self.split_bytes = split_bytes
+
+    def verify(self, files: list[Path], label: str = "") -> SessionIntegrity:
+        started = time.perf_counter()
+        paths = [str(p) for p in files]
+        records: dict[str, FileIntegrity] = {}
+        plans: dict[str, _BlfPlan] = {}
+        range_results: dict[str, list[_RangeResult]] = {}
+        waiting: dict[str, int] = {}
+        with ProcessPoolExecutor(max_workers=max(1, min(self.workers, len(paths) or 1)), initializer=_lower_priority) as pool:
+            futures: dict[Future, tuple[str, str, int]] = {}
+            for path in paths:
+                suffix = Path(path).suffix.lower()
+                if suffix == ".blf":
+                    futures[pool.submit(_plan_blf, path, self.split_bytes)] = ("plan", path, 0)
+                elif suffix == ".avi":
+                    futures[pool.submit(_check_avi, path)] = ("file", path, 0)
+                else:
+                    futures[pool.submit(_check_plain, path)] = ("file", path, 0)
+            pending = set(futures)
+            while pending:
+                done = next(as_completed(pending))
+                pending.discard(done)
+                kind, path, start = futures.pop(done)
+                try:
+                    result = done.result()
+                except Exception as exc:
+                    problem = f"could not be checked: {exc!r}"
+                    if kind == "range":
+                        result = _RangeResult(start=start, problems=[f"range at offset {start} {problem}"])
+                    elif kind == "plan":
+                        result = _BlfPlan(path=path, size=_size_or_zero(path), problems=[problem])
+                    else:
+                        kind_name = "avi" if path.lower().endswith(".avi") else "other"
+                        result = FileIntegrity(path=path, kind=kind_name, size=_size_or_zero(path), problems=[problem])
+                if kind == "file":
+                    records[path] = result
+                elif kind == "plan":
+                    plans[path] = result
+                    range_results[path] = []
+                    waiting[path] = len(result.ranges)
+                    for start, end in result.ranges:
+                        future = pool.submit(_check_blf_range, path, start, end)
+                        futures[future] = ("range", path, start)
+                        pending.add(future)
+                else:
+                    range_results[path].append(result)
+                    waiting[path] -= 1
+                if kind != "file" and waiting.get(path) == 0:
+                    records[path] = _merge_blf(plans[path], range_results[path])
+                    del waiting[path]
+
+        return SessionIntegrity(
+            label=label,
+            checked_at=datetime.now().isoformat(timespec="seconds"),
+            elapsed_s=round(time.perf_counter() - started, 3),
+            files=[records[p] for p in paths if p in records],
+        )
+
+
+def _size_or_zero(path: str) -> int:
+    try:
+        return os.path.getsize(path)
+    except OSError:
+        return 0
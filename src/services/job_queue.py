@@ -0,0 +1,177 @@
+from __future__ import annotations
+
+from collections import deque
+from dataclasses import asdict
+from pathlib import Path
+import json
+import threading
+import time
+
+from core.fileio import atomic_write_json
+
+
+class QueueWorker:
+    """
+    One background thread working through a persistent job queue; the
+    shared half of SessionMover and ArchivePipeline.
+
+    Jobs are dataclasses of job_type with label, not_before (epoch),
+    attempts and last_error fields and a from_dict() classmethod. The queue
+    is kept in queue_file as {"jobs": [...]}, so pending jobs survive a
+    restart. The worker takes the oldest due job and hands it to
+    _process(); a job raising one of `errors` stays queued and is retried
+    after retry_delay, a finished one is dropped.
+
+    pause() holds the worker (subclasses also wait on _resume between
+    chunks); stop() ends it after the current chunk. The worker never
+    touches the UI: progress and errors are collected in a message queue
+    the UI drains with drain_messages(). Subclasses set `stats` (with
+    jobs_done and failures counters) and implement _process().
+    """
+
+    job_type: type = object
+    errors: tuple[type[BaseException], ...] = (OSError,)
+    action = "Job"  # failure messages read "<action> of <label> failed"
+    thread_name = "queue-worker"
+
+    def __init__(self, queue_file: Path | None = None, *, retry_delay: float = 30.0) -> None:
+        self.queue_file = Path(queue_file) if queue_file is not None else None
+        self.retry_delay = retry_delay
+        self.current: str = ""  # label of the job being processed
+        self._jobs: list = self._load()
+        self._lock = threading.Lock()
+        self._wake = threading.Event()
+        self._resume = threading.Event()
+        self._resume.set()
+        self._stopping = False
+        self._messages: deque[tuple[str, str]] = deque()
+        self._thread: threading.Thread | None = None
+
+    # ---- queue ----
+    def _load(self) -> list:
+        if self.queue_file is None or not self.queue_file.exists():
+            return []
+        try:
+            raw = json.loads(self.queue_file.read_text(encoding="utf-8"))
+            return [self.job_type.from_dict(item) for item in raw.get("jobs", [])]
+        except Exception:
+            return []
+
+    def _save(self) -> None:
+        if self.queue_file is None:
+            return
+        with self._lock:
+            data = {"jobs": [asdict(job) for job in self._jobs]}
+        atomic_write_json(self.queue_file, data)
+
+    def enqueue(self, job) -> None:
+        with self._lock:
+            self._jobs.append(job)
+        self._save()
+        self._wake.set()
+
+    def pending(self) -> list:
+        with self._lock:
+            return list(self._jobs)
+
+    def _drop(self, job) -> None:
+        with self._lock:
+            self._jobs = [j for j in self._jobs if j is not job]
+        self._save()
+
+    # ---- worker ----
+    def start(self) -> None:
+        if self._thread is not None:
+            return
+        self._stopping = False
+        self._thread = threading.Thread(target=self._run, name=self.thread_name, daemon=True)
+        self._thread.start()
+
+    def stop(self, timeout: float = 5.0) -> None:
+        """Stop after the current chunk; the job stays queued for next time."""
+        self._stopping = True
+        self._wake.set()
+        self._resume.set()
+        if self._thread is not None:
+            self._thread.join(timeout)
+            self._thread = None
+
+    def pause(self) -> None:
+        self._resume.clear()
+
+    def resume(self) -> None:
+        self._resume.set()
+
+    @property
+    def paused(self) -> bool:
+        return not self._resume.is_set()
+
+    def drain_messages(self) -> list[tuple[str, str]]:
+        """(tone, text) messages produced by the worker since the last call."""
+        out = []
+        while self._messages:
+            out.append(self._messages.popleft())
+        return out
+
+    def _run(self) -> None:
+        while not self._stopping:
+            self._resume.wait()
+            if self._stopping:
+                return
+            self._between_jobs()
+            if not self.run_once():
+                self._wake.wait(self._idle_wait())
+                self._wake.clear()
+
+    def _between_jobs(self) -> None:
+        """Worker-thread housekeeping before each job (e.g. a requested scan)."""
+
+    def _idle_wait(self) -> float | None:
+        with self._lock:
+            if not self._jobs:
+                return None  # until enqueue() wakes the worker
+            due = min(job.not_before for job in self._jobs)
+        return min(self.retry_delay, max(0.5, due - time.time()))
+
+    def run_once(self) -> bool:
+        """
+        Try the oldest due job once; True when it completed. A failed job is
+        retried after retry_delay. Callable synchronously (tests, tools).
+        """
+        now = time.time()
+        with self._lock:
+            job = next((j for j in self._jobs if j.not_before <= now), None)
+        if job is None:
+            return False
+        skipped = self._skip_reason(job)
+        if skipped:
+            self._drop(job)
+            self._messages.append(("warning", skipped))
+            return False
+        self.current = job.label
+        try:
+            done = self._process(job)
+        except self.errors as exc:
+            job.attempts += 1
+            job.last_error = str(exc)
+            job.not_before = time.time() + self.retry_delay
+            self.stats.failures += 1
+            self._save()
+            self._messages.append(("warning", f"{self.action} of {job.label} failed (attempt {job.attempts}): {exc}"))
+            return False
+        finally:
+            self.current = ""
+        if self._stopping:
+            return False
+        self._drop(job)
+        self.stats.jobs_done += 1
+        self._messages.append(("success", done))
+        return True
+
+    def _skip_reason(self, job) -> str | None:
+        """Why a due job should be dropped unprocessed, or None to process it."""
+        return None
+
+    def _process(self, job) -> str:
+        """Do the job (raising one of `errors` to retry it); returns the success message."""
+        raise NotImplementedError
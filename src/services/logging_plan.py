@@ -0,0 +1,117 @@
+from __future__ import annotations
+
+from dataclasses import dataclass, field
+from pathlib import Path
+
+
+@dataclass(frozen=True)
+class PathAssignment:
+    kind: str    # "logging" or "video"
+    index: int   # 1-based index in LoggingCollection / VideoWindows
+    path: str
+
+
+@dataclass
+class LoggingPlan:
+    """
+    What Start has to rewrite in the loaded configuration, read once per cfg:
+    the logging block indices with their file extensions and the video
+    window names. The COM item handles are kept so apply() only performs
+    the path assignments; is_current() checks they still fit what CANoe
+    has loaded.
+    """
+    cfg_file: str
+    block_extensions: list[tuple[int, str]] = field(default_factory=list)
+    video_windows: list[tuple[int, str]] = field(default_factory=list)
+    _block_items: dict[int, object] = field(default_factory=dict, repr=False)
+    _video_items: dict[int, object] = field(default_factory=dict, repr=False)
+    _loaded_name: str = field(default="", repr=False)         # Configuration.FullName at compile time
+    _logging_collection: object = field(default=None, repr=False)
+    _video_collection: object = field(default=None, repr=False)
+
+    def is_current(self, canoe) -> bool:
+        """
+        True if CANoe still has the cfg this plan was compiled from with the
+        same number of logging blocks and video windows (three COM reads).
+        A cfg swapped or extended inside CANoe needs a new plan.
+        """
+        if self._logging_collection is None or self._video_collection is None:
+            return False  # offline plan, no handles
+        try:
+            return (
+                str(canoe.Configuration.FullName) == self._loaded_name
+                and self._logging_collection.Count == len(self.block_extensions)
+                and self._video_collection.Count == len(self.video_windows)
+            )
+        except Exception:
+            return False
+
+    def assignments(self, log_folder: Path, log_name: str) -> list[PathAssignment]:
+        result: list[PathAssignment] = []
+        for index, extension in self.block_extensions:
+            result.append(
+                PathAssignment("logging", index, str((log_folder / f"{log_name}.{extension}").resolve()))
+            )
+        for index, name in self.video_windows:
+            result.append(
+                PathAssignment("video", index, str((log_folder / f"_{log_name}_{name}.avi").resolve()))
+            )
+        return result
+
+    def apply(self, log_folder: Path, log_name: str, *, dry_run: bool = False) -> list[PathAssignment]:
+        """
+        Point every logging block and video window at log_folder/log_name.
+        With dry_run=True nothing is written; the planned assignments are
+        returned either way.
+        """
+        planned = self.assignments(log_folder, log_name)
+        if dry_run:
+            return planned
+        for assignment in planned:
+            if assignment.kind == "logging":
+                self._block_items[assignment.index].FullName = assignment.path
+            else:
+                self._video_items[assignment.index].RecordFile = assignment.path
+        return planned
+
+
+def plan_from_cfg_summary(summary) -> LoggingPlan:
+    """
+    Offline LoggingPlan from a services.cfg_index.CfgSummary. It has no COM
+    handles, so it is only good for apply(..., dry_run=True).
+    """
+    return LoggingPlan(
+        cfg_file=summary.cfg_file,
+        block_extensions=list(enumerate(summary.logging_extensions(), start=1)),
+        video_windows=list(enumerate(summary.video_window_names(), start=1)),
+    )
+
+
+def compile_logging_plan(canoe, cfg_file: str = "") -> LoggingPlan:
+    """
+    Walk LoggingCollection and VideoWindows once and build a LoggingPlan.
+    cfg_file defaults to the configuration CANoe reports as loaded.
+    """
+    online_setup = canoe.Configuration.OnlineSetup
+    try:
+        loaded_name = str(canoe.Configuration.FullName)
+    except Exception:
+        loaded_name = ""
+    plan = LoggingPlan(cfg_file=cfg_file or loaded_name, _loaded_name=loaded_name)
+
+    logging_collection = online_setup.LoggingCollection
+    plan._logging_collection = logging_collection
+    for i in range(1, logging_collection.Count + 1):
+        log_block = logging_collection.Item(i)
+        extension = str(log_block.FullName).split(".")[-1]
+        plan.block_extensions.append((i, extension))
+        plan._block_items[i] = log_block
+
+    video_config = online_setup.VideoWindows
+    plan._video_collection = video_config
+    for i in range(1, video_config.Count + 1):
+        window = video_config.Item(i)
+        plan.video_windows.append((i, str(window.Name)))
+        plan._video_items[i] = window
+
+    return plan
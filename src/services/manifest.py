@@ -0,0 +1,266 @@
+from __future__ import annotations
+
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass, field
+from datetime import datetime
+from pathlib import Path
+import hashlib
+import json
+import os
+import re
+import threading
+import time
+
+from core.fileio import atomic_write_json
+
+MANIFEST_NAME = "manifest.json"
+MANIFEST_VERSION = 1
+
+# Files in a session folder that are transient or describe the folder itself.
+_SKIPPED_SUFFIXES = {".part", ".tmp"}
+_COMMENT_LINE = re.compile(r"^\[\d{2}:\d{2}:\d{2}\.\d{3}\] ")
+
+
+def hash_file(path: Path, chunk_size: int = 8 * 1024 * 1024) -> str:
+    """SHA-256 of a file, read in large chunks into one reused buffer."""
+    hasher = hashlib.sha256()
+    buffer = bytearray(chunk_size)
+    view = memoryview(buffer)
+    with open(path, "rb", buffering=0) as f:
+        while True:
+            n = f.readinto(buffer)
+            if not n:
+                break
+            hasher.update(view[:n])  # hashlib releases the GIL for large updates
+    return hasher.hexdigest()
+
+
+class HashCache:
+    """
+    SHA-256 digests keyed by file identity (device, inode, size, mtime_ns),
+    persisted as JSON. A file that was renamed but not rewritten keeps its
+    identity; any write changes mtime or size and misses the cache.
+    """
+
+    def __init__(self, path: Path | None = None, *, max_entries: int = 20000) -> None:
+        self.path = Path(path) if path is not None else None
+        self.max_entries = max_entries
+        self.hits = 0
+        self.misses = 0
+        self._lock = threading.Lock()
+        self._entries: dict[str, dict] = {}
+        self._dirty = False
+        if self.path is not None and self.path.exists():
+            try:
+                self._entries = json.loads(self.path.read_text(encoding="utf-8")).get("entries", {})
+            except Exception:
+                self._entries = {}
+
+    @staticmethod
+    def key(stat: os.stat_result) -> str:
+        return f"{stat.st_dev}:{stat.st_ino}:{stat.st_size}:{stat.st_mtime_ns}"
+
+    def get(self, stat: os.stat_result) -> str | None:
+        with self._lock:
+            entry = self._entries.get(self.key(stat))
+            if entry is None:
+                self.misses += 1
+                return None
+            self.hits += 1
+            entry["used"] = time.time()
+            self._dirty = True
+            return entry["sha256"]
+
+    def put(self, stat: os.stat_result, digest: str) -> None:
+        with self._lock:
+            self._entries[self.key(stat)] = {"sha256": digest, "used": time.time()}
+            self._dirty = True
+
+    def save(self) -> None:
+        if self.path is None:
+            return
+        with self._lock:
+            if not self._dirty:
+                return
+            if len(self._entries) > self.max_entries:
+                newest = sorted(self._entries.items(), key=lambda item: item[1].get("used", 0.0), reverse=True)
+                self._entries = dict(newest[: self.max_entries])
+            data = {"entries": dict(self._entries)}
+            self._dirty = False
+        atomic_write_json(self.path, data)
+
+
+@dataclass
+class ManifestEntry:
+    name: str        # relative to the session folder, "/" separated
+    size: int
+    mtime: float
+    sha256: str
+
+    def to_dict(self) -> dict:
+        return {"name": self.name, "size": self.size, "mtime": self.mtime, "sha256": self.sha256}
+
+
+@dataclass
+class Manifest:
+    folder: Path
+    files: list[ManifestEntry] = field(default_factory=list)
+    tree_sha256: str = ""
+    sessions: dict[str, dict] = field(default_factory=dict)  # comment file -> metadata header
+    created_at: str = ""
+    elapsed_s: float = 0.0
+    hashed_bytes: int = 0     # bytes actually read (cache misses)
+    cached_files: int = 0
+
+    @property
+    def total_bytes(self) -> int:
+        return sum(entry.size for entry in self.files)
+
+    def to_dict(self) -> dict:
+        return {
+            "version": MANIFEST_VERSION,
+            "complete": True,
+            "created_at": self.created_at,
+            "folder": self.folder.name,
+            "file_count": len(self.files),
+            "total_bytes": self.total_bytes,
+            "tree_sha256": self.tree_sha256,
+            "files": [entry.to_dict() for entry in self.files],
+            "sessions": self.sessions,
+        }
+
+    def write(self) -> Path:
+        target = self.folder / MANIFEST_NAME
+        atomic_write_json(target, self.to_dict())
+        return target
+
+
+def tree_hash(entries: list[ManifestEntry]) -> str:
+    """One digest for the folder: SHA-256 over "<sha256> <size> <name>" lines sorted by name."""
+    hasher = hashlib.sha256()
+    for entry in sorted(entries, key=lambda e: e.name):
+        hasher.update(f"{entry.sha256} {entry.size} {entry.name}\n".encode("utf-8"))
+    return hasher.hexdigest()
+
+
+def read_comment_metadata(path: Path) -> dict:
+    """
+    The "Key: value" header SessionMetadata.header_lines() writes at the top
+    of a comment file, plus the number of operator comment lines.
+    """
+    metadata: dict[str, object] = {}
+    comments = 0
+    try:
+        with open(path, "r", encoding="utf-8", errors="replace") as f:
+            in_header = True
+            for line in f:
+                line = line.rstrip("\n")
+                if _COMMENT_LINE.match(line):
+                    comments += 1
+                    in_header = False
+                elif in_header and ": " in line:
+                    key, value = line.split(": ", 1)
+                    metadata[key.strip()] = value.strip()
+    except OSError:
+        return {}
+    metadata["comments"] = comments
+    return metadata
+
+
+def manifest_files(folder: Path) -> list[Path]:
+    """Files a manifest covers: everything below folder except the manifest and transient files."""
+    found = []
+    for root, _dirs, names in os.walk(folder):
+        for name in names:
+            path = Path(root) / name
+            if name == MANIFEST_NAME and path.parent == folder:
+                continue
+            if path.suffix.lower() in _SKIPPED_SUFFIXES:
+                continue
+            found.append(path)
+    return sorted(found)
+
+
+def build_manifest(
+    folder: Path,
+    *,
+    cache: HashCache | None = None,
+    workers: int | None = None,
+    chunk_size: int = 8 * 1024 * 1024,
+) -> Manifest:
+    """
+    Hash every file of a session folder in a thread pool (files whose
+    identity is in the cache are not read again) and collect the comment
+    files' metadata. Call write() on the result to store manifest.json.
+    """
+    started = time.perf_counter()
+    folder = Path(folder)
+    files = manifest_files(folder)
+    stats = {path: path.stat() for path in files}
+    manifest = Manifest(folder=folder, created_at=datetime.now().isoformat(timespec="seconds"))
+
+    def digest(path: Path) -> tuple[str, bool]:
+        stat = stats[path]
+        cached = cache.get(stat) if cache is not None else None
+        if cached is not None:
+            return cached, True
+        value = hash_file(path, chunk_size)
+        if path.stat().st_mtime_ns != stat.st_mtime_ns:
+            raise RuntimeError(f"{path.name} changed while it was hashed")
+        if cache is not None:
+            cache.put(stat, value)
+        return value, False
+
+    # Largest first, so one big BLF does not start last and stretch the run.
+    order = sorted(files, key=lambda p: stats[p].st_size, reverse=True)
+    with ThreadPoolExecutor(max_workers=workers or min(8, (os.cpu_count() or 2))) as pool:
+        digests = dict(zip(order, pool.map(digest, order)))
+
+    for path in files:
+        stat = stats[path]
+        value, from_cache = digests[path]
+        manifest.files.append(
+            ManifestEntry(
+                name=path.relative_to(folder).as_posix(),
+                size=stat.st_size,
+                mtime=stat.st_mtime,
+                sha256=value,
+            )
+        )
+        if from_cache:
+            manifest.cached_files += 1
+        else:
+            manifest.hashed_bytes += stat.st_size
+        if path.suffix.lower() == ".txt":
+            manifest.sessions[path.relative_to(folder).as_posix()] = read_comment_metadata(path)
+    manifest.tree_sha256 = tree_hash(manifest.files)
+    if cache is not None:
+        cache.save()
+    manifest.elapsed_s = round(time.perf_counter() - started, 3)
+    return manifest
+
+
+def manifest_is_current(folder: Path) -> bool:
+    """
+    True if folder has a complete manifest.json that still lists exactly the
+    files on disk with their sizes and mtimes (no re-hashing).
+    """
+    folder = Path(folder)
+    try:
+        data = json.loads((folder / MANIFEST_NAME).read_text(encoding="utf-8"))
+    except (OSError, ValueError):
+        return False
+    if not data.get("complete"):
+        return False
+    listed = {entry["name"]: entry for entry in data.get("files", [])}
+    on_disk = manifest_files(folder)
+    if len(on_disk) != len(listed):
+        return False
+    for path in on_disk:
+        entry = listed.get(path.relative_to(folder).as_posix())
+        if entry is None:
+            return False
+        stat = path.stat()
+        if stat.st_size != entry["size"] or abs(stat.st_mtime - entry["mtime"]) > 1e-3:
+            return False
+    return True
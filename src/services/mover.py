@@ -0,0 +1,265 @@
+from __future__ import annotations
+
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import Callable
+import hashlib
+import os
+import time
+
+from services.job_queue import QueueWorker
+from services.manifest import HashCache, build_manifest, hash_file
+
+_PART_SUFFIX = ".part"
+
+
+class MoveError(RuntimeError):
+    """A file could not be copied or did not verify; the job stays queued."""
+
+
+@dataclass
+class MoveJob:
+    """
+    One recording to migrate: `files` (relative to source_root) end up at
+    the same relative paths under target_root. `done` lists the files
+    already verified at the target, so a restarted mover skips them.
+    """
+
+    source_root: str
+    target_root: str
+    files: list[str]
+    label: str = ""
+    done: list[str] = field(default_factory=list)
+    not_before: float = 0.0  # epoch; lets the writer finish (CANoe rewrites the BLF header on stop)
+    attempts: int = 0
+    last_error: str = ""
+
+    @classmethod
+    def from_dict(cls, raw: dict) -> "MoveJob":
+        known = {k: v for k, v in raw.items() if k in cls.__dataclass_fields__}
+        return cls(**known)
+
+
+@dataclass
+class MoverStats:
+    jobs_done: int = 0
+    files_moved: int = 0
+    bytes_copied: int = 0
+    copy_seconds: float = 0.0
+    failures: int = 0
+
+    @property
+    def throughput(self) -> float:
+        """Bytes/s while copying (pauses and throttling included)."""
+        return self.bytes_copied / self.copy_seconds if self.copy_seconds else 0.0
+
+
+class _Throttle:
+    """Sleeps between chunks so copies average at most `limit` bytes/s (0: unlimited)."""
+
+    def __init__(self, limit: float, clock: Callable[[], float] = time.monotonic) -> None:
+        self.limit = limit
+        self._clock = clock
+        self._started = clock()
+        self._sent = 0
+
+    def consume(self, n: int) -> None:
+        if self.limit <= 0:
+            return
+        self._sent += n
+        ahead = self._sent / self.limit - (self._clock() - self._started)
+        if ahead > 0:
+            time.sleep(ahead)
+
+
+class SessionMover(QueueWorker):
+    """
+    Background migration of finished recordings from a local staging folder
+    to the configured log directory.
+
+    Files are copied in large sequential chunks to "<name>.part" while the
+    source is hashed, then the copy is re-read and its SHA-256 compared
+    before it is renamed into place (mtime preserved). Sources are deleted
+    only once every file of the job has verified. An interrupted copy
+    resumes from the .part length after re-hashing what is already there;
+    the queue is kept in queue_file so pending jobs survive a restart
+    (see QueueWorker).
+
+    pause() holds the worker between chunks (the hub pauses it while a
+    measurement runs); limit caps the copy rate in bytes/s.
+
+    With a HashCache, every verified copy records its digest, and once a
+    job is complete the manifest.json of each target folder is rebuilt from
+    the cache instead of re-reading the files from the share.
+    """
+
+    job_type = MoveJob
+    errors = (MoveError, OSError)  # OSError: share unreachable, disk full...
+    action = "Move"
+    thread_name = "session-mover"
+
+    def __init__(
+        self,
+        queue_file: Path | None = None,
+        *,
+        chunk_size: int = 8 * 1024 * 1024,
+        limit: float = 0.0,
+        retry_delay: float = 30.0,
+        cache: HashCache | None = None,
+    ) -> None:
+        super().__init__(queue_file, retry_delay=retry_delay)
+        self.chunk_size = chunk_size
+        self.limit = limit
+        self.cache = cache
+        self.stats = MoverStats()
+
+    def _process(self, job: MoveJob) -> str:
+        self._move(job)
+        return (
+            f"Moved {job.label} ({len(job.files)} file(s), {self.stats.throughput / 1e6:.0f} MB/s) "
+            f"to {job.target_root}"
+        )
+
+    def _move(self, job: MoveJob) -> None:
+        source_root = Path(job.source_root)
+        target_root = Path(job.target_root)
+        for relative in job.files:
+            if self._stopping:
+                return
+            if relative in job.done:
+                continue
+            source = source_root / relative
+            target = target_root / relative
+            if not source.exists():
+                if target.exists():
+                    job.done.append(relative)  # moved before a crash, source already gone
+                    continue
+                raise MoveError(f"{source} is missing")
+            self._copy_verified(source, target)
+            if self._stopping:
+                return
+            job.done.append(relative)
+            self.stats.files_moved += 1
+            self._save()
+        if self.cache is not None:
+            self._write_manifests(target_root, job)
+
+        # Everything verified at the target: now the staging copies can go.
+        for relative in job.files:
+            source = source_root / relative
+            try:
+                source.unlink()
+            except FileNotFoundError:
+                pass
+            except OSError as exc:
+                raise MoveError(f"could not delete {source}: {exc}") from exc
+            _remove_empty_parents(source.parent, source_root)
+
+    def _write_manifests(self, target_root: Path, job: MoveJob) -> None:
+        # A failed manifest does not hold the job back: the files are verified.
+        for folder in sorted({(target_root / relative).parent for relative in job.files}):
+            try:
+                build_manifest(folder, cache=self.cache, chunk_size=self.chunk_size).write()
+            except Exception as exc:
+                self._messages.append(("warning", f"Manifest of {folder} not written: {exc}"))
+
+    def _copy_verified(self, source: Path, target: Path, attempts: int = 3) -> None:
+        for _ in range(attempts):
+            before = source.stat()
+            digest = self._copy(source, target)
+            if self._stopping:
+                return
+            after = source.stat()
+            if (after.st_size, after.st_mtime_ns) != (before.st_size, before.st_mtime_ns):
+                continue  # still being written (comment journal, late flush): copy again
+            part = target.with_name(target.name + _PART_SUFFIX)
+            if part.stat().st_size != after.st_size:
+                raise MoveError(f"{part} has {part.stat().st_size} bytes, source {after.st_size}")
+            if hash_file(part, self.chunk_size) != digest:
+                part.unlink()
+                raise MoveError(f"checksum mismatch for {target.name}")
+            os.utime(part, ns=(after.st_atime_ns, after.st_mtime_ns))
+            os.replace(part, target)
+            if self.cache is not None:
+                self.cache.put(target.stat(), digest)
+            return
+        raise MoveError(f"{source} kept changing while it was copied")
+
+    def _copy(self, source: Path, target: Path) -> str:
+        """Copy source to target.part, resuming a partial copy; returns the source SHA-256."""
+        target.parent.mkdir(parents=True, exist_ok=True)
+        part = target.with_name(target.name + _PART_SUFFIX)
+        hasher = hashlib.sha256()
+        buffer = bytearray(self.chunk_size)
+        view = memoryview(buffer)
+        throttle = _Throttle(self.limit)
+        started = time.monotonic()
+        copied = 0
+        with open(source, "rb", buffering=0) as src:
+            offset = part.stat().st_size if part.exists() else 0
+            if offset > source.stat().st_size:
+                offset = 0
+            if offset:
+                # Resume: the part must match the source prefix, so hash both.
+                if hash_file(part, self.chunk_size) != self._hash_prefix(src, offset, hasher):
+                    offset = 0
+                    hasher = hashlib.sha256()
+                    src.seek(0)
+            with open(part, "r+b" if offset else "wb", buffering=0) as dst:
+                dst.seek(offset)
+                dst.truncate()
+                while True:
+                    self._resume.wait()
+                    if self._stopping:
+                        break
+                    n = src.readinto(buffer)
+                    if not n:
+                        break
+                    chunk = view[:n]
+                    hasher.update(chunk)
+                    dst.write(chunk)
+                    copied += n
+                    throttle.consume(n)
+                os.fsync(dst.fileno())
+        self.stats.bytes_copied += copied
+        self.stats.copy_seconds += time.monotonic() - started
+        return hasher.hexdigest()
+
+    def _hash_prefix(self, f, length: int, hasher) -> str:
+        # Feeds `length` bytes of f into hasher (which keeps going for the
+        # rest of the copy) and returns the digest of just that prefix.
+        remaining = length
+        while remaining:
+            chunk = f.read(min(self.chunk_size, remaining))
+            if not chunk:
+                break
+            hasher.update(chunk)
+            remaining -= len(chunk)
+        return hasher.copy().hexdigest()
+
+
+def _remove_empty_parents(folder: Path, stop_at: Path) -> None:
+    # Drop the session folder (and emptied date/release folders) from staging.
+    try:
+        stop_at = stop_at.resolve()
+        folder = folder.resolve()
+        while folder != stop_at and stop_at in folder.parents:
+            folder.rmdir()  # raises once a folder is not empty
+            folder = folder.parent
+    except OSError:
+        pass
+
+
+def job_for_files(
+    files: list[Path], source_root: Path, target_root: Path, *, label: str = "", settle: float = 0.0
+) -> MoveJob:
+    """MoveJob for files below source_root, mirrored under target_root, due in `settle` seconds."""
+    source_root = Path(source_root).resolve()
+    relative = [str(Path(f).resolve().relative_to(source_root)) for f in files]
+    return MoveJob(
+        source_root=str(source_root),
+        target_root=str(Path(target_root)),
+        files=sorted(relative),
+        label=label or (Path(relative[0]).parent.name if relative else source_root.name),
+        not_before=time.time() + settle,
+    )
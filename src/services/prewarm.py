@@ -0,0 +1,189 @@
+from __future__ import annotations
+
+from dataclasses import dataclass, replace
+import queue
+import threading
+from pathlib import Path
+import time
+
+from services.canoe import (
+    CANoeInstallation,
+    com_apartment,
+    is_canoe_running,
+    load_canoe_config,
+    open_canoe_installation,
+    wait_for_process,
+    _attach_running_canoe,
+    _major_from_hint,
+    _matches_major,
+)
+from services.cfg_index import load_cfg_summary
+from services.fingerprint import FingerprintStore, config_fingerprint
+
+
+@dataclass(frozen=True)
+class PrewarmStage:
+    name: str
+    status: str = "pending"   # pending | running | done | skipped | failed
+    elapsed_ms: float = 0.0
+    detail: str = ""
+
+
+class CANoePrewarmer:
+    """
+    Bring CANoe to "ready to record" on a background thread: launch the
+    executable, wait for the process, attach over COM and load the cfg.
+
+    Every step is an injected callable, so the worker runs unchanged
+    against a fake COM server:
+      launch() -> bool, wait_ready() -> bool, attach() -> object | None,
+      load_config(canoe) -> str (detail text).
+    Stage snapshots are queued; the UI drains them with updates().
+    The COM handle is released when the worker ends; the UI thread attaches
+    its own (fast, CANoe is already up with the cfg loaded).
+    """
+
+    STAGES = ("launch", "process", "attach", "load cfg")
+
+    def __init__(
+        self,
+        *,
+        launch,
+        wait_ready,
+        attach,
+        load_config=None,
+        apartment=com_apartment,
+        clock=time.perf_counter,
+    ) -> None:
+        self._steps = {
+            "launch": launch,
+            "process": wait_ready,
+            "attach": attach,
+            "load cfg": load_config,
+        }
+        self._apartment = apartment
+        self._clock = clock
+        self._queue: queue.Queue[PrewarmStage] = queue.Queue()
+        self.stages: dict[str, PrewarmStage] = {name: PrewarmStage(name) for name in self.STAGES}
+        self.done = threading.Event()
+        self.succeeded = False
+        self.total_ms = 0.0
+        self._thread: threading.Thread | None = None
+
+    def start(self) -> None:
+        if self._thread is not None:
+            return
+        self._thread = threading.Thread(target=self._run, name="canoe-prewarm", daemon=True)
+        self._thread.start()
+
+    def join(self, timeout: float | None = None) -> bool:
+        return self.done.wait(timeout)
+
+    def updates(self) -> list[PrewarmStage]:
+        """Stage snapshots published since the last call (any thread)."""
+        result: list[PrewarmStage] = []
+        while True:
+            try:
+                result.append(self._queue.get_nowait())
+            except queue.Empty:
+                return result
+
+    def summary(self) -> str:
+        parts = [
+            f"{stage.name} {stage.elapsed_ms:.0f} ms" if stage.status == "done" else f"{stage.name} {stage.status}"
+            for stage in self.stages.values()
+        ]
+        return ", ".join(parts)
+
+    # ---- worker ----
+    def _publish(self, stage: PrewarmStage) -> None:
+        self.stages[stage.name] = stage
+        self._queue.put(stage)
+
+    def _run(self) -> None:
+        started_all = self._clock()
+        try:
+            with self._apartment():
+                canoe = result = None
+                try:
+                    for name in self.STAGES:
+                        step = self._steps[name]
+                        if step is None or (name == "load cfg" and canoe is None):
+                            self._publish(PrewarmStage(name, "skipped"))
+                            continue
+                        stage = PrewarmStage(name, "running")
+                        self._publish(stage)
+                        started = self._clock()
+                        try:
+                            result = step(canoe) if name == "load cfg" else step()
+                        except Exception as exc:
+                            self._publish(
+                                replace(stage, status="failed", elapsed_ms=self._ms(started), detail=repr(exc))
+                            )
+                            return
+                        if name == "attach":
+                            canoe = result
+                        ok = result is not None and result is not False
+                        detail = result if isinstance(result, str) else ""
+                        status = "done" if ok else "failed"
+                        self._publish(replace(stage, status=status, elapsed_ms=self._ms(started), detail=detail))
+                        if not ok:
+                            return
+                    self.succeeded = True
+                finally:
+                    # Release the COM proxy before the apartment's CoUninitialize, on every path.
+                    canoe = result = None
+        finally:
+            self.total_ms = self._ms(started_all)
+            self.done.set()
+
+    def _ms(self, started: float) -> float:
+        return (self._clock() - started) * 1000.0
+
+
+def prewarmer_for_installation(
+    installation: CANoeInstallation,
+    cfg_file: str,
+    *,
+    prog_ids: list[str],
+    fingerprints: FingerprintStore,
+    cfg_cache_dir: Path,
+    attach_timeout: float = 30.0,
+) -> CANoePrewarmer:
+    """
+    CANoePrewarmer wired to the real CANoe: launch installation unless it is
+    already running, attach through prog_ids (first match with the expected
+    major version) and load cfg_file unless its fingerprint is unchanged.
+    """
+    expected_major = _major_from_hint(installation.version_hint)
+
+    def launch() -> str:
+        if is_canoe_running(installation.exec_path):
+            return "already running"
+        return "started" if open_canoe_installation(installation.exec_path) else False
+
+    def wait_ready() -> bool:
+        wait_for_process(installation.exec_path)
+        return is_canoe_running(installation.exec_path)
+
+    def attach():
+        return _attach_running_canoe(
+            prog_ids, lambda canoe: _matches_major(canoe, expected_major), timeout=attach_timeout
+        )
+
+    def load_config(canoe) -> str:
+        summary = load_cfg_summary(cfg_file, cfg_cache_dir)
+        fingerprint = config_fingerprint(cfg_file, fingerprints, summary).root
+        reopened = load_canoe_config(
+            canoe, cfg_file, fingerprint=fingerprint, loaded_fingerprint=fingerprints.loaded_fingerprint(cfg_file)
+        )
+        fingerprints.record_loaded(cfg_file, fingerprint)
+        fingerprints.save()
+        return "loaded" if reopened else "already loaded"
+
+    return CANoePrewarmer(
+        launch=launch,
+        wait_ready=wait_ready,
+        attach=attach,
+        load_config=load_config if cfg_file else None,
+    )
@@ -0,0 +1,180 @@
+from __future__ import annotations
+
+from pathlib import Path
+from typing import Iterable, Protocol
+import os
+
+try:
+    import winreg
+except ImportError:  # non-Windows host; use MappingRegistryBackend
+    winreg = None
+
+CANOE_PROG_ID_PREFIX = "CANoe.Application"
+
+
+class RegistryBackend(Protocol):
+    """Read-only view of HKEY_CLASSES_ROOT."""
+
+    def subkeys(self, path: str) -> Iterable[str]:
+        ...
+
+    def default_value(self, path: str) -> str | None:
+        ...
+
+
+class WinregBackend:
+    """RegistryBackend over the real HKEY_CLASSES_ROOT."""
+
+    def subkeys(self, path: str) -> Iterable[str]:
+        if winreg is None:
+            return
+        try:
+            key = winreg.OpenKey(winreg.HKEY_CLASSES_ROOT, path)
+        except OSError:
+            return
+        with key:
+            index = 0
+            while True:
+                try:
+                    yield winreg.EnumKey(key, index)
+                except OSError:
+                    return
+                index += 1
+
+    def default_value(self, path: str) -> str | None:
+        if winreg is None:
+            return None
+        try:
+            with winreg.OpenKey(winreg.HKEY_CLASSES_ROOT, path) as key:
+                value, _ = winreg.QueryValueEx(key, None)
+        except OSError:
+            return None
+        return str(value) if value is not None else None
+
+
+class MappingRegistryBackend:
+    """
+    RegistryBackend over a plain dict of backslash-separated key path ->
+    default value. Intermediate keys are implied by the paths, so a fake
+    registry needs only the "<ProgID>\\CLSID" and
+    "CLSID\\<clsid>\\LocalServer32" entries.
+    """
+
+    def __init__(self, values: dict[str, str]) -> None:
+        self.values = {k.strip("\\"): v for k, v in values.items()}
+
+    def subkeys(self, path: str) -> Iterable[str]:
+        prefix = path.strip("\\") + "\\" if path else ""
+        seen: list[str] = []
+        for key in self.values:
+            if not key.lower().startswith(prefix.lower()):
+                continue
+            child = key[len(prefix):].split("\\", 1)[0]
+            if child and child not in seen:
+                seen.append(child)
+        return seen
+
+    def default_value(self, path: str) -> str | None:
+        wanted = path.strip("\\").lower()
+        for key, value in self.values.items():
+            if key.lower() == wanted:
+                return value
+        return None
+
+
+# Shared with services.canoe, which imports them from here (canoe imports
+# this module, so the helpers cannot live there without a cycle).
+def normalize_path_key(value: str | Path) -> str:
+    """Case-insensitive, absolute key for comparing executable/cfg paths."""
+    return str(Path(value).resolve(strict=False)).lower()
+
+
+def _extract_executable_from_command(command: str) -> Path | None:
+    command = (command or "").strip()
+    if not command:
+        return None
+    if command.startswith('"'):
+        end = command.find('"', 1)
+        if end == -1:
+            return None
+        raw_path = command[1:end]
+    else:
+        parts = command.split()
+        if not parts:
+            return None
+        raw_path = parts[0]
+    expanded = os.path.expandvars(raw_path)
+    try:
+        return Path(expanded)
+    except Exception:
+        return None
+
+
+class ComRegistryIndex:
+    """
+    Every CANoe.Application* ProgID and the LocalServer32 executable behind
+    it, collected in one pass over HKEY_CLASSES_ROOT and queryable both ways.
+    """
+
+    def __init__(self, prog_id_to_exec: dict[str, str] | None = None) -> None:
+        self.prog_id_to_exec: dict[str, str] = dict(prog_id_to_exec or {})
+        self.exec_to_prog_ids: dict[str, list[str]] = {}
+        for prog_id, executable in sorted(self.prog_id_to_exec.items()):
+            self.exec_to_prog_ids.setdefault(normalize_path_key(executable), []).append(prog_id)
+
+    @classmethod
+    def build(cls, backend: RegistryBackend | None = None) -> "ComRegistryIndex":
+        backend = backend or WinregBackend()
+        mapping: dict[str, str] = {}
+        prefix = CANOE_PROG_ID_PREFIX.lower()
+        for name in backend.subkeys(""):
+            if not name.lower().startswith(prefix):
+                continue
+            clsid = backend.default_value(f"{name}\\CLSID")
+            if not clsid:
+                continue
+            command = backend.default_value(f"CLSID\\{clsid}\\LocalServer32")
+            executable = _extract_executable_from_command(command or "")
+            if executable:
+                mapping[name] = str(executable)
+        return cls(mapping)
+
+    def executable_for(self, prog_id: str) -> Path | None:
+        executable = self.prog_id_to_exec.get(prog_id or "")
+        return Path(executable) if executable else None
+
+    def prog_ids_for(self, executable: str | Path) -> list[str]:
+        return list(self.exec_to_prog_ids.get(normalize_path_key(executable), []))
+
+    def best_prog_id(self, executable: str | Path, major_hint: int | None = None) -> str | None:
+        """
+        Pick the ProgID registered for this executable, preferring a
+        versioned one that matches major_hint (e.g. CANoe.Application.17).
+        """
+        candidates = self.prog_ids_for(executable)
+        if not candidates:
+            return None
+        if major_hint is not None:
+            versioned = {
+                f"{CANOE_PROG_ID_PREFIX}.{suffix}"
+                for suffix in (f"{major_hint}", f"{major_hint}.0", f"{major_hint:02d}", f"{major_hint:02d}.0")
+            }
+            for prog_id in candidates:
+                if prog_id in versioned:
+                    return prog_id
+        for preferred in (CANOE_PROG_ID_PREFIX, f"{CANOE_PROG_ID_PREFIX}.1"):
+            if preferred in candidates:
+                return preferred
+        return candidates[0]
+
+    def to_dict(self) -> dict[str, str]:
+        return dict(self.prog_id_to_exec)
+
+    @classmethod
+    def from_dict(cls, raw) -> "ComRegistryIndex":
+        if not isinstance(raw, dict):
+            return cls()
+        return cls({str(k): str(v) for k, v in raw.items() if k and v})
+
+    def __len__(self) -> int:
+        return len(self.prog_id_to_exec)
@@ -0,0 +1,252 @@
+from __future__ import annotations
+
+from dataclasses import dataclass, field
+from typing import Callable
+import time
+
+# Task priorities; lower runs first when several tasks are due in one tick.
+PRIORITY_UI = 0
+PRIORITY_IO = 10
+PRIORITY_BACKGROUND = 20
+
+
+@dataclass(frozen=True)
+class Backoff:
+    """
+    Task result: count this run as a failure and back off, without raising
+    (e.g. a poll that worked but found nothing readable yet).
+    """
+    reason: str = ""
+
+
+@dataclass
+class TaskStats:
+    runs: int = 0
+    errors: int = 0
+    overruns: int = 0    # runs longer than the task's budget
+    deferred: int = 0    # times pushed to the next tick by the tick budget
+    total_ns: int = 0
+    max_ns: int = 0
+    max_late_ms: float = 0.0  # worst delay between due time and actual run
+
+    @property
+    def mean_ms(self) -> float:
+        return self.total_ns / self.runs / 1e6 if self.runs else 0.0
+
+
+@dataclass
+class PeriodicTask:
+    name: str
+    callback: Callable[[], bool | Backoff | None]
+    interval: Callable[[], float]
+    priority: int
+    budget: float
+    max_backoff: float
+    next_due: float = 0.0
+    failures: int = 0         # consecutive; drives the exponential backoff
+    was_deferred: bool = False
+    last_error: str = ""
+    stats: TaskStats = field(default_factory=TaskStats)
+
+    def next_delay(self) -> float:
+        delay = max(0.0, float(self.interval()))
+        if self.failures:
+            delay = min(self.max_backoff, max(delay, 0.25) * (2 ** self.failures))
+        return delay
+
+
+class TaskScheduler:
+    """
+    Single owner of the hub's recurring work. The UI drives it from one
+    after() chain: tick() runs every due task (lowest priority value first,
+    previously deferred tasks ahead of everything) and returns the number of
+    seconds until the next one is due.
+
+    - interval may be a number or a callable, re-evaluated after every run,
+      so tasks can poll fast while recording and slowly while disconnected.
+    - A callback returning False ends the task; raising or returning a
+      Backoff counts as an error and backs the task off exponentially (up
+      to max_backoff) until it succeeds again.
+    - Once a tick has spent its budget the remaining due tasks wait for the
+      next tick; a single run longer than its own budget is an overrun.
+    - Next due times advance from the previous due time, not from the end of
+      the run, so intervals do not drift; a task that fell more than one
+      interval behind skips the missed runs instead of bursting.
+    """
+
+    def __init__(
+        self,
+        *,
+        budget: float = 0.03,
+        clock: Callable[[], float] = time.perf_counter,
+        log: Callable[[str], None] | None = None,
+    ) -> None:
+        self.budget = budget
+        self.ticks = 0
+        self.tick_overruns = 0
+        self._clock = clock
+        self._log = log or (lambda message: None)
+        self._tasks: dict[str, PeriodicTask] = {}
+        self._stats: dict[str, TaskStats] = {}  # outlives finished tasks
+        self._in_tick = False
+
+    @property
+    def in_tick(self) -> bool:
+        return self._in_tick
+
+    def add(
+        self,
+        name: str,
+        callback: Callable[[], bool | Backoff | None],
+        interval: float | Callable[[], float],
+        *,
+        priority: int = PRIORITY_IO,
+        delay: float | None = None,
+        budget: float | None = None,
+        max_backoff: float = 30.0,
+    ) -> PeriodicTask:
+        """Register (or replace) a task; first run after `delay` (default: one interval)."""
+        interval_fn = interval if callable(interval) else (lambda value=float(interval): value)
+        task = PeriodicTask(
+            name=name,
+            callback=callback,
+            interval=interval_fn,
+            priority=priority,
+            budget=budget if budget is not None else self.budget,
+            max_backoff=max_backoff,
+            stats=self._stats.setdefault(name, TaskStats()),
+        )
+        task.next_due = self._clock() + (task.next_delay() if delay is None else max(0.0, delay))
+        self._tasks[name] = task
+        return task
+
+    def remove(self, name: str) -> None:
+        self._tasks.pop(name, None)
+
+    def has(self, name: str) -> bool:
+        return name in self._tasks
+
+    def wake(self, name: str) -> None:
+        """Run a task on the next tick, e.g. right after a state change it reacts to."""
+        task = self._tasks.get(name)
+        if task is not None:
+            task.next_due = min(task.next_due, self._clock())
+
+    def tasks(self) -> list[PeriodicTask]:
+        return list(self._tasks.values())
+
+    def next_delay(self) -> float | None:
+        if not self._tasks:
+            return None
+        return max(0.0, min(t.next_due for t in self._tasks.values()) - self._clock())
+
+    def tick(self) -> float | None:
+        """Run due tasks within the budget; seconds until the next due task (None: no tasks)."""
+        self._in_tick = True
+        try:
+            self._run_due()
+        finally:
+            self._in_tick = False
+        return self.next_delay()
+
+    def _run_due(self) -> None:
+        started = self._clock()
+        self.ticks += 1
+        due = sorted(
+            (t for t in self._tasks.values() if t.next_due <= started),
+            key=lambda t: (not t.was_deferred, t.priority, t.next_due),
+        )
+        for index, task in enumerate(due):
+            if self._tasks.get(task.name) is not task:
+                continue  # removed or replaced by an earlier task in this tick
+            if index and self._clock() - started >= self.budget:
+                self.tick_overruns += 1
+                for rest in due[index:]:
+                    rest.was_deferred = True
+                    rest.stats.deferred += 1
+                return
+            self._run(task)
+
+    def _run(self, task: PeriodicTask) -> None:
+        stats = task.stats
+        run_at = self._clock()
+        stats.max_late_ms = max(stats.max_late_ms, (run_at - task.next_due) * 1000.0)
+        task.was_deferred = False
+        keep = True
+        failed = False
+        begin = time.perf_counter_ns()
+        try:
+            result = task.callback()
+        except Exception as exc:
+            failed = True
+            task.last_error = f"{type(exc).__name__}: {exc}"
+        else:
+            keep = result is not False
+            if isinstance(result, Backoff):
+                failed = True
+                task.last_error = result.reason or "backoff requested"
+        duration_ns = time.perf_counter_ns() - begin
+
+        stats.runs += 1
+        stats.total_ns += duration_ns
+        stats.max_ns = max(stats.max_ns, duration_ns)
+        if duration_ns > task.budget * 1e9:
+            stats.overruns += 1
+            if stats.overruns in (1, 10, 100, 1000):
+                self._log(
+                    f"Task '{task.name}' took {duration_ns / 1e6:.0f} ms "
+                    f"(budget {task.budget * 1000:.0f} ms, {stats.overruns} overrun(s) so far)"
+                )
+        if failed:
+            stats.errors += 1
+            task.failures += 1
+            if task.failures == 1:
+                self._log(f"Task '{task.name}' failed: {task.last_error}; backing off")
+        elif task.failures:
+            self._log(f"Task '{task.name}' recovered after {task.failures} failure(s)")
+            task.failures = 0
+
+        if self._tasks.get(task.name) is not task:
+            return  # the callback removed or replaced its own task
+        if not keep:
+            self._tasks.pop(task.name, None)
+            return
+        delay = task.next_delay()
+        now = self._clock()
+        if task.failures:
+            task.next_due = now + delay
+        else:
+            task.next_due = task.next_due + delay
+            if task.next_due <= now:
+                task.next_due = now + delay
+
+    def format_stats(self) -> list[str]:
+        lines = [f"{self.ticks} tick(s), {self.tick_overruns} over the {self.budget * 1000:.0f} ms tick budget"]
+        for name, s in sorted(self._stats.items()):
+            task = self._tasks.get(name)
+            lines.append(
+                f"{name}: {s.runs} run(s), mean {s.mean_ms:.1f} ms, max {s.max_ns / 1e6:.1f} ms, "
+                f"late max {s.max_late_ms:.0f} ms, {s.overruns} overrun(s), {s.deferred} deferred"
+                + (f", {s.errors} error(s)" if s.errors else "")
+                + (f", backing off ({task.failures})" if task is not None and task.failures else "")
+                + ("" if task is not None else ", finished")
+            )
+        return lines
+
+    def stats_dict(self) -> dict:
+        return {
+            "ticks": self.ticks,
+            "tick_overruns": self.tick_overruns,
+            "tasks": {
+                name: {
+                    "runs": s.runs,
+                    "errors": s.errors,
+                    "overruns": s.overruns,
+                    "deferred": s.deferred,
+                    "mean_ms": round(s.mean_ms, 2),
+                    "max_ms": round(s.max_ns / 1e6, 2),
+                    "max_late_ms": round(s.max_late_ms, 1),
+                }
+                for name, s in self._stats.items()
+            },
+        }
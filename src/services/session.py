@@ -0,0 +1,586 @@
+from __future__ import annotations
+
+from dataclasses import dataclass, field
+from datetime import datetime
+from pathlib import Path
+import time
+
+from core.state import VEHICLE_NUMBERS
+from services.canoe import load_canoe_config
+from services.cfg_index import CfgSummary, load_cfg_summary
+from services.clock import MeasurementClock
+from services.com_stats import ComStats, instrument
+from services.comments import CommentEntry, CommentJournal
+from services.events import Span, span
+from services.fingerprint import FingerprintStore, config_fingerprint
+from services.logging_plan import LoggingPlan, compile_logging_plan
+
+# CANoe log containers; comments (.txt), video (.avi), temp files and the
+# hub's own records (.json) never carry the {MeasurementStart} suffix we are
+# looking for.
+_IGNORED_LOG_SUFFIXES = {".txt", ".avi", ".tmp", ".json"}
+
+
+class SessionError(RuntimeError):
+    """A session operation was refused or failed; the message is operator-facing."""
+
+
+def format_seconds(elapsed_seconds: float) -> str:
+    total_ms = int(elapsed_seconds * 1000.0)
+    ms = total_ms % 1000
+    total_sec = total_ms // 1000
+    s = total_sec % 60
+    total_min = total_sec // 60
+    m = total_min % 60
+    h = total_min // 60
+    return f"{h:02d}:{m:02d}:{s:02d}.{ms:03d}"
+
+
+@dataclass
+class SessionMetadata:
+    """Operator-entered fields that name a recording and head its comment file."""
+    sw_rel: str = ""
+    me_version: str = ""
+    tag: str = ""
+    vehicle_id: str = ""
+    vehicle_token: str = ""  # file-name component, e.g. "XC60_Veh6"
+    vehicle_model: str = ""
+    vehicle_number: int | None = None
+    title: str = ""
+
+    def header_lines(self, now: datetime | None = None) -> list[str]:
+        def fallback(value: str | None) -> str:
+            return (value or "").strip() or "--"
+
+        now = now or datetime.now()
+        return [
+            "Recording metadata",
+            f"Timestamp: {now.strftime('%Y-%m-%d %H:%M:%S')}",
+            f"Title: {fallback(self.title)}",
+            f"SW release: {fallback(self.sw_rel)}",
+            f"ME version: {fallback(self.me_version)}",
+            f"Recording tag: {fallback(self.tag)}",
+            f"Vehicle model: {fallback(self.vehicle_model)}",
+            f"Vehicle plate/ID: {fallback(self.vehicle_id)}",
+            f"Vehicle number: {self.vehicle_number if self.vehicle_number is not None else '--'}",
+            "",
+            "Operator comments:",
+        ]
+
+
+def vehicle_descriptor(vehicle_id: str, catalog: dict[str, str] | None) -> str:
+    """Model descriptor of vehicle_id from the vehicle catalog, e.g. "XC60"."""
+    vehicle_id = (vehicle_id or "").strip()
+    return (catalog.get(vehicle_id) or "").strip() if catalog else ""
+
+
+def vehicle_token(vehicle_id: str, catalog: dict[str, str] | None, *, include_id_fallback: bool = True) -> str:
+    """
+    Compact vehicle token for file names and titles, e.g. "XC60_Veh6":
+    descriptor plus fleet number; the vehicle ID stands in for a missing
+    fleet number when include_id_fallback is set.
+    """
+    vehicle_id = (vehicle_id or "").strip()
+    descriptor = vehicle_descriptor(vehicle_id, catalog)
+    number = VEHICLE_NUMBERS.get(vehicle_id.upper()) if vehicle_id else None
+
+    parts: list[str] = []
+    if descriptor:
+        parts.append(descriptor.replace(" ", "_"))
+    if number is not None:
+        parts.append(f"Veh{number}")
+    elif include_id_fallback and vehicle_id:
+        parts.append(vehicle_id.replace(" ", "_"))
+    return "_".join(parts)
+
+
+def session_naming(log_root: Path, metadata: SessionMetadata, now: datetime | None = None) -> tuple[Path, str, str]:
+    """
+    Build (log_folder, base_prefix, log_name) for a new recording under
+    log_root. Nothing is created on disk.
+    """
+    try:
+        resolved_root = log_root.resolve()
+    except Exception:
+        resolved_root = log_root
+    release_dir = resolved_root / f"{metadata.sw_rel}"
+
+    date = (now or datetime.now()).strftime("%Y-%m-%d")
+    # sanitize components for filenames
+    safe_tag = (metadata.tag or "").replace(" ", "_")
+    rel = (metadata.sw_rel or "").replace(" ", "_")
+    veh = metadata.vehicle_token
+
+    # base string CANoe will expand. CANoe will replace {MeasurementStart}
+    # Include only the vehicle number tag in the logging "title"/prefix.
+    # Example: R300RC1_Veh1_myCase_{MeasurementStart}
+    base_prefix_parts = [rel]
+    if veh:
+        base_prefix_parts.append(veh)
+    if safe_tag:
+        base_prefix_parts.append(safe_tag)
+    base_prefix = "_".join([p for p in base_prefix_parts if p])
+
+    log_name = f"{base_prefix}_{{MeasurementStart}}"
+    log_folder_name = base_prefix  # keep folder grouped by SW+Vehicle(+Tag)
+
+    log_folder = release_dir / f"{rel}_{date}" / log_folder_name
+    return log_folder, base_prefix, log_name
+
+
+@dataclass
+class RecordingSession:
+    log_folder: Path
+    prefix: str              # e.g. "R300RC1_VEH123_tag_"
+    log_name: str            # what CANoe expands, "<prefix>{MeasurementStart}"
+    started_wallclock: float # wall clock when Start was pressed
+    comment_path: Path
+    resolved: bool = False   # comment_path carries CANoe's MeasurementStart suffix
+    comment_count: int = 0
+    warnings: list[str] = field(default_factory=list)  # non-fatal Start problems
+
+    def resolve_suffix(self) -> str | None:
+        """
+        {MeasurementStart} suffix of the newest log container of this run.
+        Only files modified after Start (1 s tolerance) count, so an older
+        session in the same folder is never picked up.
+        """
+        best_path = None
+        best_mtime = -1.0
+        try:
+            for p in self.log_folder.iterdir():
+                if not p.is_file():
+                    continue
+                if not p.name.startswith(self.prefix):
+                    continue
+                if p.suffix.lower() in _IGNORED_LOG_SUFFIXES:
+                    continue
+                mtime = p.stat().st_mtime
+                if mtime + 1.0 < self.started_wallclock:
+                    continue
+                if mtime > best_mtime:
+                    best_mtime = mtime
+                    best_path = p
+        except Exception:
+            return None
+
+        if best_path is None:
+            return None
+        suffix = best_path.stem[len(self.prefix):]
+        return suffix or None
+
+    def files(self) -> list[Path]:
+        """
+        The files this run produced in log_folder: log containers, comment
+        file and "_<prefix><suffix>_<window>.avi" videos. Before the suffix is
+        known, anything with the prefix modified since Start counts.
+        """
+        suffix = self.resolve_suffix()
+        found = []
+        for p in self.log_folder.iterdir():
+            if not p.is_file():
+                continue
+            name = p.name
+            if suffix is not None:
+                match_main = name.startswith(f"{self.prefix}{suffix}")
+                match_video = name.startswith(f"_{self.prefix}{suffix}_")
+                if not (match_main or match_video):
+                    continue
+            else:
+                if not (name.startswith(self.prefix) or name.startswith(f"_{self.prefix}")):
+                    continue
+                try:
+                    mtime = p.stat().st_mtime
+                except Exception:
+                    continue
+                if mtime + 1.0 < self.started_wallclock:
+                    continue
+            found.append(p)
+        return found
+
+    def log_path(self, extension: str = "blf") -> Path | None:
+        """The log file CANoe writes for this run, once the suffix is resolved."""
+        if not self.resolved:
+            return None
+        return self.log_folder / f"{self.comment_path.stem}.{extension}"
+
+
+class SessionController:
+    """
+    Connect/start/stop/comment/discard without any UI.
+
+    Owns the CANoe COM handle, the logging plan compiled for the loaded cfg,
+    the measurement clock and the current recording session. MainWindow and
+    the headless campaign runner both drive it; the CANoe object is only
+    used by attribute access, so a fake object model works the same way.
+    Refused or failed operations raise SessionError.
+    """
+
+    def __init__(
+        self,
+        journal: CommentJournal,
+        *,
+        clock: MeasurementClock | None = None,
+        fingerprints: FingerprintStore | None = None,
+        cfg_cache_dir: Path | None = None,
+        com_stats: ComStats | None = None,
+        log=None,
+        settle: float = 0.5,
+        sleep=time.sleep,
+        wallclock=time.time,
+    ) -> None:
+        self.journal = journal
+        self.clock = clock or MeasurementClock()
+        self.fingerprints = fingerprints
+        self.cfg_cache_dir = cfg_cache_dir
+        self.com_stats = com_stats  # when set, every COM call on canoe is timed
+        self.cfg_summary: CfgSummary | None = None  # offline scan of the selected cfg
+        self.session: RecordingSession | None = None
+        self._resolve_span: Span | None = None  # Start -> comment file named after CANoe's log
+        self._canoe = None
+        self._logging_plan: LoggingPlan | None = None
+        self._log = log or (lambda _message: None)
+        self._settle = settle
+        self._sleep = sleep
+        self._wallclock = wallclock
+
+    # ---- connection ----
+    @property
+    def canoe(self):
+        return self._canoe
+
+    @canoe.setter
+    def canoe(self, value) -> None:
+        # A new (or lost) handle invalidates the item handles in the plan.
+        self._canoe = instrument(value, self.com_stats) if self.com_stats is not None else value
+        self._logging_plan = None
+
+    def attach(self, canoe, cfg_file: str = "") -> bool:
+        """Adopt a connected CANoe object; load cfg_file if given. Returns whether it was (re)opened."""
+        self.canoe = canoe
+        if not cfg_file:
+            return False
+        return self.load_config(cfg_file)
+
+    def load_config(self, cfg: str) -> bool:
+        """
+        Open cfg in CANoe unless it is already loaded with the same
+        fingerprint (cfg + every referenced DBC/CAPL/... file).
+        """
+        if self.canoe is None:
+            raise SessionError("Not connected")
+        fingerprint: str | None = None
+        store = self.fingerprints
+        if store is not None:
+            started = time.perf_counter()
+            try:
+                summary = self.cfg_summary
+                if summary is None or Path(summary.cfg_file) != Path(cfg):
+                    if self.cfg_cache_dir is not None:
+                        summary = load_cfg_summary(cfg, self.cfg_cache_dir)
+                    else:
+                        summary = None
+                with span("cfg_fingerprint", cfg=cfg):
+                    fingerprint = config_fingerprint(cfg, store, summary).root
+                self._log(
+                    f"Cfg fingerprint {fingerprint[:12]} computed in {(time.perf_counter() - started) * 1000.0:.0f} ms."
+                )
+            except Exception as exc:
+                self._log(f"Cfg fingerprint unavailable ({exc!r}); falling back to path comparison.")
+
+        loaded = store.loaded_fingerprint(cfg) if store is not None else None
+        started = time.perf_counter()
+        reopened = load_canoe_config(self.canoe, cfg, fingerprint=fingerprint, loaded_fingerprint=loaded)
+        if reopened:
+            self._logging_plan = None
+            self._log(f"Cfg (re)loaded in {(time.perf_counter() - started):.1f} s.")
+        else:
+            self._log("Cfg already loaded and unchanged; reload skipped.")
+        if store is not None:
+            if fingerprint is not None:
+                store.record_loaded(cfg, fingerprint)
+            try:
+                store.save()
+            except Exception as exc:
+                self._log(f"Could not save cfg fingerprints: {exc!r}")
+        return reopened
+
+    def measurement_running(self) -> bool:
+        """Measurement.Running; a COM failure drops the handle and raises SessionError."""
+        if self.canoe is None:
+            return False
+        try:
+            return bool(self.canoe.Measurement.Running)
+        except Exception as e:
+            self.canoe = None
+            raise SessionError(f"Lost CANoe connection: {e}") from e
+
+    def sync_clock(self) -> None:
+        """Feed the clock model a fresh Measurement.GetTime() sample when due."""
+        if self.canoe is None or not self.clock.needs_sample():
+            return
+        self.clock.sample(self.canoe.Measurement.GetTime)
+
+    # ---- logging plan ----
+    def ensure_logging_plan(self, force: bool = False) -> LoggingPlan:
+        """Compile the logging plan for the loaded cfg once and reuse it."""
+        if self._logging_plan is None or force:
+            started = time.perf_counter()
+            self._logging_plan = compile_logging_plan(self.canoe)
+            self._log(
+                f"Logging plan compiled in {(time.perf_counter() - started) * 1000.0:.0f} ms: "
+                f"{len(self._logging_plan.block_extensions)} block(s), "
+                f"{len(self._logging_plan.video_windows)} video window(s)."
+            )
+        return self._logging_plan
+
+    # ---- start / stop ----
+    def start(self, log_root: Path | None, metadata: SessionMetadata) -> RecordingSession:
+        """
+        Configure output paths under log_root, open the comment file with a
+        wall-clock suffix and start the measurement. Call
+        resolve_comment_file() afterwards until CANoe's own suffix is known.
+        """
+        if self.canoe is None:
+            raise SessionError("Not connected")
+        if self.measurement_running():
+            raise SessionError("Measurement already running")
+        if log_root is None:
+            raise SessionError("Log directory is not configured.")
+        if not log_root.exists():
+            raise SessionError(f"Log directory does not exist: {log_root}")
+        if not log_root.is_dir():
+            raise SessionError(f"Log path is not a folder: {log_root}")
+
+        start_span = span("start")
+        try:
+            log_folder, base_prefix, log_name = session_naming(log_root, metadata)
+            log_folder.mkdir(parents=True, exist_ok=True)
+            self._log(f"Log folder resolved to {log_folder}")
+
+            # Create the comment file immediately with a wall-clock suffix.
+            ts = datetime.now().strftime("%Y-%m-%d_%H-%M-%S")
+            session = RecordingSession(
+                log_folder=log_folder,
+                prefix=f"{base_prefix}_",
+                log_name=log_name,
+                started_wallclock=self._wallclock(),
+                comment_path=(log_folder / f"{base_prefix}_{ts}.txt").resolve(),
+            )
+            self.journal.open_session(session.comment_path, metadata.header_lines())
+        except OSError as e:
+            start_span.end(ok=False, error=repr(e))
+            raise SessionError(f"Cannot prepare the log folder: {e}") from e
+        self.session = session
+        self._log(f"Comment file initialized at {self.session.comment_path}")
+        self._resolve_span = span("resolve_comment_file", prefix=self.session.prefix)
+
+        plan = self._apply_logging_plan(session, log_folder, log_name)
+        try:
+            self.canoe.Measurement.Start()
+            self._sleep(self._settle)
+            self._log("CANoe.Measurement.Start() invoked.")
+        except Exception as e:
+            start_span.end(ok=False, error=repr(e))
+            self._abandon_session()
+            raise SessionError(f"Error on logging setup/start: {e}") from e
+        start_span.end(
+            prefix=session.prefix,
+            blocks=len(plan.block_extensions) if plan else 0,
+            videos=len(plan.video_windows) if plan else 0,
+            warnings=len(session.warnings),
+        )
+        return session
+
+    def _apply_logging_plan(self, session: RecordingSession, log_folder: Path, log_name: str) -> LoggingPlan | None:
+        """
+        Point logging blocks and video captures at <log_folder>/<log_name>
+        using the plan compiled for the loaded cfg. A failure is not fatal:
+        as before the plan existed, the run is recorded with whatever paths
+        CANoe has and the problem is added to session.warnings.
+        """
+        try:
+            plan = self.ensure_logging_plan()
+            if not plan.is_current(self.canoe):
+                self._log("Loaded cfg or its logging blocks changed in CANoe; recompiling the logging plan.")
+                plan = self.ensure_logging_plan(force=True)
+            try:
+                plan.apply(log_folder, log_name)
+            except Exception as e:
+                # Stale item handles (cfg changed inside CANoe): recompile once.
+                self._log(f"Logging plan apply failed ({e!r}); recompiling.")
+                plan = self.ensure_logging_plan(force=True)
+                plan.apply(log_folder, log_name)
+        except Exception as e:
+            session.warnings.append(f"Could not set logging blocks: {e}")
+            self._log(f"Logging block update failed: {e!r}")
+            return None
+        self._log(
+            f"Logging blocks updated: {len(plan.block_extensions)}; "
+            f"video windows updated: {len(plan.video_windows)}"
+        )
+        return plan
+
+    def _abandon_session(self) -> None:
+        """Undo a Start that never reached CANoe: close and delete the header-only comment file."""
+        comment_path = self.session.comment_path if self.session is not None else None
+        self.reset_session()
+        if comment_path is not None:
+            try:
+                comment_path.unlink()
+            except OSError:
+                pass
+
+    def stop(self) -> None:
+        if self.canoe is None:
+            raise SessionError("Not connected")
+        with span("stop"):
+            try:
+                self.canoe.Measurement.Stop()
+            except Exception as e:
+                raise SessionError(f"Stop failed: {e}") from e
+            self._log("Stop requested via CANoe.Measurement.Stop().")
+            self.reset_session()
+
+    def discard(self) -> tuple[int, int, bool]:
+        """
+        Stop the measurement and delete the files from the current log run.
+        Returns (deleted_count, failed_count, removed_folder).
+        """
+        if self.canoe is None or self.session is None:
+            raise SessionError("No active recording to discard")
+        with span("discard", folder=str(self.session.log_folder)) as discard_span:
+            try:
+                self.canoe.Measurement.Stop()
+            except Exception as e:
+                raise SessionError(f"Discard failed to stop measurement: {e}") from e
+
+            self._sleep(self._settle)
+            self.journal.close_session()
+            result = self._delete_session_files(self.session)
+            self.reset_session()
+            deleted, failed, removed_folder = result
+            discard_span.end(ok=not failed, deleted=deleted, failed=failed, removed_folder=removed_folder)
+        return result
+
+    def reset_session(self) -> None:
+        if self.session is not None:
+            self.journal.close_session()
+        if self._resolve_span is not None:
+            self._resolve_span.end(ok=False, error="session ended before resolution")
+            self._resolve_span = None
+        self.session = None
+
+    @staticmethod
+    def _delete_session_files(session: RecordingSession) -> tuple[int, int, bool]:
+        folder = session.log_folder
+        deleted = 0
+        failed = 0
+
+        try:
+            for p in session.files():
+                try:
+                    p.unlink()
+                    deleted += 1
+                except Exception:
+                    failed += 1
+        except Exception:
+            failed += 1
+
+        removed_folder = False
+        try:
+            if folder.exists() and not any(folder.iterdir()):
+                folder.rmdir()
+                removed_folder = True
+        except Exception:
+            removed_folder = False
+
+        return deleted, failed, removed_folder
+
+    # ---- comments ----
+    def resolve_comment_file(self) -> bool:
+        """
+        Single attempt to rename the comment file after the log container
+        CANoe created, i.e. "<prefix><MeasurementStart>.txt".
+        """
+        session = self.session
+        if session is None:
+            return False
+        suffix = session.resolve_suffix()
+        if suffix is None:
+            return False
+        new_path = (session.log_folder / f"{session.prefix}{suffix}.txt").resolve()
+        if session.comment_path != new_path:
+            # The journal writer owns the open file and performs the rename
+            # in order with any pending comments.
+            self.journal.rename(new_path)
+            session.comment_path = new_path
+        session.resolved = True
+        if self._resolve_span is not None:
+            self._resolve_span.end(suffix=suffix)
+            self._resolve_span = None
+        return True
+
+    def use_fallback_comment_file(self) -> Path | None:
+        """Give up on CANoe's suffix and name the comment file from the wall clock."""
+        session = self.session
+        if session is None:
+            return None
+        ts = datetime.now().strftime("%Y-%m-%d_%H-%M-%S")
+        session.comment_path = (session.log_folder / f"{session.prefix}{ts}.txt").resolve()
+        self.journal.rename(session.comment_path)
+        if self._resolve_span is not None:
+            self._resolve_span.end(ok=False, error="fallback to wall clock")
+            self._resolve_span = None
+        return session.comment_path
+
+    def add_comment(self, text: str, pressed_at: float | None = None) -> str:
+        """
+        Append "[HH:MM:SS.mmm] text" to the session's comment file, stamped at
+        pressed_at (a time.perf_counter() value, default now). Returns the line.
+        """
+        if pressed_at is None:
+            pressed_at = time.perf_counter()
+        if self.canoe is None or self.session is None:
+            raise SessionError("Cannot save comment (not recording)")
+        comment = (text or "").strip()
+        if not comment:
+            raise SessionError("Empty comment, not saved")
+
+        error = self.journal.last_error
+        if error:
+            self.journal.last_error = None
+            self._log(f"Comment writer reported: {error}")
+
+        line = f"[{self.format_timestamp(at=pressed_at)}] {comment}\n"
+        self.journal.append(CommentEntry(line=line, pressed_at=pressed_at))
+        self.session.comment_count += 1
+        return line
+
+    def format_timestamp(self, at: float | None = None) -> str:
+        """
+        Timestamp relative to measurement start.
+        Prefer the local clock model synced to CANoe, then CANoe's
+        Measurement.GetTime(); fallback to our wall-clock delta.
+        If `at` (a time.perf_counter() value) is given, the result is taken
+        at that instant so COM latency does not skew it.
+        """
+        seconds_float: float | None = None
+        if self.clock.synced:
+            local_ns = int(at * 1e9) if at is not None else None
+            seconds_float = self.clock.now_seconds(local_ns)
+            if seconds_float is not None:
+                return format_seconds(seconds_float)
+        if self.canoe is not None:
+            try:
+                seconds_float = float(self.canoe.Measurement.GetTime())
+            except Exception:
+                seconds_float = None
+        if seconds_float is None:
+            if self.session is not None:
+                seconds_float = max(0.0, self._wallclock() - self.session.started_wallclock)
+            else:
+                seconds_float = 0.0
+        if at is not None:
+            seconds_float = max(0.0, seconds_float - max(0.0, time.perf_counter() - at))
+        return format_seconds(seconds_float)
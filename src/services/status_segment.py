@@ -0,0 +1,187 @@
+from __future__ import annotations
+
+from dataclasses import dataclass
+from pathlib import Path
+import mmap
+import os
+import struct
+import time
+
+MAGIC = b"ANSWSTAT"
+LAYOUT_VERSION = 1
+
+# Fixed layout, little endian. The sequence counter is odd while a write is
+# in progress; readers retry until they see the same even value before and
+# after copying the payload (seqlock).
+#
+#   offset  size  field
+#   0       8     magic "ANSWSTAT"
+#   8       4     layout version
+#   12      4     (reserved)
+#   16      8     sequence
+#   24      ...   payload (_PAYLOAD)
+_HEADER = struct.Struct("<8sII")
+_SEQ = struct.Struct("<Q")
+_SEQ_OFFSET = _HEADER.size
+_PAYLOAD_OFFSET = _SEQ_OFFSET + _SEQ.size
+_PAYLOAD = struct.Struct(
+    "<"
+    "Q"      # updated_ns (time.time_ns of the write)
+    "B"      # connected
+    "B"      # measurement running
+    "6x"
+    "d"      # measurement time [s]
+    "I"      # comment count of the current session
+    "4x"
+    "32s"    # camera mode
+    "32s"    # ethernet status
+    "32s"    # flexray status
+    "32s"    # ethernet drops
+    "32s"    # flexray drops
+    "128s"   # session prefix
+)
+SEGMENT_SIZE = _PAYLOAD_OFFSET + _PAYLOAD.size
+
+
+@dataclass
+class StatusSnapshot:
+    connected: bool = False
+    running: bool = False
+    measurement_time: float = 0.0
+    comment_count: int = 0
+    camera_mode: str = ""
+    ethernet_status: str = ""
+    flexray_status: str = ""
+    ethernet_drops: str = ""
+    flexray_drops: str = ""
+    session_prefix: str = ""
+    updated_ns: int = 0
+
+
+def _encode(value: str, size: int) -> bytes:
+    # Truncate on a character boundary so readers always decode cleanly.
+    raw = (value or "").encode("utf-8")
+    while len(raw) > size:
+        value = value[:-1]
+        raw = value.encode("utf-8")
+    return raw
+
+
+def _decode(raw: bytes) -> str:
+    return raw.split(b"\0", 1)[0].decode("utf-8", errors="replace")
+
+
+class StatusSegment:
+    """
+    Writer side: the hub publishes its status into a fixed-size memory-mapped
+    file so local tools can read it without their own COM polling.
+    Only one writer (the hub) may exist per file.
+    """
+
+    def __init__(self, path: Path) -> None:
+        self.path = Path(path)
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        fd = os.open(self.path, os.O_RDWR | os.O_CREAT, 0o644)
+        try:
+            if os.fstat(fd).st_size != SEGMENT_SIZE:
+                os.ftruncate(fd, SEGMENT_SIZE)
+            self._map = mmap.mmap(fd, SEGMENT_SIZE, access=mmap.ACCESS_WRITE)
+        finally:
+            os.close(fd)
+        self._seq = _SEQ.unpack_from(self._map, _SEQ_OFFSET)[0]
+        if self._seq % 2:
+            self._seq += 1  # previous writer died mid-update
+        _HEADER.pack_into(self._map, 0, MAGIC, LAYOUT_VERSION, 0)
+        self.write_count = 0
+
+    def publish(self, snapshot: StatusSnapshot) -> None:
+        payload = _PAYLOAD.pack(
+            snapshot.updated_ns or time.time_ns(),
+            1 if snapshot.connected else 0,
+            1 if snapshot.running else 0,
+            float(snapshot.measurement_time),
+            max(0, int(snapshot.comment_count)) & 0xFFFFFFFF,
+            _encode(snapshot.camera_mode, 32),
+            _encode(snapshot.ethernet_status, 32),
+            _encode(snapshot.flexray_status, 32),
+            _encode(snapshot.ethernet_drops, 32),
+            _encode(snapshot.flexray_drops, 32),
+            _encode(snapshot.session_prefix, 128),
+        )
+        self._seq += 1
+        _SEQ.pack_into(self._map, _SEQ_OFFSET, self._seq)   # odd: write in progress
+        self._map[_PAYLOAD_OFFSET:SEGMENT_SIZE] = payload
+        self._seq += 1
+        _SEQ.pack_into(self._map, _SEQ_OFFSET, self._seq)   # even: consistent
+        self.write_count += 1
+
+    def close(self) -> None:
+        try:
+            self._map.flush()
+            self._map.close()
+        except (BufferError, ValueError):
+            pass
+
+
+class StatusSegmentReader:
+    """
+    Lock-free reader for a StatusSegment file; any number of processes may
+    read concurrently with the hub writing.
+    """
+
+    def __init__(self, path: Path) -> None:
+        self.path = Path(path)
+        with open(self.path, "rb") as f:
+            self._map = mmap.mmap(f.fileno(), SEGMENT_SIZE, access=mmap.ACCESS_READ)
+        magic, version, _reserved = _HEADER.unpack_from(self._map, 0)
+        if magic != MAGIC or version != LAYOUT_VERSION:
+            self._map.close()
+            raise ValueError(f"{self.path} is not a version {LAYOUT_VERSION} status segment")
+        self.retries = 0
+
+    @property
+    def sequence(self) -> int:
+        return _SEQ.unpack_from(self._map, _SEQ_OFFSET)[0]
+
+    def read(self, max_retries: int = 1000) -> StatusSnapshot | None:
+        """A consistent snapshot, or None if the writer kept it busy for max_retries attempts."""
+        for _ in range(max_retries):
+            before = _SEQ.unpack_from(self._map, _SEQ_OFFSET)[0]
+            if before % 2:
+                self.retries += 1
+                continue
+            payload = self._map[_PAYLOAD_OFFSET:SEGMENT_SIZE]
+            after = _SEQ.unpack_from(self._map, _SEQ_OFFSET)[0]
+            if before != after:
+                self.retries += 1
+                continue
+            (
+                updated_ns,
+                connected,
+                running,
+                measurement_time,
+                comment_count,
+                camera_mode,
+                ethernet_status,
+                flexray_status,
+                ethernet_drops,
+                flexray_drops,
+                session_prefix,
+            ) = _PAYLOAD.unpack(payload)
+            return StatusSnapshot(
+                connected=bool(connected),
+                running=bool(running),
+                measurement_time=measurement_time,
+                comment_count=comment_count,
+                camera_mode=_decode(camera_mode),
+                ethernet_status=_decode(ethernet_status),
+                flexray_status=_decode(flexray_status),
+                ethernet_drops=_decode(ethernet_drops),
+                flexray_drops=_decode(flexray_drops),
+                session_prefix=_decode(session_prefix),
+                updated_ns=updated_ns,
+            )
+        return None
+
+    def close(self) -> None:
+        self._map.close()
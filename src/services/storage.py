@@ -0,0 +1,172 @@
+from __future__ import annotations
+
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Callable
+import math
+import os
+import shutil
+import time
+
+
+@dataclass
+class StorageSample:
+    root: Path
+    free_bytes: int
+    total_bytes: int
+    session_bytes: int = 0    # files of the tracked recording
+    rate: float = 0.0         # smoothed write rate, bytes/s
+    time_to_full: float | None = None  # seconds at the current rate (None: not writing)
+
+    def describe(self) -> str:
+        text = f"Disk: {self.free_bytes / 1e9:.1f} GB free"
+        if self.rate > 0:
+            text += f", {self.rate / 1e6:.1f} MB/s"
+        if self.time_to_full is not None:
+            text += f", full in ~{format_duration(self.time_to_full)}"
+        return text
+
+
+def format_duration(seconds: float) -> str:
+    """Coarse human duration: "45 s", "12 min", "5 h 32 min"."""
+    seconds = max(0, int(seconds))
+    if seconds < 60:
+        return f"{seconds} s"
+    minutes = seconds // 60
+    if minutes < 60:
+        return f"{minutes} min"
+    hours, minutes = divmod(minutes, 60)
+    return f"{hours} h {minutes:02d} min"
+
+
+def _existing_ancestor(path: Path) -> Path:
+    # disk_usage() needs an existing path; the session folder may not exist yet.
+    for candidate in (path, *path.parents):
+        if candidate.exists():
+            return candidate
+    return path
+
+
+class StorageMonitor:
+    """
+    Free space and write rate of the log volume, sampled at low frequency.
+
+    While a recording is tracked, sample() sums the sizes of its files
+    (one scandir of the session folder) and smooths the growth with an EWMA
+    whose time constant is `smoothing` seconds, so a bursty writer (BLF
+    containers, video chunks) yields a steady rate. time_to_full is free
+    space over that rate. The last recording's rate is remembered as the
+    expected rate for the next Start.
+    """
+
+    def __init__(
+        self,
+        root: Path | None = None,
+        *,
+        smoothing: float = 10.0,
+        clock: Callable[[], float] = time.monotonic,
+        disk_usage: Callable[[str], tuple] = shutil.disk_usage,
+    ) -> None:
+        self.root = root
+        self.smoothing = smoothing
+        self.last_rate = 0.0       # smoothed rate of the previous recording
+        self._clock = clock
+        self._disk_usage = disk_usage
+        self._folder: Path | None = None
+        self._prefix = ""
+        self._since = 0.0
+        self._rate = 0.0
+        self._primed = False
+        self._last: tuple[float, int] | None = None  # (clock, session bytes)
+
+    @property
+    def tracking(self) -> bool:
+        return self._folder is not None
+
+    def track(self, folder: Path, prefix: str = "", since: float = 0.0) -> None:
+        """Follow the files of a recording: `prefix`* and _`prefix`* in folder, modified after `since` (epoch)."""
+        self._folder = Path(folder)
+        self._prefix = prefix
+        self._since = since
+        self._rate = 0.0
+        self._primed = False
+        self._last = None
+
+    def untrack(self) -> None:
+        if self._folder is not None and self._rate > 0:
+            self.last_rate = self._rate
+        self._folder = None
+        self._last = None
+        self._rate = 0.0
+
+    def session_bytes(self) -> int:
+        if self._folder is None:
+            return 0
+        total = 0
+        try:
+            with os.scandir(self._folder) as entries:
+                for entry in entries:
+                    # "_<prefix>..." are the video windows' AVIs, usually the biggest writer.
+                    if not entry.name.startswith((self._prefix, f"_{self._prefix}")) or not entry.is_file():
+                        continue
+                    stat = entry.stat()
+                    if stat.st_mtime + 1.0 >= self._since:
+                        total += stat.st_size
+        except OSError:
+            return self._last[1] if self._last is not None else 0
+        return total
+
+    def sample(self) -> StorageSample | None:
+        if self.root is None:
+            return None
+        root = _existing_ancestor(Path(self.root))
+        try:
+            usage = self._disk_usage(str(root))
+        except OSError:
+            return None
+        sample = StorageSample(root=root, free_bytes=usage.free, total_bytes=usage.total)
+        if self._folder is None:
+            return sample
+
+        now = self._clock()
+        size = self.session_bytes()
+        if self._last is not None:
+            then, previous = self._last
+            elapsed = now - then
+            if elapsed > 0:
+                instant = max(0, size - previous) / elapsed
+                if not self._primed:
+                    self._rate = instant  # seed with the first interval instead of ramping up from 0
+                    self._primed = True
+                else:
+                    weight = 1.0 - math.exp(-elapsed / self.smoothing)
+                    self._rate += weight * (instant - self._rate)
+        self._last = (now, size)
+        sample.session_bytes = size
+        sample.rate = self._rate
+        if self._rate > 0:
+            sample.time_to_full = usage.free / self._rate
+        return sample
+
+    def headroom_problem(self, min_seconds: float, default_rate: float) -> str | None:
+        """
+        Why a recording of min_seconds would not fit, or None if it would.
+        The rate is the last recording's, or default_rate (bytes/s) before
+        the first one.
+        """
+        if min_seconds <= 0:
+            return None
+        sample = self.sample()
+        if sample is None:
+            return None
+        rate = self.last_rate or default_rate
+        if rate <= 0:
+            return None
+        headroom = sample.free_bytes / rate
+        if headroom >= min_seconds:
+            return None
+        return (
+            f"Only {sample.free_bytes / 1e9:.1f} GB free on {sample.root} "
+            f"(~{format_duration(headroom)} at {rate / 1e6:.1f} MB/s, "
+            f"{format_duration(min_seconds)} required)"
+        )
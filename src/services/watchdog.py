@@ -0,0 +1,121 @@
+from __future__ import annotations
+
+from dataclasses import dataclass
+import queue
+import sys
+import threading
+import time
+import traceback
+
+from services.events import emit
+from services.histogram import Log2Histogram
+
+# Jitter bucket i counts heartbeats that arrived [2^(i-1), 2^i) ms late;
+# bucket 0 is < 1 ms.
+_JITTER_BUCKETS = 16
+
+
+@dataclass
+class StallReport:
+    stalled_for: float   # seconds since the last heartbeat when captured
+    stack: str           # main-thread stack at capture time
+
+
+class JitterHistogram(Log2Histogram):
+    """How late each heartbeat fired, in ms."""
+
+    def __init__(self) -> None:
+        super().__init__(_JITTER_BUCKETS)
+
+    @property
+    def max_ms(self) -> float:
+        return self.max_value
+
+    def describe(self) -> str:
+        if not self.count:
+            return "no heartbeats yet"
+        return (
+            f"{self.count} heartbeat(s), p50 <{self.percentile(50):.0f} ms, "
+            f"p99 <{self.percentile(99):.0f} ms, max {self.max_ms:.0f} ms late"
+        )
+
+    def to_dict(self) -> dict:
+        return {"count": self.count, "max_ms": round(self.max_ms, 1), "buckets": list(self.buckets)}
+
+
+class StallWatchdog:
+    """
+    Detects a blocked Tk event loop. The UI thread calls beat() from a
+    recurring after() callback; a monitor thread notices when no beat arrived
+    for `threshold` seconds and captures the main thread's stack with
+    sys._current_frames(). Reports are written to the event log at once and
+    handed to the UI thread on the next beat (the loop is stuck until then).
+    beat() also feeds a histogram of how late each heartbeat fired.
+    """
+
+    def __init__(
+        self,
+        *,
+        interval: float = 0.1,
+        threshold: float = 1.0,
+        thread_id: int | None = None,
+        clock=time.perf_counter,
+    ) -> None:
+        self.interval = interval
+        self.threshold = threshold
+        self.thread_id = thread_id if thread_id is not None else threading.main_thread().ident
+        self.jitter = JitterHistogram()
+        self.stall_count = 0
+        self._clock = clock
+        self._last_beat = clock()
+        self._stall_reported = False
+        self._reports: queue.Queue[StallReport] = queue.Queue()
+        self._stop = threading.Event()
+        self._thread: threading.Thread | None = None
+
+    def start(self) -> None:
+        if self._thread is not None:
+            return
+        self._last_beat = self._clock()
+        self._thread = threading.Thread(target=self._monitor, name="ui-watchdog", daemon=True)
+        self._thread.start()
+
+    def stop(self) -> None:
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join(timeout=1.0)
+            self._thread = None
+
+    def beat(self) -> list[StallReport]:
+        """Heartbeat from the UI thread; returns stall reports captured since the last one."""
+        now = self._clock()
+        gap = now - self._last_beat
+        self._last_beat = now
+        self.jitter.add((gap - self.interval) * 1000.0)
+        if self._stall_reported:
+            self._stall_reported = False
+            emit("ui_stall_end", duration_ms=round(gap * 1000.0, 1))
+        reports: list[StallReport] = []
+        while True:
+            try:
+                reports.append(self._reports.get_nowait())
+            except queue.Empty:
+                return reports
+
+    def capture_stack(self) -> str:
+        frame = sys._current_frames().get(self.thread_id)
+        if frame is None:
+            return "(main thread not found)"
+        return "".join(traceback.format_stack(frame))
+
+    def _monitor(self) -> None:
+        poll = max(0.05, self.threshold / 4.0)
+        while not self._stop.wait(poll):
+            stalled_for = self._clock() - self._last_beat
+            if stalled_for < self.threshold or self._stall_reported:
+                continue
+            self._stall_reported = True  # one report per stall
+            self.stall_count += 1
+            report = StallReport(stalled_for=stalled_for, stack=self.capture_stack())
+            emit("ui_stall", stalled_ms=round(stalled_for * 1000.0, 1), stack=report.stack)
+            self._reports.put(report)
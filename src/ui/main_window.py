@@ -1,5 +1,6 @@
 from __future__ import annotations
 
+from concurrent.futures import Future, ThreadPoolExecutor
 from datetime import datetime
 from pathlib import Path
 import os
@@ -14,30 +15,62 @@ import styles
 from core.state import (
     AppPaths,
     AppState,
+    ConnectionProfile,
     SW_MAJOR_RELEASES,
     SW_RELEASE_TYPES,
     SW_RELEASE_MINORS,
     ME_VERSIONS,
     VEHICLE_NUMBERS,
+    StateStore,
+    load_connection_profiles,
     load_vehicle_catalog,
-    save_state,
+    save_connection_profiles,
 )
+from services.archive import ArchivePipeline, parse_codecs
+from services.blf_tail import BlfTail
 from services.canoe import (
     CANoeInstallation,
     connect_canoe,
     discover_canoe_installations,
     get_logging_block_status,
     is_canoe_running,
-    load_canoe_config,
+    load_installation_cache,
     open_canoe_installation,
+    save_installation_cache,
     wait_for_process as _wait_for_process,
-    _normalize_path_key,
     _get_active_canoe,
     _extract_major_from_text,
     _major_from_hint,
     _prog_id_exists,
-    _attach_running_canoe,
-    _spawn_canoe_instance,
+    _attach_running_canoe_with_prog_id,
+    _spawn_canoe_instance_with_prog_id,
+)
+from services.clock import MeasurementClock
+from services.com_stats import ComStats
+from services.comments import CommentJournal
+from services.control_api import ControlCommand, ControlServer, load_or_create_token
+from services.events import emit, span
+from services.cfg_index import CfgSummary, load_cfg_summary
+from services.fingerprint import FingerprintStore
+from services.integrity import IntegrityVerifier, SessionIntegrity, record_path
+from services.manifest import HashCache, build_manifest
+from services.mover import SessionMover, job_for_files
+from services.prewarm import CANoePrewarmer, prewarmer_for_installation
+from services.logging_plan import plan_from_cfg_summary
+from services.registry import ComRegistryIndex, normalize_path_key
+from services.scheduler import PRIORITY_BACKGROUND, PRIORITY_IO, PRIORITY_UI, Backoff, TaskScheduler
+from services.storage import StorageMonitor, format_duration
+from services.status_segment import StatusSegment, StatusSnapshot
+from services.watchdog import StallWatchdog
+from services.session import (
+    RecordingSession,
+    SessionController,
+    SessionError,
+    SessionMetadata,
+    format_seconds,
+    session_naming,
+    vehicle_descriptor,
+    vehicle_token,
 )
 
 class MainWindow(ctk.CTk):
@@ -47,21 +80,40 @@ class MainWindow(ctk.CTk):
     and operator comments tagged with timestamp.
     """
 
-    def __init__(self, *, paths: AppPaths, state: AppState) -> None:
+    def __init__(self, *, paths: AppPaths, state: AppState, state_store: StateStore | None = None) -> None:
         super().__init__()
 
         self.paths = paths
+        self.state_store = state_store if state_store is not None else StateStore(paths, state)
+        # CANoe handle, logging plan, clock and the current recording live in
+        # the UI-independent session controller; self.canoe delegates to it.
+        self.session = SessionController(
+            CommentJournal(self.paths.data_dir / "comment_journal.jsonl"),
+            clock=MeasurementClock(),
+            fingerprints=FingerprintStore(self.paths.data_dir / "fingerprints.json"),
+            cfg_cache_dir=self.paths.data_dir / "cfg_index",
+            com_stats=ComStats() if state.com_stats else None,
+            log=lambda message: self._debug_log(message),
+        )
         self.is_recording = False
-        self.canoe = None  # COM object
         self.last_meas_running: bool | None = None  # last known Measurement.Running
-
-        # Comment/log resolution state
-        self.comment_file_path: Path | None = None
-        self._current_log_folder: Path | None = None
-        self._current_prefix: str | None = None  # e.g. "R300RC1_VEH123_tag_"
-        self._resolve_tries: int = 0
-        self._record_start_wallclock: float | None = None  # wall clock when Start was pressed
-        self._comment_metadata_written: bool = False  # ensures metadata header written once
+        self._fingerprints = self.session.fingerprints
+        self.measurement_clock = self.session.clock
+        self.comment_journal = self.session.journal
+        self._resolve_tries: int = 0  # comment file name resolution polls
+        # Every recurring job (polls, timers, API drain) is a scheduler task
+        # driven by one after() callback; see _rearm_scheduler().
+        self.scheduler = TaskScheduler(budget=0.03, log=lambda message: self._debug_log(message))
+        self._scheduler_after: str | None = None
+        # Live status for local tools (see services.status_segment); optional.
+        try:
+            self.status_segment: StatusSegment | None = StatusSegment(self.paths.data_dir / "status.seg")
+        except (OSError, ValueError) as exc:
+            print(f"[DEBUG] Status segment unavailable: {exc!r}")
+            self.status_segment = None
+        self._segment_snapshot = StatusSnapshot()
+        self.watchdog = StallWatchdog(interval=0.1, threshold=1.0)
+        recovered_comments = self.comment_journal.recover()
 
         # --- Window ---
         self.app_title_base = "anSWer Logging Hub"
@@ -85,17 +137,54 @@ class MainWindow(ctk.CTk):
         self.vehicle_catalog = load_vehicle_catalog(self.paths.root)
         self._vehicle_label_to_id: dict[str, str] = {}
         self.canoe_install_var = tk.StringVar(value="")
+        self._connection_profiles: dict[str, ConnectionProfile] = load_connection_profiles(paths)
         self._installations_by_label: dict[str, CANoeInstallation] = {}
         self._exec_key_to_label: dict[str, str] = {}
+        self._registry_index = ComRegistryIndex()
+        self._installation_cache_file = self.paths.data_dir / "canoe_cache.json"
         self._initial_canoe_exec = state.canoe_exec or ""
         default_log_dir = (state.log_dir or "").strip() or str(self.paths.log_dir)
         self.log_dir_var = tk.StringVar(value=default_log_dir)
+        self.prewarm_var = tk.BooleanVar(value=bool(state.prewarm))
+        self._prewarmer: CANoePrewarmer | None = None
+        self._control_port = int(state.control_port or 0)
+        self._min_record_minutes = float(state.min_record_minutes or 0.0)
+        self._disk_warn_minutes = float(state.disk_warn_minutes or 0.0)
+        self._expected_write_mb_s = float(state.expected_write_mb_s or 0.0)
+        self._staging_dir = (state.staging_dir or "").strip()
+        self._mover_limit_mb_s = float(state.mover_limit_mb_s or 0.0)
+        self.hash_cache = HashCache(self.paths.data_dir / "hash_cache.json")
+        self.mover = SessionMover(
+            self.paths.data_dir / "mover_queue.json", limit=self._mover_limit_mb_s * 1e6, cache=self.hash_cache
+        )
+        self._archive_dir = (state.archive_dir or "").strip()
+        self._archive_workers = int(state.archive_workers or 2)
+        self._archive_codecs = (state.archive_codecs or "").strip()
+        self._archive_delete_source = bool(state.archive_delete_source)
+        self.archiver: ArchivePipeline | None = None
+        self._archive_scan_interval = 600.0
+        self._archive_scanned_at = 0.0
+        self._archive_moves_seen = 0
+        self._active_recording: RecordingSession | None = None
+        self.verifier = IntegrityVerifier()
+        self._verify_executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="integrity")
+        self._verify_due: list[tuple[float, RecordingSession]] = []
+        self._verify_running: list[tuple[Future, RecordingSession, list[Path]]] = []
+        self._manifest_running: list[tuple[Future, RecordingSession]] = []
+        self.storage = StorageMonitor()
+        self._storage_var = tk.StringVar(value="Disk: --")
+        self._storage_warned = False
+        self.control_server: ControlServer | None = None
+        self._last_status: tuple[str, str] = ("", "muted")
         self._record_timer_var = tk.StringVar(value="Recording time: --:--:--.---")
         self._camera_mode_var = tk.StringVar(value="Camera mode: --")
         self._ethernet_status_var = tk.StringVar(value="Ethernet: --")
         self._flexray_status_var = tk.StringVar(value="Flexray: --")
         self._ethernet_drops_var = tk.StringVar(value="Ethernet drops: --")
         self._flexray_drops_var = tk.StringVar(value="Flexray drops: --")
+        self._blf_tail_var = tk.StringVar(value="Logging: --")
+        self._blf_tail: BlfTail | None = None
+        self._blf_tail_stall_logged = False
         self._hint_popup: ctk.CTkToplevel | None = None
         self._theme_mode: str = "neutral"
         self._theme_cards: list[ctk.CTkFrame] = []
@@ -106,17 +195,79 @@ class MainWindow(ctk.CTk):
         # Build UI
         self._build_body()
         self._update_titles_with_release()
-        self._refresh_canoe_installations(preferred_exec=self._initial_canoe_exec or None)
+        self._refresh_canoe_installations(preferred_exec=self._initial_canoe_exec or None, rescan=False)
         self._install_exception_hooks()
+        self.protocol("WM_DELETE_WINDOW", self._on_close)
+        if recovered_comments is not None:
+            self._debug_log(f"Recovered comments from interrupted session into {recovered_comments}")
+
+        # A persisted installation choice wins over the cfg's saved version.
+        self.after(0, lambda: self._preflight_cfg(pick_installation=not self._initial_canoe_exec))
+        if self._control_port:
+            self.after(0, self._start_control_api)
 
         # Focus window
         self.after(0, self.focus_set)
         self.update_idletasks()
         self.lift()
 
-        # Start periodic polling of CANoe measurement state
-        self.after(500, self._sync_measurement_ui)
-        self.after(1500, self._process_poll_tick)
+        # Periodic polling of CANoe measurement state, status sysvars and the process
+        self.scheduler.add(
+            "measurement", self._sync_measurement_ui, self._measurement_poll_interval, priority=PRIORITY_UI, delay=0.5
+        )
+        self.scheduler.add(
+            "record_timer",
+            self._tick_record_timer,
+            lambda: 0.05 if self.is_recording else 0.5,
+            priority=PRIORITY_UI,
+            delay=0.05,
+        )
+        self.scheduler.add(
+            "status_sysvars",
+            self._refresh_status_sysvars,
+            self._sysvar_poll_interval,
+            priority=PRIORITY_IO,
+            delay=0.5,
+            max_backoff=10.0,
+        )
+        self.scheduler.add(
+            "process_poll",
+            self._process_poll_tick,
+            self._process_poll_interval,
+            priority=PRIORITY_BACKGROUND,
+            delay=1.5,
+        )
+        self.scheduler.add(
+            "storage",
+            self._sample_storage,
+            lambda: 2.0 if self.is_recording else 15.0,
+            priority=PRIORITY_BACKGROUND,
+            delay=1.0,
+        )
+        self.scheduler.add("mover", self._poll_mover, 1.0, priority=PRIORITY_BACKGROUND, delay=1.0)
+        if self.mover.pending():
+            self._debug_log(f"Resuming {len(self.mover.pending())} pending staging move(s).")
+        self.mover.start()
+        self.archiver = self._make_archiver()
+        if self.archiver is not None:
+            self.scheduler.add("archive", self._poll_archiver, 1.0, priority=PRIORITY_BACKGROUND, delay=5.0)
+            if self.archiver.pending():
+                self._debug_log(f"Resuming {len(self.archiver.pending())} pending archive job(s).")
+            self.archiver.start()
+        self._rearm_scheduler()
+        # The watchdog keeps its own after() chain so it also sees a stuck scheduler.
+        self.watchdog.start()
+        self.after(100, self._watchdog_tick)
+
+    @property
+    def canoe(self):
+        """COM object of the connected CANoe (owned by the session controller)."""
+        return self.session.canoe
+
+    @canoe.setter
+    def canoe(self, value) -> None:
+        self.session.canoe = value
+        self._wake_tasks("measurement", "status_sysvars", "process_poll")
 
     def _install_exception_hooks(self) -> None:
         def handle_exception(exc_type, exc_value, exc_tb):
@@ -273,6 +424,14 @@ class MainWindow(ctk.CTk):
         styles.style_button(btn_browse, variant="neutral", size="sm", roundness="md")
         btn_browse.grid(row=0, column=1, sticky="e")
 
+        prewarm_switch = ctk.CTkSwitch(
+            connect_card,
+            text="Pre-warm CANoe when the hub starts",
+            variable=self.prewarm_var,
+            command=self._persist_state_snapshot,
+        )
+        prewarm_switch.grid(row=6, column=0, sticky="w", padx=pad_x, pady=(0, pad_y))
+
         # ---- Session metadata ----
         session_card = styles.card(self.body)
         session_card.grid(row=1, column=1, sticky="nsew", padx=(column_gap, 0), pady=(0, pad_y))
@@ -432,6 +591,15 @@ class MainWindow(ctk.CTk):
         styles.style_button(browse_log_btn, variant="neutral", size="sm", roundness="md")
         browse_log_btn.grid(row=0, column=2, sticky="e")
 
+        preview_btn = ctk.CTkButton(
+            log_dir_row,
+            text="Preview",
+            command=self._preview_logging_plan,
+            width=100,
+        )
+        styles.style_button(preview_btn, variant="neutral", size="sm", roundness="md")
+        preview_btn.grid(row=0, column=3, sticky="e", padx=(6, 0))
+
         action_hint = ctk.CTkLabel(
             action_card,
             text="Start/stop CANoe logging once metadata is ready.",
@@ -479,6 +647,7 @@ class MainWindow(ctk.CTk):
         status_row.grid_columnconfigure(3, weight=1)
         status_row.grid_rowconfigure(0, weight=1)
         status_row.grid_rowconfigure(1, weight=0)
+        status_row.grid_rowconfigure(2, weight=0)
 
         self.record_timer_label = ctk.CTkLabel(
             status_row,
@@ -531,6 +700,22 @@ class MainWindow(ctk.CTk):
         styles.style_label(self.flexray_drops_label, kind="body")
         self.flexray_drops_label.grid(row=1, column=3, sticky="nsew", pady=(2, 0))
 
+        self.blf_tail_label = ctk.CTkLabel(
+            status_row,
+            textvariable=self._blf_tail_var,
+            anchor="center",
+        )
+        styles.style_label(self.blf_tail_label, kind="body")
+        self.blf_tail_label.grid(row=1, column=0, columnspan=2, sticky="nsew", pady=(2, 0))
+
+        self.storage_label = ctk.CTkLabel(
+            status_row,
+            textvariable=self._storage_var,
+            anchor="center",
+        )
+        styles.style_label(self.storage_label, kind="body")
+        self.storage_label.grid(row=2, column=0, columnspan=4, sticky="nsew", pady=(2, 0))
+
         # ---- Comment workspace ----
         self.comment_card = styles.card(self.body)
         self.comment_card.grid(row=4, column=0, columnspan=2, sticky="nsew")
@@ -611,6 +796,24 @@ class MainWindow(ctk.CTk):
         styles.style_button(self.btn_clear_debug, variant="neutral", size="sm", roundness="md")
         self.btn_clear_debug.grid(row=0, column=1, sticky="e")
 
+        btn_com_stats = ctk.CTkButton(
+            debug_header,
+            text="COM stats",
+            width=90,
+            command=self._log_com_stats,
+        )
+        styles.style_button(btn_com_stats, variant="neutral", size="sm", roundness="md")
+        btn_com_stats.grid(row=0, column=2, sticky="e", padx=(6, 0))
+
+        btn_task_stats = ctk.CTkButton(
+            debug_header,
+            text="Task stats",
+            width=90,
+            command=self._log_scheduler_stats,
+        )
+        styles.style_button(btn_task_stats, variant="neutral", size="sm", roundness="md")
+        btn_task_stats.grid(row=0, column=3, sticky="e", padx=(6, 0))
+
         self.debug_text = ctk.CTkTextbox(self.debug_card, height=110, wrap="word")
         styles.style_textbox(self.debug_text, roundness="md")
         self.debug_text.grid(row=1, column=0, sticky="nsew", padx=pad_x, pady=(0, pad_y))
@@ -698,6 +901,8 @@ class MainWindow(ctk.CTk):
         label = getattr(self, "status", None)
         if label is not None:
             label.configure(text=text, fg_color=fg_color, text_color=text_color)
+        self._last_status = (text, tone)
+        self._publish_status()
 
     def _apply_overall_theme(self, mode: str) -> None:
         if mode == self._theme_mode:
@@ -821,28 +1026,14 @@ class MainWindow(ctk.CTk):
         return major or "", release_type or "", minor or ""
 
     def _vehicle_descriptor(self, vehicle_id: str | None = None) -> str:
-        vid = (vehicle_id or self.vehicle_id.get() or "").strip()
-        return (self.vehicle_catalog.get(vid) or "").strip() if self.vehicle_catalog else ""
+        return vehicle_descriptor(vehicle_id or self.vehicle_id.get() or "", self.vehicle_catalog)
 
     def _vehicle_model_tag(self, include_id_fallback: bool = True) -> str:
         """
-        Build a compact vehicle token like 'XC60_Veh6'.
+        Build a compact vehicle token like 'XC60_Veh6' (services.session.vehicle_token).
         Includes descriptor + fleet number; falls back to vehicle ID if needed.
         """
-        vehicle_id = (self.vehicle_id.get() or "").strip()
-        desc = self._vehicle_descriptor(vehicle_id)
-        number_tag = self._vehicle_number_tag(vehicle_id)
-        sanitize = lambda value: (value or "").replace(" ", "_")
-
-        parts: list[str] = []
-        if desc:
-            parts.append(sanitize(desc))
-        if number_tag:
-            parts.append(number_tag)
-        elif include_id_fallback and vehicle_id:
-            parts.append(sanitize(vehicle_id))
-
-        return "_".join([p for p in parts if p])
+        return vehicle_token(self.vehicle_id.get() or "", self.vehicle_catalog, include_id_fallback=include_id_fallback)
 
     def _app_title(self) -> str:
         rel = (self.sw_rel.get() or "").strip()
@@ -905,11 +1096,6 @@ class MainWindow(ctk.CTk):
         self._persist_state_snapshot()
         self._update_titles_with_release()
 
-    def _vehicle_number_tag(self, vehicle_id: str) -> str:
-        normalized = (vehicle_id or "").strip().upper()
-        number = VEHICLE_NUMBERS.get(normalized)
-        return f"Veh{number}" if number is not None else ""
-
     def _vehicle_prefix_component(self) -> str:
         """
         Token used in file/folder names. Prefer descriptor + fleet number (e.g. XC60_Veh6).
@@ -926,10 +1112,55 @@ class MainWindow(ctk.CTk):
             vehicle_id=self.vehicle_id.get(),
             canoe_exec=self._selected_canoe_exec_string() or "",
             log_dir=self.log_dir_var.get(),
+            prewarm=bool(self.prewarm_var.get()),
+            com_stats=self.session.com_stats is not None,
+            control_port=self._control_port,
+            min_record_minutes=self._min_record_minutes,
+            disk_warn_minutes=self._disk_warn_minutes,
+            expected_write_mb_s=self._expected_write_mb_s,
+            staging_dir=self._staging_dir,
+            mover_limit_mb_s=self._mover_limit_mb_s,
+            archive_dir=self._archive_dir,
+            archive_workers=self._archive_workers,
+            archive_codecs=self._archive_codecs,
+            archive_delete_source=self._archive_delete_source,
         )
 
-    def _persist_state_snapshot(self) -> None:
-        save_state(state=self._gather_state(), paths=self.paths)
+    def _persist_state_snapshot(self, *, flush: bool = False) -> None:
+        """
+        Hand the current UI state to the write-behind store.
+        Rapid edits are coalesced; flush=True writes synchronously.
+        """
+        self.state_store.update(self._gather_state())
+        if flush:
+            self.state_store.flush()
+
+    def _on_close(self) -> None:
+        self.watchdog.stop()
+        emit("ui_jitter", stalls=self.watchdog.stall_count, **self.watchdog.jitter.to_dict())
+        emit("scheduler_stats", **self.scheduler.stats_dict())
+        self.mover.stop()
+        if self.archiver is not None:
+            self.archiver.stop()
+        self._verify_executor.shutdown(wait=False, cancel_futures=True)
+        if self._scheduler_after is not None:
+            self.after_cancel(self._scheduler_after)
+            self._scheduler_after = None
+        try:
+            self._persist_state_snapshot(flush=True)
+        except Exception as exc:
+            print(f"[DEBUG] Failed to flush state on exit: {exc!r}")
+        self.comment_journal.shutdown()
+        if self.control_server is not None:
+            self.control_server.stop()
+        if self.status_segment is not None:
+            # Readers keep the file mapped: leave them "disconnected, not
+            # running" rather than the last live state.
+            self._segment_snapshot = StatusSnapshot()
+            self._publish_status_segment()
+        if self.status_segment is not None:
+            self.status_segment.close()
+        self.destroy()
 
     # -------------------- Polling / UI sync --------------------
     def _read_sysvar_value(self, fieldname: str) -> str | None:
@@ -967,6 +1198,7 @@ class MainWindow(ctk.CTk):
         - Record button text/style
         - Save comment button enabled/disabled
         - Status label
+        The status sysvars are refreshed separately (_refresh_status_sysvars).
         """
         try:
             running = bool(self.canoe.Measurement.Running) if self.canoe else False
@@ -976,9 +1208,21 @@ class MainWindow(ctk.CTk):
             self.canoe = None
             self._update_launch_button_state()
 
+        if running:
+            self._resync_measurement_clock()
+
         if running != self.last_meas_running:
+            if not running and self.measurement_clock.synced:
+                self._debug_log(f"Measurement clock: {self.measurement_clock.describe()}")
+            if not running and self.last_meas_running:
+                self._log_com_stats()
+                self._finish_recording()
+            if not running:
+                self.measurement_clock.reset()
             self.last_meas_running = running
             self.is_recording = running
+            # Intervals depend on the recording state; re-plan right away.
+            self._wake_tasks("record_timer", "status_sysvars", "process_poll")
 
             if running:
                 # Measurement running
@@ -1011,8 +1255,16 @@ class MainWindow(ctk.CTk):
                     styles.style_button(self.btn_discard, variant="neutral")
                     self._set_status("⏹ Measurement stopped", tone="info")
 
-        elapsed_display = self._format_measurement_timestamp() if running else "--:--:--.---"
-        self._record_timer_var.set(f"Recording time: {elapsed_display}")
+        if not running:
+            self._record_timer_var.set("Recording time: --:--:--.---")
+
+    def _refresh_status_sysvars(self) -> Backoff | None:
+        """
+        Read the anSWer status sysvars into the status card, then publish the
+        live status (control API, status segment). Returns Backoff when none
+        of them can be read while connected so the scheduler slows the poll.
+        """
+        running = bool(self.is_recording)
         camera_mode = self._read_sysvar_value("anSWer_SysVal::Camera_Mode")
         self._camera_mode_var.set(f"Camera mode: {camera_mode or '--'}")
         ethernet_status = self._read_sysvar_value("anSWer_SysVal::Network_Status::Ethernet")
@@ -1056,9 +1308,180 @@ class MainWindow(ctk.CTk):
         else:
             status_bg = styles.Palette.CARD_DARK
         self.status_card.configure(fg_color=(status_bg, status_bg))
+        self._publish_status()
+
+        recording = self.session.session
+        self._segment_snapshot = StatusSnapshot(
+            connected=self.canoe is not None,
+            running=running,
+            measurement_time=(self.measurement_clock.now_seconds() or 0.0) if running else 0.0,
+            comment_count=recording.comment_count if recording is not None else 0,
+            camera_mode=camera_mode or "",
+            ethernet_status=ethernet_status or "",
+            flexray_status=flexray_status or "",
+            ethernet_drops=ethernet_drops or "",
+            flexray_drops=flexray_drops or "",
+            session_prefix=recording.prefix if recording is not None else "",
+        )
+        self._publish_status_segment()
+
+        values = (camera_mode, ethernet_status, flexray_status, ethernet_drops, flexray_drops)
+        if self.canoe is not None and all(value is None for value in values):
+            return Backoff("no anSWer_SysVal system variables readable")
+        return None
+
+    def _measurement_poll_interval(self) -> float:
+        if self.canoe is None:
+            return 2.0
+        return 0.5 if self.is_recording else 1.0
+
+    def _sysvar_poll_interval(self) -> float:
+        if self.canoe is None:
+            return 5.0
+        return 0.5 if self.is_recording else 2.0
+
+    def _process_poll_interval(self) -> float:
+        # Only the launch button uses it, and that button is fixed while connected.
+        return 1.5 if self.canoe is None else 10.0
+
+    def _publish_status_segment(self) -> None:
+        if self.status_segment is None:
+            return
+        self._segment_snapshot.updated_ns = 0  # stamped by publish()
+        try:
+            self.status_segment.publish(self._segment_snapshot)
+        except Exception as exc:
+            self._debug_log(f"Status segment write failed; disabling it: {exc!r}")
+            self.status_segment = None
+
+    def _watchdog_tick(self) -> None:
+        """Event-loop heartbeat; logs stacks the watchdog captured during a stall."""
+        for report in self.watchdog.beat():
+            self._debug_log(
+                f"UI thread stalled for {report.stalled_for:.1f}+ s (stall #{self.watchdog.stall_count}); "
+                f"main thread was at:\n{report.stack.rstrip()}"
+            )
+            self._debug_log(f"Event-loop jitter: {self.watchdog.jitter.describe()}")
+        self.after(100, self._watchdog_tick)
+
+    # -------------------- Scheduler --------------------
+    def _rearm_scheduler(self) -> None:
+        """(Re)arm the single after() callback that drives all scheduler tasks."""
+        if self.scheduler.in_tick:
+            return  # _scheduler_tick re-arms once the current tick is done
+        if self._scheduler_after is not None:
+            self.after_cancel(self._scheduler_after)
+        delay = self.scheduler.next_delay()
+        delay_ms = 1000 if delay is None else min(1000, max(1, int(delay * 1000)))
+        self._scheduler_after = self.after(delay_ms, self._scheduler_tick)
+
+    def _scheduler_tick(self) -> None:
+        self._scheduler_after = None
+        if not self.winfo_exists():
+            return
+        self.scheduler.tick()
+        self._rearm_scheduler()
+
+    def _wake_tasks(self, *names: str) -> None:
+        for name in names:
+            self.scheduler.wake(name)
+        self._rearm_scheduler()
 
-        # schedule next poll
-        self.after(500, self._sync_measurement_ui)
+    def _resync_measurement_clock(self) -> None:
+        """Feed the local clock model a fresh Measurement.GetTime() sample when due."""
+        self.session.sync_clock()
+
+    def _tick_record_timer(self) -> None:
+        """
+        Refresh the recording timer at display rate from the local clock
+        model; no COM calls happen here. Until the model has synced, a
+        wall-clock estimate since Start is shown, marked with "~".
+        """
+        if not self.is_recording:
+            return
+        if self.measurement_clock.synced:
+            seconds = self.measurement_clock.now_seconds() or 0.0
+            self._record_timer_var.set(f"Recording time: {format_seconds(seconds)}")
+            self._segment_snapshot.measurement_time = seconds
+            self._publish_status_segment()
+            return
+        recording = self.session.session
+        if recording is not None:
+            estimate = max(0.0, time.time() - recording.started_wallclock)
+            self._record_timer_var.set(f"Recording time: ~{format_seconds(estimate)}")
+
+    # -------------------- Local control API --------------------
+    def _start_control_api(self) -> None:
+        token_file = self.paths.data_dir / "control_token"
+        try:
+            token = load_or_create_token(token_file)
+        except OSError as e:
+            self._debug_log(f"Control API disabled, no token in {token_file}: {e}")
+            return
+        server = ControlServer(port=self._control_port, token=token)
+        if not server.start():
+            self._debug_log(f"Control API could not listen on 127.0.0.1:{self._control_port}: {server.last_error}")
+            return
+        self.control_server = server
+        self._debug_log(f"Control API listening on http://127.0.0.1:{server.port} (X-Hub-Token from {token_file})")
+        self._publish_status()
+        self.scheduler.add("control_api", self._drain_control_commands, 0.05, priority=PRIORITY_UI)
+        self._rearm_scheduler()
+
+    def _drain_control_commands(self) -> bool | None:
+        server = self.control_server
+        if server is None:
+            return False
+        for command in server.pending_commands():
+            try:
+                result = self._handle_control_command(command)
+            except Exception as exc:
+                result = {"ok": False, "error": repr(exc)}
+            command.resolve(result)
+
+    def _handle_control_command(self, command: ControlCommand) -> dict:
+        """Run an API command on the UI thread, through the same handlers as the buttons."""
+        self._debug_log(f"Control API: {command.action}")
+        action = command.action
+        if action == "connect":
+            self._open_or_connect_canoe()
+        elif action in ("start", "stop"):
+            try:
+                running = self.session.measurement_running()
+            except SessionError as e:
+                return {"ok": False, "error": str(e)}
+            if running == (action == "start"):
+                return {"ok": False, "error": f"Measurement already {'running' if running else 'stopped'}"}
+            self._on_start_stop_click()
+        elif action == "discard":
+            self._on_discard_click()
+        elif action == "comment":
+            if not self.is_recording or self.session.session is None:
+                return {"ok": False, "error": "Cannot save comment (not recording)"}
+            try:
+                line = self.session.add_comment(str(command.payload.get("text", "")))
+            except SessionError as e:
+                return {"ok": False, "error": str(e)}
+            self._set_status(f"💬 Comment saved to {self.session.session.comment_path.name}", tone="success")
+            return {"ok": True, "line": line.rstrip("\n"), **self._status_snapshot()}
+        _text, tone = self._last_status
+        return {"ok": tone != "danger", **self._status_snapshot()}
+
+    def _status_snapshot(self) -> dict:
+        recording = self.session.session
+        text, tone = self._last_status
+        return {
+            "connected": self.canoe is not None,
+            "recording": bool(self.is_recording),
+            "status": text,
+            "tone": tone,
+            "comment_file": str(recording.comment_path) if recording is not None else None,
+        }
+
+    def _publish_status(self) -> None:
+        server = getattr(self, "control_server", None)
+        if server is not None:
+            server.publish_status(self._status_snapshot())
 
     # -------------------- File dialog --------------------
     def _choose_cfg(self) -> None:
@@ -1069,6 +1492,66 @@ class MainWindow(ctk.CTk):
         )
         if path:
             self.canoe_config.set(path)
+            self._preflight_cfg()
+
+    def _preflight_cfg(self, *, pick_installation: bool = True) -> None:
+        """
+        Scan the selected .cfg offline (cached by content hash) and report
+        what it references before CANoe is involved. With pick_installation
+        the installation matching the CANoe version the cfg was saved with is
+        preselected (see _select_installation_for_cfg).
+        """
+        cfg = (self.canoe_config.get() or "").strip()
+        self.session.cfg_summary = None
+        if not cfg or not Path(cfg).is_file():
+            return
+        started = time.perf_counter()
+        try:
+            summary = load_cfg_summary(cfg, self.paths.data_dir / "cfg_index")
+        except Exception as exc:
+            self._debug_log(f"Cfg preflight failed for '{cfg}': {exc!r}")
+            return
+        self.session.cfg_summary = summary
+        self._debug_log(
+            f"Cfg preflight ({(time.perf_counter() - started) * 1000.0:.0f} ms): CANoe {summary.canoe_version or '?'}, "
+            f"{len(summary.databases)} database(s), {len(summary.capl_nodes)} CAPL file(s), "
+            f"{len(summary.logging_targets)} logging block(s), {len(summary.video_files)} video window(s)."
+        )
+        for target in summary.logging_targets:
+            self._debug_log(f"Cfg logging block currently targets {target}")
+        missing = summary.missing_files()
+        for path in missing:
+            self._debug_log(f"Cfg references missing file: {path}")
+        if missing:
+            self._set_status(f"⚠️ Cfg references {len(missing)} missing file(s)", tone="warning")
+        if pick_installation:
+            self._select_installation_for_cfg(summary)
+
+    def _select_installation_for_cfg(self, summary: CfgSummary) -> None:
+        """
+        Default the installation dropdown to one whose major version matches
+        the CANoe version recorded in the cfg, unless the current selection
+        already matches or CANoe is connected.
+        """
+        if self.canoe is not None or not summary.canoe_version:
+            return
+        major = _extract_major_from_text(summary.canoe_version)
+        if major is None:
+            return
+        current = self._selected_canoe_installation()
+        if current is not None and _major_from_hint(current.version_hint) == major:
+            return
+        match = next(
+            (inst for inst in self._installations_by_label.values() if _major_from_hint(inst.version_hint) == major),
+            None,
+        )
+        if match is None:
+            self._debug_log(f"Cfg was saved with CANoe {summary.canoe_version}; no matching installation found.")
+            return
+        self.install_dropdown.set(match.label)
+        self.canoe_install_var.set(match.label)
+        self._debug_log(f"Cfg was saved with CANoe {summary.canoe_version}; selected '{match.label}'.")
+        self._on_canoe_version_change()
 
     def _choose_log_dir(self) -> None:
         """Folder picker to choose where logs should be stored."""
@@ -1094,6 +1577,19 @@ class MainWindow(ctk.CTk):
         except Exception:
             return None
 
+    def _staging_root(self) -> Path | None:
+        if not self._staging_dir:
+            return None
+        return Path(os.path.expandvars(self._staging_dir)).expanduser()
+
+    def _recording_root(self) -> Path | None:
+        """Where CANoe writes: the local staging folder if configured, else the log directory."""
+        staging = self._staging_root()
+        if staging is None:
+            return self._resolve_log_root()
+        staging.mkdir(parents=True, exist_ok=True)
+        return staging
+
     def _selected_canoe_installation(self) -> CANoeInstallation | None:
         label = self.canoe_install_var.get()
         return self._installations_by_label.get(label)
@@ -1111,11 +1607,29 @@ class MainWindow(ctk.CTk):
             self._persist_state_snapshot()
         self._update_launch_button_state()
 
-    def _refresh_canoe_installations(self, preferred_exec: str | None = None) -> None:
-        installs = discover_canoe_installations()
+    def _refresh_canoe_installations(self, preferred_exec: str | None = None, *, rescan: bool = True) -> None:
+        """
+        Fill the installation dropdown. With rescan=False the list and COM
+        registry index are restored from canoe_cache.json when still valid;
+        otherwise the registry is enumerated once and the disk is rescanned.
+        """
+        installs: list[CANoeInstallation] | None = None
+        if not rescan:
+            cached = load_installation_cache(self._installation_cache_file)
+            if cached is not None:
+                installs, self._registry_index = cached
+                self._debug_log("Installation list restored from cache.")
+        if installs is None:
+            self._registry_index = ComRegistryIndex.build()
+            installs = discover_canoe_installations(self._registry_index)
+            self._debug_log(f"COM registry index: {len(self._registry_index)} CANoe ProgID(s).")
+            try:
+                save_installation_cache(self._installation_cache_file, installs, self._registry_index)
+            except Exception as exc:
+                self._debug_log(f"Could not save installation cache: {exc!r}")
         self._installations_by_label = {inst.label: inst for inst in installs}
         self._exec_key_to_label = {
-            _normalize_path_key(inst.exec_path): inst.label for inst in installs
+            normalize_path_key(inst.exec_path): inst.label for inst in installs
         }
         self._debug_log(f"Installation refresh: discovered {len(installs)} entries.")
 
@@ -1133,7 +1647,7 @@ class MainWindow(ctk.CTk):
 
         target_label = None
         if preferred_exec:
-            preferred_key = _normalize_path_key(preferred_exec)
+            preferred_key = normalize_path_key(preferred_exec)
             target_label = self._exec_key_to_label.get(preferred_key)
         if target_label is None and previous_value in self._installations_by_label:
             target_label = previous_value
@@ -1196,10 +1710,7 @@ class MainWindow(ctk.CTk):
             styles.style_button(self.btn_launch, variant="primary", size="lg", roundness="lg")
 
     def _process_poll_tick(self) -> None:
-        if not self.winfo_exists():
-            return
         self._update_launch_button_state()
-        self.after(1500, self._process_poll_tick)
 
     # -------------------- Connect / load CANoe --------------------
     def _open_or_connect_canoe(self) -> None:
@@ -1223,6 +1734,16 @@ class MainWindow(ctk.CTk):
             self._debug_log("Skipping action: already connected to CANoe COM instance.")
             return
 
+        if self._prewarmer is not None:
+            self._set_status("Pre-warm in progress; CANoe will connect when it is ready.", tone="info")
+            self._debug_log("Open/connect skipped: background pre-warm still running.")
+            return
+
+        if self._connection_profile_for(installation) is not None and self._selected_canoe_is_running():
+            self._debug_log("Stored connection profile found; connecting directly.")
+            self._connect_selected_canoe()
+            return
+
         running_version = self._active_canoe_version()
         self._debug_log(f"Detected active CANoe version: {running_version or 'none'}")
 
@@ -1340,6 +1861,8 @@ class MainWindow(ctk.CTk):
             f"Connecting via COM -> target_prog_id='{target_prog_id}', expected_major={expected_major}, exec='{installation.exec_path}'"
         )
 
+        profile = self._connection_profile_for(installation)
+
         def matches_installation(canoe_obj) -> bool:
             if expected_major is None:
                 return True
@@ -1355,44 +1878,52 @@ class MainWindow(ctk.CTk):
                 )
             return actual_major == expected_major
 
-        prog_id_candidates: list[str] = []
-        if expected_major is not None:
-            for suffix in (
-                f"{expected_major}",
-                f"{expected_major}.0",
-                f"{expected_major:02d}",
-                f"{expected_major:02d}.0",
-            ):
-                candidate = f"CANoe.Application.{suffix}"
-                if _prog_id_exists(candidate):
-                    prog_id_candidates.append(candidate)
+        connect_started = time.perf_counter()
+        with span("connect", installation=installation.label, profile=profile is not None) as connect_span:
+            connected_prog_id: str | None = None
+            used_profile = False
+            if profile is not None:
+                def matches_profile(canoe_obj) -> bool:
+                    try:
+                        return str(canoe_obj.Version) == profile.version
+                    except Exception:
+                        return False
 
-        for prog_id in (target_prog_id, "CANoe.Application", "CANoe.Application.1"):
-            if prog_id and prog_id not in prog_id_candidates:
-                prog_id_candidates.append(prog_id)
+                self._debug_log(
+                    f"Trying stored connection profile -> prog_id='{profile.prog_id}', version='{profile.version}'"
+                )
+                self.canoe, connected_prog_id = _attach_running_canoe_with_prog_id(
+                    [profile.prog_id], matches_profile, timeout=0.75, interval=0.1
+                )
+                used_profile = self.canoe is not None
+                if not used_profile:
+                    self._debug_log("Stored connection profile did not match; falling back to full probing.")
 
-        self._debug_log(f"COM attach candidates: {prog_id_candidates}")
-        self.canoe = _attach_running_canoe(prog_id_candidates, matches_installation, timeout=15.0)
-        attached_from_running = self.canoe is not None
+            if self.canoe is None:
+                self.canoe, connected_prog_id = self._probe_canoe_prog_ids(
+                    installation, expected_major, matches_installation
+                )
 
-        if self.canoe is None:
-            self._debug_log("COM attach failed: trying to spawn a matching CANoe COM server.")
-            self.canoe = _spawn_canoe_instance(prog_id_candidates, matches_installation, timeout=20.0)
-            if self.canoe is not None:
-                self._debug_log("Spawned new CANoe instance via COM and obtained handle.")
+            if self.canoe is None:
+                connect_span.end(ok=False, error="no matching COM instance")
+                self._set_status("Cannot connect to the selected CANoe version", tone="danger")
+                styles.style_button(self.btn_launch, variant="danger", size="lg", roundness="lg")
+                self._debug_log("COM attach failed: unable to spawn or attach to CANoe instance.")
+                return
 
-        if self.canoe is None:
-            self._set_status("Cannot connect to the selected CANoe version", tone="danger")
-            styles.style_button(self.btn_launch, variant="danger", size="lg", roundness="lg")
-            self._debug_log("COM attach failed: unable to spawn or attach to CANoe instance.")
-            return
-        elif attached_from_running:
-            self._debug_log("Attached to already-running CANoe instance via COM.")
+            connect_ms = (time.perf_counter() - connect_started) * 1000.0
+            connect_span.end(via="profile" if used_profile else "probe", prog_id=connected_prog_id)
+
+        self._debug_log(
+            f"COM attach took {connect_ms:.0f} ms via {'stored profile' if used_profile else 'full probing'} "
+            f"(prog_id='{connected_prog_id}')."
+        )
+        self._record_connection_profile(installation, connected_prog_id, connect_ms, used_profile)
 
         cfg = self.canoe_config.get().strip()
         if cfg:
             try:
-                load_canoe_config(self.canoe, cfg)
+                self.session.load_config(cfg)
             except Exception as e:
                 self._set_status(f"Connected but failed to load cfg: {e}", tone="warning")
                 self._debug_log(f"Connected but failed to load cfg '{cfg}': {e!r}")
@@ -1410,132 +1941,149 @@ class MainWindow(ctk.CTk):
         self._update_launch_button_state()
         self._sync_measurement_ui()
 
-    # -------------------- Timestamp helpers --------------------
-    def _format_measurement_timestamp(self) -> str:
+    def start_prewarm(self) -> None:
         """
-        Timestamp relative to measurement start.
-        Prefer CANoe's Measurement.GetTime(); fallback to our wall-clock delta.
+        Launch, attach and load the remembered installation/cfg on a worker
+        thread while the operator fills in the session fields. Progress is
+        polled from the Tk loop; the final COM attach happens here on the UI
+        thread and takes the fast path.
         """
-        seconds_float: float | None = None
-        if self.canoe is not None:
-            try:
-                seconds_float = float(self.canoe.Measurement.GetTime())
-            except Exception:
-                seconds_float = None
-        if seconds_float is None:
-            if self._record_start_wallclock is not None:
-                seconds_float = max(0.0, time.time() - self._record_start_wallclock)
-            else:
-                seconds_float = 0.0
-        return self._format_seconds(seconds_float)
-
-    @staticmethod
-    def _format_seconds(elapsed_seconds: float) -> str:
-        total_ms = int(elapsed_seconds * 1000.0)
-        ms = total_ms % 1000
-        total_sec = total_ms // 1000
-        s = total_sec % 60
-        total_min = total_sec // 60
-        m = total_min % 60
-        h = total_min // 60
-        return f"{h:02d}:{m:02d}:{s:02d}.{ms:03d}"
-
-    def _reset_current_session_state(self) -> None:
-        self.comment_file_path = None
-        self._current_log_folder = None
-        self._current_prefix = None
-        self._record_start_wallclock = None
-        self._comment_metadata_written = False
-
-    def _resolve_current_log_suffix(self) -> str | None:
-        folder = self._current_log_folder
-        prefix = self._current_prefix
-        start_ts = self._record_start_wallclock
-        if folder is None or prefix is None or start_ts is None:
-            return None
-
-        ignore_ext = {".txt", ".avi", ".tmp"}
-        best_path = None
-        best_mtime = -1.0
-
-        try:
-            for p in folder.iterdir():
-                if not p.is_file():
-                    continue
-                if not p.name.startswith(prefix):
-                    continue
-                if p.suffix.lower() in ignore_ext:
-                    continue
-                mtime = p.stat().st_mtime
-                if mtime + 1.0 < start_ts:
-                    continue
-                if mtime > best_mtime:
-                    best_mtime = mtime
-                    best_path = p
-        except Exception:
-            return None
-
-        if best_path is None:
+        installation = self._selected_canoe_installation()
+        if installation is None or self.canoe is not None or self._prewarmer is not None:
+            return
+        cfg = self.canoe_config.get().strip()
+        expected_major = _major_from_hint(installation.version_hint)
+        prog_ids = self._prog_id_candidates(installation, expected_major)
+        profile = self._connection_profile_for(installation)
+        if profile is not None:
+            prog_ids = [profile.prog_id, *(p for p in prog_ids if p != profile.prog_id)]
+
+        self._prewarmer = prewarmer_for_installation(
+            installation,
+            cfg,
+            prog_ids=prog_ids,
+            fingerprints=self._fingerprints,
+            cfg_cache_dir=self.paths.data_dir / "cfg_index",
+        )
+        self._debug_log(f"Pre-warm started -> exec='{installation.exec_path}', cfg='{cfg or '-'}'")
+        self._set_status("Pre-warming CANoe…", tone="info")
+        self._prewarmer.start()
+        self.scheduler.add("prewarm", self._poll_prewarm, 0.2, priority=PRIORITY_IO)
+        self._rearm_scheduler()
+
+    def _poll_prewarm(self) -> bool | None:
+        prewarmer = self._prewarmer
+        if prewarmer is None:
+            return False
+        for stage in prewarmer.updates():
+            if stage.status == "running":
+                self._set_status(f"Pre-warm: {stage.name}…", tone="info")
+                continue
+            emit("prewarm_stage", stage=stage.name, status=stage.status, elapsed_ms=round(stage.elapsed_ms, 1))
+            detail = f" ({stage.detail})" if stage.detail else ""
+            self._debug_log(f"Pre-warm stage '{stage.name}' {stage.status} after {stage.elapsed_ms:.0f} ms{detail}")
+        if not prewarmer.done.is_set():
             return None
 
-        stem = best_path.stem
-        if not stem.startswith(prefix):
-            return None
-        suffix = stem[len(prefix):]
-        return suffix or None
+        self._prewarmer = None
+        self._debug_log(f"Pre-warm finished in {prewarmer.total_ms:.0f} ms: {prewarmer.summary()}")
+        emit("prewarm_done", ok=prewarmer.succeeded, total_ms=round(prewarmer.total_ms, 1))
+        if not prewarmer.succeeded:
+            self._set_status("Pre-warm did not complete; connect manually.", tone="warning")
+            self._update_launch_button_state()
+            return False
+        if self.canoe is None:
+            self._connect_selected_canoe()
+        self._debug_log(f"Ready to record {prewarmer.total_ms / 1000.0:.1f} s after pre-warm start.")
+        return False
 
-    def _delete_current_log_files(self) -> tuple[int, int, bool]:
+    def _probe_canoe_prog_ids(
+        self, installation: CANoeInstallation, expected_major: int | None, matcher
+    ) -> tuple[object | None, str | None]:
         """
-        Delete files belonging to the current log run.
-        Returns (deleted_count, failed_count, removed_folder).
+        Full ProgID probing: attach to a running instance, else spawn one.
+        Returns (canoe, prog_id) or (None, None).
         """
-        folder = self._current_log_folder
-        prefix = self._current_prefix
-        start_ts = self._record_start_wallclock
-        if folder is None or prefix is None or start_ts is None:
-            return 0, 0, False
+        prog_id_candidates = self._prog_id_candidates(installation, expected_major)
+        self._debug_log(f"COM attach candidates: {prog_id_candidates}")
+        canoe, prog_id = _attach_running_canoe_with_prog_id(prog_id_candidates, matcher, timeout=15.0)
+        if canoe is not None:
+            self._debug_log("Attached to already-running CANoe instance via COM.")
+            return canoe, prog_id
 
-        suffix = self._resolve_current_log_suffix()
-        deleted = 0
-        failed = 0
+        self._debug_log("COM attach failed: trying to spawn a matching CANoe COM server.")
+        canoe, prog_id = _spawn_canoe_instance_with_prog_id(prog_id_candidates, matcher, timeout=20.0)
+        if canoe is not None:
+            self._debug_log("Spawned new CANoe instance via COM and obtained handle.")
+        return canoe, prog_id
 
-        try:
-            for p in folder.iterdir():
-                if not p.is_file():
-                    continue
-                name = p.name
-                if suffix is not None:
-                    match_main = name.startswith(f"{prefix}{suffix}")
-                    match_video = name.startswith(f"_{prefix}{suffix}_")
-                    if not (match_main or match_video):
-                        continue
-                else:
-                    if not (name.startswith(prefix) or name.startswith(f"_{prefix}")):
-                        continue
-                    try:
-                        mtime = p.stat().st_mtime
-                    except Exception:
-                        continue
-                    if mtime + 1.0 < start_ts:
-                        continue
+    def _prog_id_candidates(self, installation: CANoeInstallation, expected_major: int | None) -> list[str]:
+        prog_id_candidates: list[str] = []
+        indexed = self._registry_index.prog_ids_for(installation.exec_path)
+        if indexed:
+            preferred = self._registry_index.best_prog_id(installation.exec_path, expected_major)
+            prog_id_candidates.extend(p for p in [preferred, *indexed] if p and p not in prog_id_candidates)
+        elif expected_major is not None:
+            for suffix in (
+                f"{expected_major}",
+                f"{expected_major}.0",
+                f"{expected_major:02d}",
+                f"{expected_major:02d}.0",
+            ):
+                candidate = f"CANoe.Application.{suffix}"
+                if _prog_id_exists(candidate):
+                    prog_id_candidates.append(candidate)
 
-                try:
-                    p.unlink()
-                    deleted += 1
-                except Exception:
-                    failed += 1
-        except Exception:
-            failed += 1
+        for prog_id in (installation.prog_id, "CANoe.Application", "CANoe.Application.1"):
+            if prog_id and prog_id not in prog_id_candidates:
+                prog_id_candidates.append(prog_id)
+        return prog_id_candidates
 
-        removed_folder = False
+    def _connection_profile_for(self, installation: CANoeInstallation) -> ConnectionProfile | None:
+        profile = self._connection_profiles.get(normalize_path_key(installation.exec_path))
+        if profile is None or not profile.prog_id or not profile.version:
+            return None
+        return profile
+
+    def _record_connection_profile(
+        self,
+        installation: CANoeInstallation,
+        prog_id: str | None,
+        connect_ms: float,
+        used_profile: bool,
+    ) -> None:
+        """Remember the ProgID/version that just worked for this installation."""
+        if not prog_id or self.canoe is None:
+            return
         try:
-            if folder.exists() and not any(folder.iterdir()):
-                folder.rmdir()
-                removed_folder = True
+            version = str(self.canoe.Version)
         except Exception:
-            removed_folder = False
+            return
+        self._connection_profiles[normalize_path_key(installation.exec_path)] = ConnectionProfile(
+            prog_id=prog_id,
+            version=version,
+            connect_ms=round(connect_ms, 1),
+            fast_path=used_profile,
+            connected_at=datetime.now().isoformat(timespec="seconds"),
+        )
+        try:
+            save_connection_profiles(self._connection_profiles, self.paths)
+        except Exception as exc:
+            self._debug_log(f"Could not save connection profile: {exc!r}")
 
-        return deleted, failed, removed_folder
+    # -------------------- Session helpers --------------------
+    def _session_metadata(self) -> SessionMetadata:
+        vehicle_id = (self.vehicle_id.get() or "").strip()
+        return SessionMetadata(
+            sw_rel=self.sw_rel.get(),
+            me_version=self.me_version_var.get(),
+            tag=self.log_tag.get(),
+            vehicle_id=vehicle_id,
+            vehicle_token=self._vehicle_prefix_component(),
+            vehicle_model=self._vehicle_descriptor(vehicle_id) or "",
+            vehicle_number=VEHICLE_NUMBERS.get(vehicle_id.upper()) if vehicle_id else None,
+            title=self._app_title(),
+        )
 
     def _on_discard_click(self) -> None:
         """
@@ -1545,16 +2093,13 @@ class MainWindow(ctk.CTk):
             self._set_status("⚠️ No active recording to discard", tone="warning")
             return
 
+        self._active_recording = None  # nothing left to verify or move
         try:
-            self.canoe.Measurement.Stop()
-        except Exception as e:
-            self._set_status(f"❌ Discard failed to stop measurement: {e}", tone="danger")
+            deleted, failed, removed_folder = self.session.discard()
+        except SessionError as e:
+            self._set_status(f"❌ {e}", tone="danger")
             return
 
-        time.sleep(0.5)
-        deleted, failed, removed_folder = self._delete_current_log_files()
-        self._reset_current_session_state()
-
         if failed:
             self._set_status(f"⚠️ Discarded with {failed} delete error(s)", tone="warning")
         elif deleted:
@@ -1566,107 +2111,283 @@ class MainWindow(ctk.CTk):
     # -------------------- Comment file name resolution --------------------
     def _schedule_comment_filename_resolution(self) -> None:
         """
-        Start polling the log folder to resolve the final comment_file_path.
+        Start polling the log folder to resolve the final comment file path.
         We need to wait for CANoe to actually create the log files with the
         real {MeasurementStart} timestamp in the filename.
         """
         self._resolve_tries = 0
-        self.after(500, self._try_resolve_comment_filename_poll)
+        self.scheduler.add("comment_resolve", self._try_resolve_comment_filename_poll, 0.5, priority=PRIORITY_IO)
+        self._rearm_scheduler()
 
-    def _try_resolve_comment_filename_poll(self) -> None:
+    def _try_resolve_comment_filename_poll(self) -> bool:
         """
-        Poll loop to resolve comment_file_path.
+        Poll loop to resolve the comment file path.
         If resolved: announce and stop.
         If not resolved after N tries: fallback to a wall-clock timestamp.
         """
-        if self._current_log_folder is None or self._current_prefix is None:
-            return
+        recording = self.session.session
+        if recording is None:
+            return False
 
-        resolved = self._try_resolve_comment_filename_once()
-        if resolved:
-            self._set_status(f"📝 Comments → {self.comment_file_path.name}", tone="info")
-            return
+        if self.session.resolve_comment_file():
+            self._set_status(f"📝 Comments → {recording.comment_path.name}", tone="info")
+            self._start_blf_tail()
+            return False
 
         self._resolve_tries += 1
         if self._resolve_tries <= 30:  # ~15 s total (30 * 0.5s)
-            self.after(500, self._try_resolve_comment_filename_poll)
+            return True
         else:
-            # Fallback: build a unique name from wall clock
-            ts = datetime.now().strftime("%Y-%m-%d_%H-%M-%S")
-            self.comment_file_path = (
-                self._current_log_folder
-                / f"{self._current_prefix}{ts}.txt"
-            ).resolve()
+            fallback_path = self.session.use_fallback_comment_file()
             self._set_status(
-                f"⚠️ Could not resolve MeasurementStart; using {self.comment_file_path.name}",
+                f"⚠️ Could not resolve MeasurementStart; using {fallback_path.name}",
                 tone="warning",
             )
+            return False
 
-    def _try_resolve_comment_filename_once(self) -> bool:
+    # -------------------- Live log statistics --------------------
+    def _start_blf_tail(self) -> None:
         """
-        Single attempt:
-        - Look into the log folder.
-        - Find files that start with current prefix (e.g. 'R300RC1_VEH123_tag_').
-        - Ignore .txt/.avi/.tmp (we only care about CANoe log containers).
-        - Keep only files created/modified after we pressed Start (this run),
-          so we don't accidentally reuse an old session's timestamp.
-        - Pick the newest one that matches.
-        - Extract its {MeasurementStart} suffix and build the .txt filename.
+        Follow the session's BLF from disk and show frame rates in the status
+        card. Reads only the bytes CANoe appended since the last tick, no COM.
         """
-        folder = self._current_log_folder
-        prefix = self._current_prefix
-        start_ts = self._record_start_wallclock
-        if folder is None or prefix is None or start_ts is None:
+        recording = self.session.session
+        path = recording.log_path("blf") if recording is not None else None
+        if path is None:
+            return
+        self._blf_tail = BlfTail(path, top=3)
+        self._blf_tail_stall_logged = False
+        self.scheduler.add("blf_tail", self._blf_tail_tick, 1.0, priority=PRIORITY_BACKGROUND, delay=0.0)
+        self._rearm_scheduler()
+
+    def _blf_tail_tick(self) -> bool:
+        tail = self._blf_tail
+        if tail is None or not self.is_recording or self.session.session is None:
+            self._blf_tail = None
+            self._blf_tail_var.set("Logging: --")
             return False
+        snapshot = tail.poll()
+        self._blf_tail_var.set(snapshot.describe())
+        if snapshot.error and snapshot.file_bytes:
+            self._debug_log(f"Live log statistics stopped: {snapshot.error}")
+            self._blf_tail = None
+            return False
+        stalled = snapshot.growth_age is not None and snapshot.growth_age >= 5.0
+        if stalled and not self._blf_tail_stall_logged:
+            self._debug_log(f"{tail.path.name} has not grown for {snapshot.growth_age:.0f} s")
+            emit("blf_stall", path=str(tail.path), age_s=round(snapshot.growth_age, 1))
+        self._blf_tail_stall_logged = stalled
+        return True
 
-        ignore_ext = {".txt", ".avi", ".tmp"}
+    # -------------------- Post-stop integrity check --------------------
+    def _finish_recording(self) -> None:
+        """
+        Measurement stopped: once CANoe has closed the recording's files,
+        verify them, then either (re)build the folder's manifest.json or,
+        for a staged recording, hand the files to the mover, which writes
+        the manifest at the target.
+        """
+        recording, self._active_recording = self._active_recording, None
+        if recording is None:
+            return
+        self._verify_due.append((time.monotonic() + 3.0, recording))
+        if not self.scheduler.has("integrity"):
+            self.scheduler.add("integrity", self._poll_integrity, 0.5, priority=PRIORITY_BACKGROUND)
+            self._rearm_scheduler()
+
+    def _poll_integrity(self) -> bool:
+        now = time.monotonic()
+        for due in [item for item in self._verify_due if item[0] <= now]:
+            self._verify_due.remove(due)
+            recording = due[1]
+            try:
+                files = [p for p in recording.files() if not p.name.endswith(".integrity.json")]
+            except OSError as e:
+                self._debug_log(f"Integrity check skipped for {recording.log_folder}: {e}")
+                continue
+            future = self._verify_executor.submit(self.verifier.verify, files, recording.comment_path.stem)
+            self._verify_running.append((future, recording, files))
 
-        best_path = None
-        best_mtime = -1.0
+        for running in [item for item in self._verify_running if item[0].done()]:
+            self._verify_running.remove(running)
+            future, recording, files = running
+            try:
+                result = future.result()
+                target = record_path(files)
+                if target is not None:
+                    result.write(target)
+            except Exception as e:
+                self._debug_log(f"Integrity check of {recording.comment_path.stem} failed: {e!r}")
+            else:
+                self._report_integrity(result)
+            if self._is_staged(recording):
+                # The mover hashes every file while copying and writes the
+                # manifest at the target from those digests; hashing the
+                # staging folder first would only read the session twice.
+                self._queue_staged_session(recording)
+                continue
+            # The manifest hashes the folder after the integrity record exists, so it covers it.
+            future = self._verify_executor.submit(build_manifest, recording.log_folder, cache=self.hash_cache)
+            self._manifest_running.append((future, recording))
 
-        try:
-            for p in folder.iterdir():
-                if not p.is_file():
-                    continue
-                name = p.name
-                if not name.startswith(prefix):
-                    continue
-                if p.suffix.lower() in ignore_ext:
-                    continue
-
-                mtime = p.stat().st_mtime
-
-                # Only consider files that look "new enough":
-                # allow +1s tolerance in case file time is slightly earlier
-                if mtime + 1.0 < start_ts:
-                    continue
-
-                if mtime > best_mtime:
-                    best_mtime = mtime
-                    best_path = p
-        except Exception:
-            return False
+        for running in [item for item in self._manifest_running if item[0].done()]:
+            self._manifest_running.remove(running)
+            future, recording = running
+            try:
+                manifest = future.result()
+                manifest.write()
+            except Exception as e:
+                self._debug_log(f"Manifest of {recording.log_folder.name} failed: {e!r}")
+            else:
+                self._debug_log(
+                    f"Manifest of {recording.log_folder.name}: {len(manifest.files)} file(s), "
+                    f"{manifest.total_bytes / 1e6:.0f} MB, {manifest.cached_files} from cache, "
+                    f"{manifest.hashed_bytes / 1e6:.0f} MB hashed in {manifest.elapsed_s:.1f} s"
+                )
+                emit(
+                    "manifest",
+                    folder=str(recording.log_folder),
+                    files=len(manifest.files),
+                    tree_sha256=manifest.tree_sha256,
+                    hashed_bytes=manifest.hashed_bytes,
+                    elapsed_s=manifest.elapsed_s,
+                )
+            self._request_archive_scan()
+        return bool(self._verify_due or self._verify_running or self._manifest_running)
 
-        if best_path is None:
+    def _report_integrity(self, result: SessionIntegrity) -> None:
+        summary = (
+            f"{len(result.files)} file(s), {result.total_bytes / 1e6:.0f} MB checked in {result.elapsed_s:.1f} s"
+        )
+        emit("integrity", label=result.label, ok=result.ok, problems=result.problems, elapsed_s=result.elapsed_s)
+        if result.ok:
+            self._debug_log(f"Integrity OK for {result.label}: {summary}")
+            return
+        self._debug_log(f"Integrity problems in {result.label} ({summary}):")
+        for problem in result.problems:
+            self._debug_log(f"  - {problem}")
+        if not self.is_recording:
+            first = result.problems[0]
+            more = f" (+{len(result.problems) - 1} more)" if len(result.problems) > 1 else ""
+            self._set_status(f"⚠️ Integrity: {first}{more}", tone="warning")
+
+    # -------------------- Staging mover --------------------
+    def _is_staged(self, recording: RecordingSession) -> bool:
+        """True if the recording was made in the staging folder and goes to log_dir through the mover."""
+        staging = self._staging_root()
+        if staging is None or self._resolve_log_root() is None:
             return False
+        return staging.resolve() in recording.log_folder.resolve().parents
 
-        # Extract suffix after the prefix, from the stem (no extension)
-        suffix = best_path.stem[len(prefix):]
-        if not suffix:
-            return False
+    def _queue_staged_session(self, recording: RecordingSession) -> None:
+        """Hand a stopped recording made in the staging folder to the mover (log_dir is the target)."""
+        if not self._is_staged(recording):
+            return  # recorded straight to log_dir
+        staging, target = self._staging_root(), self._resolve_log_root()
+        try:
+            files = recording.files()
+            job = job_for_files(files, staging, target, label=recording.comment_path.stem)
+        except (OSError, ValueError) as e:
+            self._debug_log(f"Could not queue {recording.log_folder} for the mover: {e}")
+            return
+        if not job.files:
+            return
+        self.mover.enqueue(job)
+        self._debug_log(f"Queued {len(job.files)} file(s) of {job.label} for {target}.")
+
+    def _poll_mover(self) -> None:
+        # The mover never competes with a running measurement.
+        if self.is_recording and not self.mover.paused:
+            self.mover.pause()
+        elif not self.is_recording and self.mover.paused:
+            self.mover.resume()
+        for tone, message in self.mover.drain_messages():
+            self._debug_log(message)
+            if tone != "success" or not self.is_recording:
+                self._set_status(f"{'📦' if tone == 'success' else '⚠️'} {message}", tone=tone)
+
+    # -------------------- Archive pipeline --------------------
+    def _archive_root(self) -> Path | None:
+        if not self._archive_dir:
+            return None
+        return Path(os.path.expandvars(self._archive_dir)).expanduser()
 
-        new_path = (folder / f"{prefix}{suffix}.txt").resolve()
-        if self.comment_file_path and self.comment_file_path != new_path:
-            try:
-                if self.comment_file_path.exists():
-                    new_path.parent.mkdir(parents=True, exist_ok=True)
-                    self.comment_file_path.replace(new_path)
-            except Exception:
-                # Keep the original file if renaming fails.
-                return True
+    def _make_archiver(self) -> ArchivePipeline | None:
+        root = self._archive_root()
+        if root is None:
+            return None
+        try:
+            codecs = parse_codecs(self._archive_codecs)
+        except ValueError as e:
+            self._debug_log(f"archive_codecs ignored, using the defaults: {e}")
+            codecs = None
+        return ArchivePipeline(
+            root,
+            self.paths.data_dir / "archive_queue.json",
+            workers=self._archive_workers,
+            codecs=codecs,
+            delete_source=self._archive_delete_source,
+        )
 
-        self.comment_file_path = new_path
-        return True
+    def _request_archive_scan(self) -> None:
+        """Let the archiver look for finished sessions in log_dir (it walks the tree on its own thread)."""
+        log_root = self._resolve_log_root()
+        if self.archiver is None or log_root is None:
+            return
+        self._archive_scanned_at = time.monotonic()
+        self._archive_moves_seen = self.mover.stats.jobs_done
+        staging = self._staging_root()
+        self.archiver.request_scan(log_root, exclude=(staging,) if staging is not None else ())
+
+    def _poll_archiver(self) -> None:
+        archiver = self.archiver
+        # Like the mover, archiving never competes with a running measurement.
+        if self.is_recording and not archiver.paused:
+            archiver.pause()
+        elif not self.is_recording and archiver.paused:
+            archiver.resume()
+        # Moved sessions get their manifest at the target, so they are new candidates.
+        if (
+            self.mover.stats.jobs_done != self._archive_moves_seen
+            or time.monotonic() - self._archive_scanned_at >= self._archive_scan_interval
+        ):
+            self._request_archive_scan()
+        for tone, message in archiver.drain_messages():
+            self._debug_log(message)
+            if tone == "success":
+                emit("archive", message=message, **archiver.stats.to_dict())
+            if tone == "warning" or (tone == "success" and not self.is_recording):
+                self._set_status(f"{'🗜️' if tone == 'success' else '⚠️'} {message}", tone=tone)
+
+    # -------------------- Storage --------------------
+    def _sample_storage(self) -> None:
+        """
+        Free space and write rate of the log volume; warns when the disk
+        would fill within disk_warn_minutes (again after it recovered).
+        """
+        if not self.storage.tracking:
+            self.storage.root = self._staging_root() or self._resolve_log_root()
+        if self.storage.tracking and not self.is_recording:
+            self.storage.untrack()
+            if self.storage.last_rate:
+                self._debug_log(f"Last recording wrote {self.storage.last_rate / 1e6:.1f} MB/s on average.")
+        sample = self.storage.sample()
+        if sample is None:
+            self._storage_var.set("Disk: --")
+            return
+        self._storage_var.set(sample.describe())
+        if sample.time_to_full is None or not self._disk_warn_minutes:
+            return
+        low = sample.time_to_full < self._disk_warn_minutes * 60.0
+        if low and not self._storage_warned:
+            message = (
+                f"Disk full in ~{format_duration(sample.time_to_full)} "
+                f"({sample.free_bytes / 1e9:.1f} GB free at {sample.rate / 1e6:.1f} MB/s)"
+            )
+            self._set_status(f"⚠️ {message}", tone="warning")
+            self._debug_log(message)
+            emit("disk_low", free_bytes=sample.free_bytes, rate=round(sample.rate), eta_s=round(sample.time_to_full))
+        self._storage_warned = low
 
     # -------------------- Comment save --------------------
     def _on_save_comment_click(self) -> None:
@@ -1675,7 +2396,9 @@ class MainWindow(ctk.CTk):
         and append it to the resolved .txt comment log.
         Format per line: [HH:MM:SS.mmm] comment text
         """
-        if self.canoe is None or not self.is_recording:
+        pressed_at = time.perf_counter()
+        recording = self.session.session
+        if self.canoe is None or not self.is_recording or recording is None:
             self._set_status("❌ Cannot save comment (not recording)", tone="danger")
             return
 
@@ -1684,20 +2407,10 @@ class MainWindow(ctk.CTk):
             self._set_status("⚠️ Empty comment, not saved", tone="warning")
             return
 
-        if self.comment_file_path is None:
-            self._set_status("❌ Comment file not yet resolved", tone="warning")
-            return
-
         try:
-            ts = self._format_measurement_timestamp()
-            line = f"[{ts}] {comment}\n"
-
-            self.comment_file_path.parent.mkdir(parents=True, exist_ok=True)
-            with open(self.comment_file_path, "a", encoding="utf-8") as f:
-                f.write(line)
-
+            self.session.add_comment(comment, pressed_at=pressed_at)
             self.comment_box.delete("1.0", "end")
-            self._set_status(f"💬 Comment saved to {self.comment_file_path.name}", tone="success")
+            self._set_status(f"💬 Comment saved to {recording.comment_path.name}", tone="success")
         except Exception as e:
             self._set_status(f"❌ Could not save comment: {e}", tone="danger")
 
@@ -1712,39 +2425,6 @@ class MainWindow(ctk.CTk):
         self._on_save_comment_click()
         return "break"
 
-    def _write_comment_metadata(self) -> None:
-        if self.comment_file_path is None or self._comment_metadata_written:
-            return
-
-        vehicle_id = (self.vehicle_id.get() or "").strip()
-        vehicle_model = self._vehicle_descriptor(vehicle_id)
-        vehicle_number = VEHICLE_NUMBERS.get(vehicle_id.upper()) if vehicle_id else None
-
-        def fallback(value: str | None) -> str:
-            return (value or "").strip() or "--"
-
-        lines = [
-            "Recording metadata",
-            f"Timestamp: {datetime.now().strftime('%Y-%m-%d %H:%M:%S')}",
-            f"Title: {fallback(self._app_title())}",
-            f"SW release: {fallback(self.sw_rel.get())}",
-            f"ME version: {fallback(self.me_version_var.get())}",
-            f"Recording tag: {fallback(self.log_tag.get())}",
-            f"Vehicle model: {fallback(vehicle_model)}",
-            f"Vehicle plate/ID: {fallback(vehicle_id)}",
-            f"Vehicle number: {vehicle_number if vehicle_number is not None else '--'}",
-            "",
-            "Operator comments:",
-        ]
-
-        try:
-            self.comment_file_path.parent.mkdir(parents=True, exist_ok=True)
-            with open(self.comment_file_path, "w", encoding="utf-8") as f:
-                f.write("\n".join(lines) + "\n")
-            self._comment_metadata_written = True
-        except Exception:
-            pass
-
     # -------------------- Start / Stop logic --------------------
     def _on_start_stop_click(self) -> None:
         """
@@ -1760,127 +2440,105 @@ class MainWindow(ctk.CTk):
             return
 
         try:
-            currently_running = bool(self.canoe.Measurement.Running)
-        except Exception as e:
-            self._set_status(f"❌ Lost CANoe connection: {e}", tone="danger")
-            self._debug_log(f"Start/Stop failed: cannot read Measurement.Running ({e!r}).")
-            self.canoe = None
+            currently_running = self.session.measurement_running()
+        except SessionError as e:
+            self._set_status(f"❌ {e}", tone="danger")
+            self._debug_log(f"Start/Stop failed: cannot read Measurement.Running ({e}).")
             self._update_launch_button_state()
             return
 
         # -------- STOP CASE --------
         if currently_running:
             try:
-                self.canoe.Measurement.Stop()
-                self._debug_log("Stop requested via CANoe.Measurement.Stop().")
-            except Exception as e:
-                self._set_status(f"❌ Stop failed: {e}", tone="danger")
-                self._debug_log(f"Stop failed: {e!r}")
+                self.session.stop()
+            except SessionError as e:
+                self._set_status(f"❌ {e}", tone="danger")
+                self._debug_log(f"Stop failed: {e}")
                 return
-
-            # Clear current session state
-            self._reset_current_session_state()
             self._debug_log("Stop completed; session state cleared.")
             return
 
         # -------- START CASE --------
-
-        # 1) Persist UI state to disk
-        self._persist_state_snapshot()
+        # Persist UI state to disk, then let the session configure and start.
+        self._persist_state_snapshot(flush=True)
         self._debug_log("State snapshot saved.")
 
-        # 2) Prepare output dirs / naming
-        log_root = self._resolve_log_root()
-        if log_root is None:
-            self._set_status("Log directory is not configured.", tone="danger")
-            self._debug_log("Start aborted: log directory not configured.")
-            return
-        if not log_root.exists():
-            self._set_status(f"Log directory does not exist: {log_root}", tone="danger")
-            self._debug_log(f"Start aborted: log directory does not exist ({log_root}).")
+        try:
+            log_root = self._recording_root()
+        except OSError as e:
+            self._set_status(f"❌ Staging folder unavailable: {e}", tone="danger")
             return
-        if not log_root.is_dir():
-            self._set_status(f"Log path is not a folder: {log_root}", tone="danger")
-            self._debug_log(f"Start aborted: log directory is not a folder ({log_root}).")
+        self.storage.root = log_root
+        problem = self.storage.headroom_problem(self._min_record_minutes * 60.0, self._expected_write_mb_s * 1e6)
+        if problem is not None:
+            self._set_status(f"❌ {problem}", tone="danger")
+            self._debug_log(f"Start refused: {problem}")
             return
 
         try:
-            resolved_root = log_root.resolve()
-        except Exception:
-            resolved_root = log_root
-        release_dir = resolved_root / f"{self.sw_rel.get()}"
-        release_dir.mkdir(parents=True, exist_ok=True)
-
-        date = datetime.now().strftime("%Y-%m-%d")
-        # sanitize components for filenames
-        safe_tag = (self.log_tag.get() or "").replace(" ", "_")
-        rel = (self.sw_rel.get() or "").replace(" ", "_")
-        veh = self._vehicle_prefix_component()
-
-        # base string CANoe will expand. CANoe will replace {MeasurementStart}
-        # Include only the vehicle number tag in the logging "title"/prefix.
-        # Example: R300RC1_Veh1_myCase_{MeasurementStart}
-        base_prefix_parts = [rel]
-        if veh:
-            base_prefix_parts.append(veh)
-        if safe_tag:
-            base_prefix_parts.append(safe_tag)
-        base_prefix = "_".join([p for p in base_prefix_parts if p])
-
-        log_name = f"{base_prefix}_{{MeasurementStart}}"
-        log_folder_name = base_prefix  # keep folder grouped by SW+Vehicle(+Tag)
-
-        log_folder = release_dir / f"{rel}_{date}" / log_folder_name
-        log_folder.mkdir(parents=True, exist_ok=True)
-        self._debug_log(f"Log folder resolved to {log_folder}")
-
-        # Save info so we can later resolve the comment file name
-        self._current_log_folder = log_folder
-        self._current_prefix = f"{base_prefix}_"
-        self._record_start_wallclock = time.time()
-        self._comment_metadata_written = False
-
-        # Create the comment file immediately with a wall-clock suffix.
-        ts = datetime.now().strftime("%Y-%m-%d_%H-%M-%S")
-        self.comment_file_path = (log_folder / f"{base_prefix}_{ts}.txt").resolve()
-        self._write_comment_metadata()
-        self._debug_log(f"Comment file initialized at {self.comment_file_path}")
+            recording = self.session.start(log_root, self._session_metadata())
+        except SessionError as e:
+            self._set_status(f"❌ {e}", tone="danger")
+            self._debug_log(f"Start aborted: {e}")
+            return
+        self.storage.track(recording.log_folder, recording.prefix, recording.started_wallclock)
+        self.mover.pause()
+        if self.archiver is not None:
+            self.archiver.pause()
+        self._active_recording = recording
+        self._storage_warned = False
+        self._wake_tasks("storage")
+        for warning in recording.warnings:
+            self._set_status(f"⚠️ {warning}", tone="warning")
+
+        # After CANoe starts, resolve the actual filename suffix CANoe used
+        self._debug_log("Scheduling comment filename resolution.")
+        self._schedule_comment_filename_resolution()
 
+    def _preview_logging_plan(self) -> None:
+        """
+        Dry run of Start: log the paths CANoe would be pointed at.
+        Before connecting, the plan comes from the offline cfg scan.
+        """
+        if self.canoe is None and self.session.cfg_summary is None:
+            self._set_status("❌ Not connected", tone="danger")
+            return
+        log_root = self._staging_root() or self._resolve_log_root()
+        if log_root is None:
+            self._set_status("Log directory is not configured.", tone="danger")
+            return
+        log_folder, _base_prefix, log_name = session_naming(log_root, self._session_metadata())
         try:
-            # 3) Configure CANoe logging blocks to point at <log_folder>/<log_name>.ext
-            logging_collection = self.canoe.Configuration.OnlineSetup.LoggingCollection
-            try:
-                for i in range(logging_collection.Count):
-                    log_block = logging_collection.Item(i + 1)
-                    original_name_split = log_block.FullName.split(".")
-                    file_extension = original_name_split[-1]
-                    log_block.FullName = str((log_folder / f"{log_name}.{file_extension}").resolve())
-                self._debug_log(f"Logging blocks updated: {logging_collection.Count}")
-            except Exception as e:
-                self._set_status(f"⚠️ Could not set logging blocks: {e}", tone="warning")
-                self._debug_log(f"Logging block update failed: {e!r}")
-
-            # 4) Configure CANoe video captures to same folder
-            video_config = self.canoe.Configuration.OnlineSetup.VideoWindows
-            for i in range(video_config.Count):
-                vw = video_config.Item(i + 1)
-                video_name = vw.Name
-                vw.RecordFile = str((log_folder / f"_{log_name}_{video_name}.avi").resolve())
-            self._debug_log(f"Video windows updated: {video_config.Count}")
-
-            # 5) Start CANoe measurement
-            self.canoe.Measurement.Start()
-            time.sleep(0.5)
-            self._debug_log("CANoe.Measurement.Start() invoked.")
-
+            if self.canoe is not None:
+                plan = self.session.ensure_logging_plan()
+            else:
+                plan = plan_from_cfg_summary(self.session.cfg_summary)
+            planned = plan.apply(log_folder, log_name, dry_run=True)
         except Exception as e:
-            self._set_status(f"❌ Error on logging setup/start: {e}", tone="danger")
-            self._debug_log(f"Start failed: {e!r}")
+            self._set_status(f"❌ Preview failed: {e}", tone="danger")
+            self._debug_log(f"Logging plan preview failed: {e!r}")
             return
-
-        # 6) After CANoe starts, resolve the actual filename suffix CANoe used
-        self._debug_log("Scheduling comment filename resolution.")
-        self._schedule_comment_filename_resolution()
+        for assignment in planned:
+            self._debug_log(f"Preview {assignment.kind} #{assignment.index}: {assignment.path}")
+        self._toggle_debug_panel(force_state=True)
+        self._set_status(f"🔎 {len(planned)} output path(s) previewed", tone="info")
+
+    def _log_com_stats(self) -> None:
+        """Top COM call sites by total time since the hub started."""
+        stats = self.session.com_stats
+        if stats is None:
+            self._debug_log("COM call accounting is off (set \"com_stats\": true in state.json).")
+            return
+        lines = stats.format_top(8)
+        self._debug_log(f"COM calls: {stats.total_calls} total; top by time:")
+        for line in lines or ["(none yet)"]:
+            self._debug_log(f"  {line}")
+
+    def _log_scheduler_stats(self) -> None:
+        """Run counts, durations and budget overruns of the periodic tasks."""
+        self._debug_log("Periodic tasks:")
+        for line in self.scheduler.format_stats():
+            self._debug_log(f"  {line}")
 
     # -------------------- Debug helper --------------------
     def _check_logging(self) -> None: